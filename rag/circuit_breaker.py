@@ -0,0 +1,224 @@
+"""Circuit breakers for remote dependencies (Qdrant, Gemini).
+
+When a dependency is down or overloaded, every request would otherwise
+wait for its full timeout before failing, tying up workers and making the
+frontend's fallback slow. A breaker watches the outcome of recent calls;
+once the share of failed or slow calls over a sliding window crosses a
+threshold it opens and rejects calls immediately with CircuitOpenError.
+After open_sec it lets a limited number of trial calls through
+(half-open): if they succeed the circuit closes, otherwise it opens again.
+
+A call cancelled by its caller (e.g. the request deadline) counts as a
+failure only if it had already run longer than the slow-call threshold.
+"""
+
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from typing import Any, TypeVar
+
+from config import get_settings
+from metrics import get_metrics
+from middleware.logging import get_logger
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Gauge values of <name>_circuit_state
+_STATE_GAUGE = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency whose circuit is open."""
+
+    def __init__(self, name: str, retry_after_sec: float) -> None:
+        super().__init__(f"{name} circuit is open; retry in {retry_after_sec:.1f}s")
+        self.name = name
+        self.retry_after_sec = retry_after_sec
+
+
+class CircuitBreaker:
+    """Sliding-window circuit breaker for one dependency."""
+
+    def __init__(
+        self,
+        name: str,
+        window: int = 20,
+        min_calls: int = 10,
+        failure_rate: float = 0.5,
+        slow_call_ms: float | None = None,
+        open_sec: float = 15.0,
+        half_open_calls: int = 1,
+        enabled: bool = True,
+    ) -> None:
+        """Initialize a closed breaker.
+
+        Args:
+            name: Dependency name (metric prefix and /health/ready key)
+            window: Number of recent calls the failure rate is computed over
+            min_calls: Calls required in the window before the circuit can open
+            failure_rate: Share of failed or slow calls (0-1) that opens the circuit
+            slow_call_ms: Calls slower than this count as failures (None = never)
+            open_sec: Time the circuit stays open before trial calls
+            half_open_calls: Successful trial calls required to close again
+                (also the number of trials allowed at once)
+            enabled: Pass every call straight through when False
+        """
+        self.name = name
+        self._window: deque[bool] = deque(maxlen=window)
+        self._min_calls = min_calls
+        self._failure_rate = failure_rate
+        self._slow_call_sec = slow_call_ms / 1000 if slow_call_ms is not None else None
+        self._open_sec = open_sec
+        self._half_open_calls = half_open_calls
+        self.enabled = enabled
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._trials_in_flight = 0
+        self._trial_successes = 0
+
+    @property
+    def state(self) -> str:
+        """Current state: closed, open or half_open."""
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self._open_sec:
+            return HALF_OPEN
+        return self._state
+
+    async def call(
+        self,
+        fn: Callable[[], Awaitable[T]],
+        is_failure: Callable[[BaseException], bool] | None = None,
+    ) -> T:
+        """Run fn unless the circuit is open.
+
+        Args:
+            fn: Factory returning the awaitable to run
+            is_failure: Decides whether an exception means the dependency is
+                unhealthy (default: every exception); e.g. a 400 response
+                proves it is up
+
+        Returns:
+            Result of fn
+
+        Raises:
+            CircuitOpenError: If the circuit is open
+        """
+        if not self.enabled:
+            return await fn()
+
+        trial = self._admit()
+        started = time.monotonic()
+        try:
+            result = await fn()
+        except Exception as e:
+            self._record(is_failure is None or is_failure(e), trial)
+            raise
+        except BaseException:
+            # Cancelled by the caller: only a call that was already slow says anything
+            self._record(True if self._is_slow(started) else None, trial)
+            raise
+        self._record(self._is_slow(started), trial)
+        return result
+
+    def snapshot(self) -> dict[str, Any]:
+        """Return the state and recent failure rate."""
+        calls = len(self._window)
+        return {
+            "state": self.state,
+            "calls": calls,
+            "failure_rate": round(sum(self._window) / calls, 3) if calls else 0.0,
+        }
+
+    def _admit(self) -> bool:
+        """Admit a call or raise CircuitOpenError.
+
+        Returns:
+            True if the call is a half-open trial
+        """
+        state = self.state
+        if state == CLOSED:
+            return False
+        if state == HALF_OPEN and self._trials_in_flight < self._half_open_calls:
+            if self._state == OPEN:
+                self._transition(HALF_OPEN)
+            self._trials_in_flight += 1
+            return True
+
+        get_metrics().increment(f"{self.name}_circuit_rejected")
+        retry_after = max(self._opened_at + self._open_sec - time.monotonic(), 0.0)
+        raise CircuitOpenError(self.name, retry_after)
+
+    def _is_slow(self, started: float) -> bool:
+        return self._slow_call_sec is not None and time.monotonic() - started > self._slow_call_sec
+
+    def _record(self, failed: bool | None, trial: bool) -> None:
+        """Record a call outcome (None = no verdict) and update the state."""
+        if trial:
+            self._trials_in_flight -= 1
+            if failed:
+                self._open()
+            elif failed is not None and self._state == HALF_OPEN:
+                self._trial_successes += 1
+                if self._trial_successes >= self._half_open_calls:
+                    self._transition(CLOSED)
+            return
+
+        if failed is None or self._state != CLOSED:
+            return
+        self._window.append(failed)
+        if (
+            len(self._window) >= self._min_calls
+            and sum(self._window) / len(self._window) >= self._failure_rate
+        ):
+            self._open()
+
+    def _open(self) -> None:
+        self._opened_at = time.monotonic()
+        self._transition(OPEN)
+        get_metrics().increment(f"{self.name}_circuit_opened")
+
+    def _transition(self, state: str) -> None:
+        previous, self._state = self._state, state
+        self._trial_successes = 0
+        if state == CLOSED:
+            self._window.clear()
+        get_metrics().set_gauge(f"{self.name}_circuit_state", _STATE_GAUGE[state])
+        log = logger.warning if state == OPEN else logger.info
+        log("circuit_state_changed", circuit=self.name, previous=previous, state=state)
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+
+
+def get_circuit_breaker(name: str) -> CircuitBreaker:
+    """Get the process-wide breaker of a dependency, configured from settings.
+
+    Args:
+        name: "qdrant" or "gemini" (selects <name>_slow_call_ms)
+
+    Returns:
+        The named CircuitBreaker
+    """
+    if name not in _breakers:
+        settings = get_settings()
+        _breakers[name] = CircuitBreaker(
+            name,
+            window=settings.circuit_breaker_window,
+            min_calls=settings.circuit_breaker_min_calls,
+            failure_rate=settings.circuit_breaker_failure_rate,
+            slow_call_ms=getattr(settings, f"{name}_slow_call_ms", None),
+            open_sec=settings.circuit_breaker_open_sec,
+            half_open_calls=settings.circuit_breaker_half_open_calls,
+            enabled=settings.circuit_breaker_enabled,
+        )
+    return _breakers[name]
+
+
+def circuit_breaker_states() -> dict[str, str]:
+    """Return the state of every breaker created so far."""
+    return {name: breaker.state for name, breaker in _breakers.items()}
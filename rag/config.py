@@ -20,12 +20,81 @@ class Settings(BaseSettings):
     # Qdrant Configuration
     qdrant_url: str = Field(
         default="http://localhost:6333",
-        description="Qdrant vector database URL",
+        description="Qdrant vector database URL, or a local path / ':memory:' for embedded mode",
     )
     qdrant_collection: str = Field(
         default="archigram_v1",
         description="Qdrant collection name",
     )
+    qdrant_prefer_grpc: bool = Field(
+        default=False,
+        description="Talk to Qdrant over gRPC (protobuf) instead of REST/JSON",
+    )
+    qdrant_grpc_port: int = Field(
+        default=6334,
+        description="Qdrant gRPC port (used when qdrant_prefer_grpc is true)",
+    )
+    qdrant_timeout_sec: int = Field(
+        default=10,
+        ge=1,
+        description="Client-side timeout for each Qdrant call (REST and gRPC)",
+    )
+    qdrant_search_timeout_sec: int | None = Field(
+        default=None,
+        ge=1,
+        description="Server-side timeout for search queries (None = Qdrant default)",
+    )
+    qdrant_pool_max_connections: int = Field(
+        default=64,
+        ge=1,
+        description="Maximum open REST connections to Qdrant",
+    )
+    qdrant_pool_max_keepalive: int = Field(
+        default=16,
+        ge=0,
+        description="Idle REST connections kept open for reuse",
+    )
+    qdrant_keepalive_sec: float = Field(
+        default=30.0,
+        gt=0,
+        description="Idle time before a pooled REST connection is closed / gRPC keepalive ping interval",
+    )
+    qdrant_quantization: Literal["none", "scalar", "binary"] = Field(
+        default="none",
+        description="Quantized copy of the vectors kept in RAM: 'scalar' (int8, 4x smaller) or 'binary' (1 bit, 32x smaller)",
+    )
+    qdrant_vectors_on_disk: bool = Field(
+        default=True,
+        description="Keep the original float32 vectors on disk when quantization is enabled",
+    )
+    qdrant_quantization_oversampling: float = Field(
+        default=2.0,
+        ge=1.0,
+        description="Candidates fetched from the quantized index per result, before rescoring",
+    )
+    qdrant_quantization_rescore: bool = Field(
+        default=True,
+        description="Rescore quantized candidates with the original vectors",
+    )
+    qdrant_hedge_enabled: bool = Field(
+        default=True,
+        description="Send a second identical search when Qdrant is slower than its recent latency percentile",
+    )
+    qdrant_hedge_percentile: float = Field(
+        default=95.0,
+        gt=0.0,
+        le=100.0,
+        description="Percentile of recent Qdrant search latency to wait before hedging",
+    )
+    qdrant_hedge_min_samples: int = Field(
+        default=20,
+        ge=1,
+        description="Qdrant searches observed before hedging starts",
+    )
+    tenant_partitioning: Literal["none", "payload", "shards"] = Field(
+        default="none",
+        description="Tenant isolation: 'payload' (is_tenant index, per-tenant HNSW) or 'shards' (custom shard per company_id)",
+    )
 
     # Embedding Configuration
     use_cloud_embeddings: bool = Field(
@@ -36,6 +105,55 @@ class Settings(BaseSettings):
         default=None,
         description="Gemini API key for cloud embeddings",
     )
+    gemini_max_concurrency: int = Field(
+        default=4,
+        ge=1,
+        description="Gemini batch embedding requests in flight at once",
+    )
+    gemini_requests_per_minute: float = Field(
+        default=1500.0,
+        ge=0.0,
+        description="Client-side Gemini request rate limit matching the API quota (0 disables)",
+    )
+    gemini_max_retries: int = Field(
+        default=4,
+        ge=0,
+        description="Retries of a Gemini request after a 429, 5xx or connection error",
+    )
+    gemini_retry_base_ms: float = Field(
+        default=250.0,
+        gt=0.0,
+        description="Base delay of the jittered exponential retry backoff",
+    )
+    gemini_retry_max_ms: float = Field(
+        default=8000.0,
+        gt=0.0,
+        description="Maximum delay between Gemini retries (also caps Retry-After)",
+    )
+    gemini_hedge_enabled: bool = Field(
+        default=True,
+        description="Send a second identical query embedding request when Gemini is slower than its recent latency percentile",
+    )
+    gemini_hedge_percentile: float = Field(
+        default=95.0,
+        gt=0.0,
+        le=100.0,
+        description="Percentile of recent Gemini query latency to wait before hedging",
+    )
+    gemini_hedge_min_samples: int = Field(
+        default=20,
+        ge=1,
+        description="Gemini query embeddings observed before hedging starts",
+    )
+    gemini_http2: bool = Field(
+        default=True,
+        description="Multiplex Gemini requests over HTTP/2 (falls back to HTTP/1.1 without h2)",
+    )
+    gemini_keepalive_sec: float = Field(
+        default=60.0,
+        gt=0.0,
+        description="Seconds idle Gemini connections are kept open for reuse",
+    )
     embedding_model: str = Field(
         default="intfloat/e5-small-v2",
         description="Local embedding model name",
@@ -44,6 +162,111 @@ class Settings(BaseSettings):
         default=384,
         description="Embedding vector dimension (384 for E5-small-v2)",
     )
+    local_embedding_backend: Literal["torch", "onnx"] = Field(
+        default="torch",
+        description="Local embedding runtime: 'torch' (sentence-transformers) or 'onnx' (ONNX Runtime)",
+    )
+    onnx_model_path: str | None = Field(
+        default=None,
+        description="Local ONNX model file (defaults to the export in the HuggingFace repo)",
+    )
+    onnx_quantize: bool = Field(
+        default=False,
+        description="Run a dynamically int8-quantized copy of the ONNX model",
+    )
+    embedding_workers: int = Field(
+        default=0,
+        ge=0,
+        description="Local embedding worker processes (0 = one dedicated in-process thread)",
+    )
+    embedding_threads_per_worker: int | None = Field(
+        default=None,
+        ge=1,
+        description="Torch/ONNX threads per embedding worker (default: cores / workers)",
+    )
+    embedding_batch_window_ms: float = Field(
+        default=3.0,
+        ge=0.0,
+        description="Window for coalescing concurrent local query embeddings (0 disables)",
+    )
+    embedding_batch_max_size: int = Field(
+        default=32,
+        ge=1,
+        description="Maximum queries per coalesced local embedding batch",
+    )
+
+    # Query Embedding Cache
+    query_cache_size: int = Field(
+        default=2048,
+        ge=0,
+        description="Maximum cached query embeddings (0 disables the cache)",
+    )
+    query_cache_ttl_sec: float = Field(
+        default=3600.0,
+        ge=0.0,
+        description="Seconds before a cached query embedding expires (0 = never)",
+    )
+    query_cache_case_sensitive: bool = Field(
+        default=False,
+        description="Treat queries differing only in case as distinct cache keys",
+    )
+    query_cache_path: str | None = Field(
+        default=None,
+        description="Snapshot file loaded on startup and written on shutdown (warm restarts)",
+    )
+
+    # Passage Embedding Store
+    passage_store_path: str | None = Field(
+        default=None,
+        description="SQLite file for content-addressed passage embeddings (unset disables)",
+    )
+    passage_store_max_entries: int = Field(
+        default=200_000,
+        ge=1,
+        description="Maximum stored passage vectors before LRU eviction",
+    )
+
+    # Circuit Breakers (Qdrant, Gemini)
+    circuit_breaker_enabled: bool = Field(
+        default=True,
+        description="Fail fast while Qdrant or Gemini keeps failing instead of waiting for timeouts",
+    )
+    circuit_breaker_window: int = Field(
+        default=20,
+        ge=1,
+        description="Recent calls per dependency the failure rate is computed over",
+    )
+    circuit_breaker_min_calls: int = Field(
+        default=10,
+        ge=1,
+        description="Calls in the window required before a circuit can open",
+    )
+    circuit_breaker_failure_rate: float = Field(
+        default=0.5,
+        gt=0.0,
+        le=1.0,
+        description="Share of failed or slow calls in the window that opens the circuit",
+    )
+    circuit_breaker_open_sec: float = Field(
+        default=15.0,
+        gt=0.0,
+        description="Seconds a circuit stays open before trial calls are let through",
+    )
+    circuit_breaker_half_open_calls: int = Field(
+        default=1,
+        ge=1,
+        description="Successful trial calls needed to close an open circuit",
+    )
+    qdrant_slow_call_ms: float = Field(
+        default=2000.0,
+        gt=0.0,
+        description="Qdrant calls slower than this count as failures for the circuit breaker",
+    )
+    gemini_slow_call_ms: float = Field(
+        default=5000.0,
+        gt=0.0,
+        description="Gemini embedding calls slower than this count as failures for the circuit breaker",
+    )
 
     # API Security
     ingest_api_key: str = Field(
@@ -73,12 +296,179 @@ class Settings(BaseSettings):
     # Search Configuration
     search_timeout_sec: int = Field(
         default=5,
-        description="Search timeout in seconds",
+        description="End-to-end search deadline in seconds (caps the client's X-Deadline-Ms)",
+    )
+    search_deadline_margin_ms: float = Field(
+        default=50.0,
+        ge=0.0,
+        description="Part of the deadline kept back for returning the response",
+    )
+    search_embedding_budget_share: float = Field(
+        default=0.4,
+        gt=0.0,
+        le=1.0,
+        description="Share of the remaining deadline the query embedding may use before degrading to BM25",
+    )
+    search_refine_min_ms: float = Field(
+        default=25.0,
+        ge=0.0,
+        description="Rerank and MMR are skipped when less than this is left after retrieval",
     )
     default_top_k: int = Field(
         default=5,
         description="Default number of results to return",
     )
+    search_mode: Literal["dense", "sparse", "hybrid"] = Field(
+        default="dense",
+        description="Default retrieval mode: 'dense' (E5), 'sparse' (BM25) or 'hybrid' (RRF fusion)",
+    )
+    hybrid_search_enabled: bool = Field(
+        default=True,
+        description="Index BM25 sparse vectors for sparse/hybrid retrieval and the degraded fallback",
+    )
+    hybrid_prefetch_factor: int = Field(
+        default=4,
+        ge=1,
+        description="Candidates fetched per retriever before fusion, as a multiple of top_k",
+    )
+    bm25_avg_doc_len: float = Field(
+        default=256.0,
+        gt=0,
+        description="Expected average chunk length in tokens for BM25 length normalization",
+    )
+    rerank_enabled: bool = Field(
+        default=False,
+        description="Rerank search candidates with a local cross-encoder by default",
+    )
+    rerank_model: str = Field(
+        default="cross-encoder/ms-marco-MiniLM-L-6-v2",
+        description="HuggingFace cross-encoder used for reranking",
+    )
+    rerank_backend: Literal["torch", "onnx"] = Field(
+        default="torch",
+        description="Cross-encoder runtime: 'torch' (sentence-transformers) or 'onnx'",
+    )
+    rerank_oversample: int = Field(
+        default=4,
+        ge=1,
+        description="Candidates fetched for reranking, as a multiple of top_k",
+    )
+    rerank_budget_ms: float = Field(
+        default=150.0,
+        gt=0,
+        description="Per-request reranking budget; vector order is returned when exceeded",
+    )
+    rerank_batch_size: int = Field(
+        default=32,
+        ge=1,
+        description="(query, chunk) pairs per cross-encoder forward pass",
+    )
+    rerank_max_length: int = Field(
+        default=512,
+        ge=16,
+        description="Maximum tokens per (query, chunk) pair",
+    )
+    mmr_enabled: bool = Field(
+        default=False,
+        description="Diversify search results with Maximal Marginal Relevance by default",
+    )
+    mmr_lambda: float = Field(
+        default=0.5,
+        ge=0.0,
+        le=1.0,
+        description="MMR trade-off: 1 = relevance only, 0 = diversity only",
+    )
+    mmr_oversample: int = Field(
+        default=4,
+        ge=1,
+        description="Candidates fetched for MMR, as a multiple of top_k",
+    )
+    search_cache_size: int = Field(
+        default=1024,
+        ge=0,
+        description="Maximum cached search responses (0 disables the result cache)",
+    )
+    search_cache_ttl_sec: float = Field(
+        default=300.0,
+        ge=0.0,
+        description="Seconds before a cached search response expires (0 = never)",
+    )
+    semantic_cache_tenant_capacity: int = Field(
+        default=0,
+        ge=0,
+        description="Recent query embeddings kept per tenant for near-duplicate reuse (0 disables the semantic cache)",
+    )
+    semantic_cache_max_distance: float = Field(
+        default=0.05,
+        ge=0.0,
+        le=2.0,
+        description="Largest cosine distance at which a cached query's results are reused",
+    )
+    semantic_cache_max_tenants: int = Field(
+        default=1024,
+        ge=1,
+        description="Tenants with a semantic cache index before the least recently used is dropped",
+    )
+    search_batch_max_queries: int = Field(
+        default=10,
+        ge=1,
+        description="Maximum queries accepted by /search/batch",
+    )
+
+    # Cache Warm-up
+    warmup_prompts_path: str | None = Field(
+        default=None,
+        description="JSON prompt list searched to pre-fill the caches (unset disables warm-up)",
+    )
+    warmup_on_startup: bool = Field(
+        default=True,
+        description="Warm the caches in the background when the service starts",
+    )
+    warmup_company_ids: str = Field(
+        default="",
+        description="Comma-separated tenants to warm besides unfiltered searches",
+    )
+    warmup_concurrency: int = Field(
+        default=4,
+        ge=1,
+        description="Warm-up searches run at once",
+    )
+    warmup_refresh_delay_sec: float = Field(
+        default=5.0,
+        ge=0.0,
+        description="Delay before re-warming after an ingest (ingests within it are refreshed together)",
+    )
+
+    # Startup Warm-up & Readiness
+    startup_warmup_enabled: bool = Field(
+        default=True,
+        description="Load the model and connect to Qdrant at startup, then probe readiness in the background",
+    )
+    startup_warmup_batch_size: int = Field(
+        default=8,
+        ge=1,
+        description="Dummy passages embedded at startup to trigger lazy kernel setup",
+    )
+    readiness_probe_interval_sec: float = Field(
+        default=15.0,
+        gt=0.0,
+        description="Interval of the background readiness probe (/health/ready serves its last result)",
+    )
+    readiness_probe_timeout_sec: float = Field(
+        default=5.0,
+        gt=0.0,
+        description="Timeout of each readiness check",
+    )
+    readiness_max_embedding_ms: float = Field(
+        default=1000.0,
+        ge=0.0,
+        description="Probe query embeddings slower than this keep the service not ready (0 disables)",
+    )
+    readiness_max_qdrant_ms: float = Field(
+        default=500.0,
+        ge=0.0,
+        description="Qdrant probes slower than this keep the service not ready (0 disables)",
+    )
 
     # Parser Configuration
     parser_mode: Literal["lightweight", "docling"] = Field(
@@ -94,6 +484,37 @@ class Settings(BaseSettings):
         description="Enable table structure extraction (docling mode only)",
     )
 
+    parse_workers: int = Field(
+        default=2,
+        ge=0,
+        description="Worker processes for document parsing/chunking (0 = threads in-process)",
+    )
+    max_concurrent_parse_jobs: int = Field(
+        default=2,
+        ge=1,
+        description="Maximum parse/chunk jobs running at once",
+    )
+
+    # Ingest jobs
+    ingest_mode: Literal["sync", "async"] = Field(
+        default="sync",
+        description="Default /ingest mode: 'sync' (wait for the result) or 'async' (return a job ID)",
+    )
+    ingest_job_workers: int = Field(
+        default=2,
+        ge=1,
+        description="Ingest jobs processed concurrently in async mode",
+    )
+    ingest_jobs_path: str = Field(
+        default="data/ingest_jobs.sqlite3",
+        description="SQLite file holding ingest job state and pending uploads",
+    )
+    ingest_job_lease_sec: float = Field(
+        default=60.0,
+        gt=0,
+        description="Lease held on a running ingest job; renewed while it runs",
+    )
+
     # Chunking Configuration
     chunk_size: int = Field(
         default=500,
@@ -121,6 +542,11 @@ class Settings(BaseSettings):
         """Parse comma-separated CORS origins into list."""
         return [o.strip() for o in self.cors_origins.split(",") if o.strip()]
 
+    @property
+    def warmup_company_ids_list(self) -> list[str]:
+        """Parse comma-separated warm-up tenants into list."""
+        return [c.strip() for c in self.warmup_company_ids.split(",") if c.strip()]
+
     @property
     def effective_allowed_extensions(self) -> list[str]:
         """Return allowed extensions, expanding for docling mode."""
@@ -5,7 +5,45 @@ from functools import lru_cache
 from config import get_settings
 
 from .base import EmbeddingProvider
+from .cache import CachedEmbeddingProvider, QueryEmbeddingCache
 from .local import LocalEmbeddingProvider
+from .passage_store import PassageEmbeddingStore
+
+
+@lru_cache
+def get_query_cache() -> QueryEmbeddingCache | None:
+    """Get the shared query-embedding cache (cached singleton).
+
+    Returns:
+        QueryEmbeddingCache instance, or None if caching is disabled
+    """
+    settings = get_settings()
+
+    if settings.query_cache_size <= 0:
+        return None
+
+    return QueryEmbeddingCache(
+        max_size=settings.query_cache_size,
+        ttl_sec=settings.query_cache_ttl_sec,
+    )
+
+
+@lru_cache
+def get_passage_store() -> PassageEmbeddingStore | None:
+    """Get the persistent passage-embedding store (cached singleton).
+
+    Returns:
+        PassageEmbeddingStore instance, or None if no store path is configured
+    """
+    settings = get_settings()
+
+    if not settings.passage_store_path:
+        return None
+
+    return PassageEmbeddingStore(
+        path=settings.passage_store_path,
+        max_entries=settings.passage_store_max_entries,
+    )
 
 
 @lru_cache
@@ -17,11 +55,46 @@ def get_embedding_provider() -> EmbeddingProvider:
     """
     settings = get_settings()
 
+    provider: EmbeddingProvider
     if settings.use_cloud_embeddings:
         from .cloud import CloudEmbeddingProvider
-        return CloudEmbeddingProvider()
+        provider = CloudEmbeddingProvider()
+    elif settings.local_embedding_backend == "onnx":
+        from .onnx_runtime import OnnxEmbeddingProvider
+        provider = OnnxEmbeddingProvider()
+    else:
+        provider = LocalEmbeddingProvider()
+
+    query_cache = get_query_cache()
+    passage_store = get_passage_store()
+    if query_cache is not None or passage_store is not None:
+        provider = CachedEmbeddingProvider(
+            provider,
+            query_cache,
+            case_sensitive=settings.query_cache_case_sensitive,
+            passage_store=passage_store,
+        )
+
+    return provider
+
 
-    return LocalEmbeddingProvider()
+async def close_embedding_provider() -> None:
+    """Close the embedding provider if it was created (service shutdown)."""
+    if get_embedding_provider.cache_info().currsize:
+        provider = get_embedding_provider()
+        get_embedding_provider.cache_clear()
+        close = getattr(provider, "close", None)
+        if close is not None:
+            await close()
 
 
-__all__ = ["EmbeddingProvider", "get_embedding_provider"]
+__all__ = [
+    "CachedEmbeddingProvider",
+    "EmbeddingProvider",
+    "PassageEmbeddingStore",
+    "QueryEmbeddingCache",
+    "close_embedding_provider",
+    "get_embedding_provider",
+    "get_passage_store",
+    "get_query_cache",
+]
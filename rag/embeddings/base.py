@@ -1,6 +1,8 @@
 """Abstract base class for embedding providers."""
 
+import asyncio
 from abc import ABC, abstractmethod
+from typing import Any
 
 
 class EmbeddingProvider(ABC):
@@ -20,6 +22,19 @@ class EmbeddingProvider(ABC):
         """
         ...
 
+    @property
+    @abstractmethod
+    def model_name(self) -> str:
+        """Return the identifier of the underlying embedding model.
+
+        Used to namespace cached vectors so that switching models never
+        serves vectors from a different embedding space.
+
+        Returns:
+            Model name string
+        """
+        ...
+
     @abstractmethod
     async def embed_query(self, text: str) -> list[float]:
         """Embed a search query.
@@ -35,6 +50,20 @@ class EmbeddingProvider(ABC):
         """
         ...
 
+    async def embed_queries(self, texts: list[str]) -> list[list[float]]:
+        """Embed several search queries at once.
+
+        The default embeds them concurrently; providers that can encode a
+        batch in one forward pass or API call should override this.
+
+        Args:
+            texts: Query texts to embed
+
+        Returns:
+            Embedding vectors in input order
+        """
+        return list(await asyncio.gather(*(self.embed_query(text) for text in texts)))
+
     @abstractmethod
     async def embed_passage(self, text: str) -> list[float]:
         """Embed a document passage.
@@ -63,3 +92,19 @@ class EmbeddingProvider(ABC):
             List of embedding vectors
         """
         ...
+
+    async def embed_passages_with_stats(
+        self,
+        texts: list[str],
+    ) -> tuple[list[list[float]], dict[str, Any]]:
+        """Embed passages and report cache statistics for the batch.
+
+        Providers without a passage cache report no statistics.
+
+        Args:
+            texts: List of passage texts to embed
+
+        Returns:
+            Tuple of (embedding vectors, cache statistics)
+        """
+        return await self.embed_passages(texts), {}
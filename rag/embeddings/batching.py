@@ -0,0 +1,120 @@
+"""Dynamic micro-batching of concurrent embedding requests.
+
+Queries that arrive within a short window are coalesced into a single
+batched forward pass. Each caller awaits its own future and receives only
+its own vector, so the public embed_query API is unchanged.
+"""
+
+import asyncio
+import time
+from collections.abc import Awaitable, Callable
+
+from metrics import get_metrics
+from middleware.logging import get_logger
+
+logger = get_logger(__name__)
+
+BatchEncodeFn = Callable[[list[str]], Awaitable[list[list[float]]]]
+
+
+class QueryBatcher:
+    """Coalesce concurrent single-text embedding requests into batches.
+
+    A batch is dispatched when either the collection window elapses
+    (measured from the first queued text) or max_batch_size texts are
+    waiting, whichever comes first.
+    """
+
+    def __init__(
+        self,
+        encode_batch: BatchEncodeFn,
+        window_ms: float,
+        max_batch_size: int,
+        metric_prefix: str = "embedding_query_batch",
+    ) -> None:
+        """Initialize the batcher.
+
+        Args:
+            encode_batch: Coroutine function embedding a list of texts
+            window_ms: Maximum time to wait for more texts before dispatch
+            max_batch_size: Dispatch immediately once this many texts are queued
+            metric_prefix: Prefix for exported batch size / wait time metrics
+        """
+        self._encode_batch = encode_batch
+        self._window_sec = window_ms / 1000
+        self._max_batch_size = max(1, max_batch_size)
+        self._metric_prefix = metric_prefix
+
+        self._pending: list[tuple[str, asyncio.Future[list[float]], float]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._tasks: set[asyncio.Task[None]] = set()
+
+    async def submit(self, text: str) -> list[float]:
+        """Queue a text for embedding and wait for its vector.
+
+        Args:
+            text: Text to embed (already prefixed if the model needs it)
+
+        Returns:
+            Embedding vector for this text
+        """
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # Bound to a new event loop (e.g. app restart in tests): drop stale state
+            self._loop = loop
+            self._pending = []
+            self._timer = None
+
+        future: asyncio.Future[list[float]] = loop.create_future()
+        self._pending.append((text, future, time.perf_counter()))
+
+        if len(self._pending) >= self._max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self._window_sec, self._flush)
+
+        return await future
+
+    def _flush(self) -> None:
+        """Dispatch all queued texts as one batch."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        task = asyncio.ensure_future(self._run_batch(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(
+        self,
+        batch: list[tuple[str, asyncio.Future[list[float]], float]],
+    ) -> None:
+        """Encode a batch and resolve each caller's future."""
+        # Callers that gave up (e.g. request timeout) don't need a forward pass
+        live = [(text, future, queued_at) for text, future, queued_at in batch if not future.done()]
+        if not live:
+            return
+
+        metrics = get_metrics()
+        dispatched_at = time.perf_counter()
+        metrics.observe(f"{self._metric_prefix}_size", len(live))
+        for _, _, queued_at in live:
+            metrics.observe(f"{self._metric_prefix}_wait_ms", (dispatched_at - queued_at) * 1000)
+
+        try:
+            vectors = await self._encode_batch([text for text, _, _ in live])
+        except Exception as e:
+            logger.error("embedding_batch_failed", batch_size=len(live), error=str(e))
+            for _, future, _ in live:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future, _), vector in zip(live, vectors, strict=True):
+            if not future.done():
+                future.set_result(vector)
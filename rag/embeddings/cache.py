@@ -0,0 +1,346 @@
+"""Embedding caches wrapped around any EmbeddingProvider.
+
+The frontend repeatedly sends the same prompts (gallery prompts, retries,
+"regenerate"), so query vectors are cached in a bounded LRU with TTL
+expiry. Keys are normalized (Unicode NFC, collapsed whitespace, optional
+case folding) and namespaced by model name. The cache can be snapshotted
+to disk on shutdown and reloaded on startup so restarted pods start warm.
+
+Passage vectors can additionally be served from a persistent
+content-addressed store (see passage_store.py) so re-ingested chunks are
+not embedded twice.
+"""
+
+import asyncio
+import json
+import os
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any
+
+from metrics import get_metrics
+from middleware.logging import get_logger
+
+from .base import EmbeddingProvider
+from .passage_store import PassageEmbeddingStore, passage_key
+
+logger = get_logger(__name__)
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+SNAPSHOT_VERSION = 1
+
+
+def normalize_query(text: str, case_sensitive: bool = False) -> str:
+    """Normalize query text for cache lookups.
+
+    Args:
+        text: Raw query text
+        case_sensitive: Keep original casing when True
+
+    Returns:
+        NFC-normalized text with whitespace collapsed (and lowercased
+        unless case_sensitive)
+    """
+    normalized = unicodedata.normalize("NFC", text)
+    normalized = _WHITESPACE_RE.sub(" ", normalized).strip()
+    if not case_sensitive:
+        normalized = normalized.lower()
+    return normalized
+
+
+class QueryEmbeddingCache:
+    """Bounded LRU cache of query vectors with TTL eviction.
+
+    Timestamps are wall-clock seconds so TTLs stay meaningful across a
+    snapshot/restore cycle.
+    """
+
+    def __init__(self, max_size: int, ttl_sec: float) -> None:
+        """Initialize the cache.
+
+        Args:
+            max_size: Maximum number of cached vectors
+            ttl_sec: Seconds before an entry expires (0 disables expiry)
+        """
+        self._max_size = max_size
+        self._ttl_sec = ttl_sec
+        self._entries: OrderedDict[str, tuple[list[float], float]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _is_expired(self, stored_at: float, now: float) -> bool:
+        return self._ttl_sec > 0 and now - stored_at > self._ttl_sec
+
+    def get(self, key: str) -> list[float] | None:
+        """Look up a vector, refreshing its LRU position on hit.
+
+        Returns:
+            Cached vector, or None on miss or expiry
+        """
+        entry = self._entries.get(key)
+        if entry is not None and self._is_expired(entry[1], time.time()):
+            del self._entries[key]
+            entry = None
+
+        if entry is None:
+            self.misses += 1
+            get_metrics().increment("query_embedding_cache_misses")
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        get_metrics().increment("query_embedding_cache_hits")
+        return entry[0]
+
+    def put(self, key: str, vector: list[float], stored_at: float | None = None) -> None:
+        """Insert a vector, evicting the least recently used entries if full."""
+        self._entries[key] = (vector, time.time() if stored_at is None else stored_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+        get_metrics().set_gauge("query_embedding_cache_size", len(self._entries))
+
+    def clear(self) -> None:
+        """Remove all entries and reset counters."""
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict[str, Any]:
+        """Return hit/miss counters and current size."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self._max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def save(self, path: str | Path) -> int:
+        """Snapshot live entries to disk (atomic replace).
+
+        Args:
+            path: Destination JSON file
+
+        Returns:
+            Number of entries written
+        """
+        now = time.time()
+        entries = [
+            [key, vector, stored_at]
+            for key, (vector, stored_at) in self._entries.items()
+            if not self._is_expired(stored_at, now)
+        ]
+
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": SNAPSHOT_VERSION, "entries": entries}, f)
+        os.replace(tmp_path, path)
+
+        logger.info("query_cache_saved", path=str(path), entries=len(entries))
+        return len(entries)
+
+    def load(self, path: str | Path) -> int:
+        """Restore entries from a snapshot, skipping expired ones.
+
+        A missing or unreadable snapshot is not an error; the cache simply
+        starts cold.
+
+        Args:
+            path: Snapshot JSON file
+
+        Returns:
+            Number of entries restored
+        """
+        path = Path(path)
+        if not path.exists():
+            return 0
+
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != SNAPSHOT_VERSION:
+                raise ValueError(f"unsupported snapshot version {data.get('version')}")
+            entries = data["entries"]
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning("query_cache_load_failed", path=str(path), error=str(e))
+            return 0
+
+        now = time.time()
+        restored = 0
+        # Entries were written in LRU order, so replaying keeps recency intact
+        for key, vector, stored_at in entries:
+            if not self._is_expired(stored_at, now):
+                self.put(key, vector, stored_at=stored_at)
+                restored += 1
+
+        logger.info("query_cache_loaded", path=str(path), entries=len(self._entries))
+        return restored
+
+
+class CachedEmbeddingProvider(EmbeddingProvider):
+    """EmbeddingProvider decorator that serves repeated work from cache.
+
+    Query cache hits skip the model entirely. On a miss the normalized text
+    is embedded, so a cached vector is identical to what a fresh call would
+    return for any query mapping to the same key.
+
+    Passages are deduplicated within a batch and looked up in the
+    persistent store; only misses are sent to the wrapped provider.
+    """
+
+    def __init__(
+        self,
+        provider: EmbeddingProvider,
+        query_cache: QueryEmbeddingCache | None = None,
+        case_sensitive: bool = False,
+        passage_store: PassageEmbeddingStore | None = None,
+    ) -> None:
+        """Wrap a provider with query and/or passage caching.
+
+        Args:
+            provider: Underlying embedding provider
+            query_cache: Query cache to read and populate (None disables)
+            case_sensitive: Case policy for query key normalization
+            passage_store: Persistent passage store (None disables)
+        """
+        self._provider = provider
+        self._query_cache = query_cache
+        self._case_sensitive = case_sensitive
+        self._passage_store = passage_store
+
+    @property
+    def provider(self) -> EmbeddingProvider:
+        """Return the wrapped provider."""
+        return self._provider
+
+    @property
+    def dimension(self) -> int:
+        """Return the wrapped provider's dimension."""
+        return self._provider.dimension
+
+    @property
+    def model_name(self) -> str:
+        """Return the wrapped provider's model name."""
+        return self._provider.model_name
+
+    def _query_key(self, normalized: str) -> str:
+        return f"{self.model_name}\x00{normalized}"
+
+    def _passage_key(self, text: str) -> str:
+        # Local E5 models prefix passages; cloud providers embed them as-is
+        prefix = getattr(self._provider, "PASSAGE_PREFIX", "")
+        return passage_key(self.model_name, prefix, text)
+
+    async def embed_query(self, text: str) -> list[float]:
+        """Embed a query, serving repeated (normalized) queries from cache."""
+        if self._query_cache is None:
+            return await self._provider.embed_query(text)
+
+        key = self._query_key(normalize_query(text, self._case_sensitive))
+
+        cached = self._query_cache.get(key)
+        if cached is not None:
+            return cached
+
+        # Only the key is normalized: the model embeds the query as sent
+        vector = await self._provider.embed_query(text)
+        self._query_cache.put(key, vector)
+        return vector
+
+    async def embed_queries(self, texts: list[str]) -> list[list[float]]:
+        """Embed queries, sending only distinct cache misses to the provider."""
+        if self._query_cache is None or not texts:
+            return await self._provider.embed_queries(texts)
+
+        keys = [self._query_key(normalize_query(text, self._case_sensitive)) for text in texts]
+        vectors: dict[str, list[float]] = {}
+        misses: dict[str, str] = {}
+        for text, key in zip(texts, keys, strict=True):
+            if key in vectors or key in misses:
+                continue
+            cached = self._query_cache.get(key)
+            if cached is not None:
+                vectors[key] = cached
+            else:
+                misses[key] = text
+
+        if misses:
+            miss_vectors = await self._provider.embed_queries(list(misses.values()))
+            for key, vector in zip(misses, miss_vectors, strict=True):
+                self._query_cache.put(key, vector)
+                vectors[key] = vector
+
+        return [vectors[key] for key in keys]
+
+    async def embed_passage(self, text: str) -> list[float]:
+        """Embed a single passage through the passage store."""
+        (vector,) = await self.embed_passages([text])
+        return vector
+
+    async def embed_passages(self, texts: list[str]) -> list[list[float]]:
+        """Embed passages, reusing stored vectors for unchanged texts."""
+        vectors, _ = await self.embed_passages_with_stats(texts)
+        return vectors
+
+    async def embed_passages_with_stats(
+        self,
+        texts: list[str],
+    ) -> tuple[list[list[float]], dict[str, Any]]:
+        """Embed passages and report store hits, misses and duplicates.
+
+        Args:
+            texts: List of passage texts to embed
+
+        Returns:
+            Tuple of (vectors in input order, cache statistics)
+        """
+        if not texts:
+            return [], {}
+
+        # Identical chunk texts (boilerplate headers, repeated rows) are encoded once
+        unique_texts = list(dict.fromkeys(texts))
+        stats: dict[str, Any] = {"deduplicated": len(texts) - len(unique_texts)}
+
+        if self._passage_store is None:
+            unique_vectors = await self._provider.embed_passages(unique_texts)
+            by_text = dict(zip(unique_texts, unique_vectors, strict=True))
+            return [by_text[text] for text in texts], stats
+
+        keys = {text: self._passage_key(text) for text in unique_texts}
+        stored = await asyncio.to_thread(self._passage_store.get_many, list(keys.values()))
+
+        misses = [text for text in unique_texts if keys[text] not in stored]
+        if misses:
+            miss_vectors = await self._provider.embed_passages(misses)
+            new_vectors = {keys[text]: vector for text, vector in zip(misses, miss_vectors, strict=True)}
+            await asyncio.to_thread(self._passage_store.put_many, new_vectors)
+            stored.update(new_vectors)
+
+        hits = len(unique_texts) - len(misses)
+        metrics = get_metrics()
+        metrics.increment("passage_store_hits", hits)
+        metrics.increment("passage_store_misses", len(misses))
+
+        stats.update(
+            cache_hits=hits,
+            cache_misses=len(misses),
+            cache_hit_ratio=round(hits / len(unique_texts), 4),
+        )
+        return [stored[keys[text]] for text in texts], stats
+
+    async def close(self) -> None:
+        """Close the wrapped provider if it holds resources."""
+        close = getattr(self._provider, "close", None)
+        if close is not None:
+            await close()
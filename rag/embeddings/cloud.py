@@ -2,19 +2,68 @@
 
 This provider is optional and only used when RAG_USE_CLOUD_EMBEDDINGS=true.
 Note: Query text is sent to Google's API when using cloud embeddings.
+
+Requests go through the "gemini" circuit breaker, so while the API keeps
+failing, searches degrade to BM25 immediately instead of after a timeout.
+
+Large ingests are split into 100-text batches that are sent concurrently
+(RAG_GEMINI_MAX_CONCURRENCY) over one keep-alive HTTP/2 connection, paced by
+a token bucket matching the API quota. A 429, 5xx or connection error is
+retried with jittered exponential backoff, so one throttled batch no longer
+fails the whole ingest; vectors are returned in input order.
+
+Query embeddings are hedged: when Gemini has not answered within its recent
+p95 latency, an identical second request is raced against the first. The
+fallback has to produce vectors in the same space, which rules out the
+local models (E5, 384 dimensions), so both attempts go to Gemini.
 """
 
+import asyncio
+import importlib.util
+import random
+import time
+from typing import Any
 
 import httpx
 
-from config import get_settings
+from circuit_breaker import CircuitOpenError, get_circuit_breaker
+from config import Settings, get_settings
+from hedging import hedge_delay, hedged
+from metrics import get_metrics
 from middleware.logging import get_logger
 
 from .base import EmbeddingProvider
+from .rate_limit import TokenBucket
 
 logger = get_logger(__name__)
 
 
+def _is_gemini_failure(error: BaseException) -> bool:
+    """Whether an error means the API is unhealthy (not a rejected request)."""
+    if isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+        return status >= 500 or status == 429
+    return True
+
+
+def _is_retryable(error: BaseException) -> bool:
+    """Whether a failed request may succeed when sent again."""
+    if isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+        return status >= 500 or status == 429
+    return isinstance(error, httpx.TransportError)
+
+
+def _retry_after_sec(error: BaseException) -> float | None:
+    """Delay requested by the server's Retry-After header (seconds form only)."""
+    if not isinstance(error, httpx.HTTPStatusError):
+        return None
+    try:
+        return max(float(error.response.headers["Retry-After"]), 0.0)
+    except (KeyError, ValueError):
+        return None
+
+
 class CloudEmbeddingProvider(EmbeddingProvider):
     """Cloud embedding provider using Google Gemini API.
 
@@ -30,9 +79,22 @@ class CloudEmbeddingProvider(EmbeddingProvider):
     BASE_URL = "https://generativelanguage.googleapis.com/v1beta"
     TIMEOUT = 30.0
 
-    def __init__(self) -> None:
-        """Initialize the cloud embedding provider."""
-        self._settings = get_settings()
+    # Gemini batch API has a limit of 100 texts per request
+    MAX_BATCH_SIZE = 100
+
+    def __init__(
+        self,
+        settings: Settings | None = None,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ) -> None:
+        """Initialize the cloud embedding provider.
+
+        Args:
+            settings: Settings to use instead of the global ones
+            transport: HTTP transport replacing the network (e.g. a local
+                mock server in tests)
+        """
+        self._settings = settings or get_settings()
 
         if not self._settings.gemini_api_key:
             raise ValueError(
@@ -40,22 +102,96 @@ class CloudEmbeddingProvider(EmbeddingProvider):
             )
 
         self._api_key = self._settings.gemini_api_key
+        self._transport = transport
         self._client: httpx.AsyncClient | None = None
+        self._breaker = get_circuit_breaker("gemini")
+        self._dispatch = asyncio.Semaphore(self._settings.gemini_max_concurrency)
+        self._rate_limiter: TokenBucket | None = None
+        if self._settings.gemini_requests_per_minute > 0:
+            self._rate_limiter = TokenBucket(
+                self._settings.gemini_requests_per_minute / 60,
+                capacity=self._settings.gemini_max_concurrency,
+            )
 
     async def _get_client(self) -> httpx.AsyncClient:
         """Get or create the HTTP client."""
         if self._client is None or self._client.is_closed:
+            http2 = self._settings.gemini_http2 and importlib.util.find_spec("h2") is not None
+            if self._settings.gemini_http2 and not http2:
+                logger.warning("gemini_http2_unavailable", hint="pip install httpx[http2]")
             self._client = httpx.AsyncClient(
                 base_url=self.BASE_URL,
                 timeout=self.TIMEOUT,
+                http2=http2,
+                limits=httpx.Limits(
+                    max_keepalive_connections=self._settings.gemini_max_concurrency + 1,
+                    keepalive_expiry=self._settings.gemini_keepalive_sec,
+                ),
+                transport=self._transport,
             )
         return self._client
 
+    async def _post(self, url: str, payload: dict[str, Any]) -> dict[str, Any]:
+        """POST to the Gemini API through the rate limiter and circuit breaker.
+
+        Throttled (429), server (5xx) and connection errors are retried up to
+        gemini_max_retries times with jittered exponential backoff.
+
+        Raises:
+            CircuitOpenError: If the API has been failing and the circuit is open
+            httpx.HTTPStatusError: On an error response that is not retried
+                or still fails after the last retry
+        """
+        client = await self._get_client()
+        metrics = get_metrics()
+
+        async def send() -> dict[str, Any]:
+            response = await client.post(url, params={"key": self._api_key}, json=payload)
+            response.raise_for_status()
+            return response.json()
+
+        attempt = 0
+        while True:
+            if self._rate_limiter is not None:
+                waited = await self._rate_limiter.acquire()
+                if waited:
+                    metrics.observe("gemini_rate_limit_wait_ms", waited * 1000)
+            try:
+                return await self._breaker.call(send, _is_gemini_failure)
+            except (httpx.HTTPStatusError, httpx.TransportError) as e:
+                if attempt >= self._settings.gemini_max_retries or not _is_retryable(e):
+                    raise
+                delay = self._retry_delay(attempt, e)
+                attempt += 1
+                metrics.increment("gemini_retries")
+                logger.warning(
+                    "gemini_request_retry",
+                    attempt=attempt,
+                    delay_ms=round(delay * 1000),
+                    error=str(e),
+                )
+                await asyncio.sleep(delay)
+
+    def _retry_delay(self, attempt: int, error: BaseException) -> float:
+        """Backoff before a retry: full jitter, or the server's Retry-After if longer."""
+        ceiling = self._settings.gemini_retry_max_ms / 1000
+        backoff = min(ceiling, self._settings.gemini_retry_base_ms / 1000 * 2**attempt)
+        delay = random.uniform(0, backoff)
+        retry_after = _retry_after_sec(error)
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, ceiling))
+        return delay
+
     @property
     def dimension(self) -> int:
         """Return the embedding dimension."""
         return self.EMBEDDING_DIMENSION
 
+    @property
+    def model_name(self) -> str:
+        """Return the Gemini model name."""
+        return self.MODEL_NAME
+
     async def _embed_text(
         self,
         text: str,
@@ -72,10 +208,7 @@ class CloudEmbeddingProvider(EmbeddingProvider):
         Returns:
             Embedding vector as list of floats
         """
-        client = await self._get_client()
-
         url = f"/models/{self.MODEL_NAME}:embedContent"
-        params = {"key": self._api_key}
 
         payload = {
             "model": f"models/{self.MODEL_NAME}",
@@ -84,10 +217,7 @@ class CloudEmbeddingProvider(EmbeddingProvider):
         }
 
         try:
-            response = await client.post(url, params=params, json=payload)
-            response.raise_for_status()
-
-            data = response.json()
+            data = await self._post(url, payload)
             return data["embedding"]["values"]
 
         except httpx.HTTPStatusError as e:
@@ -97,6 +227,9 @@ class CloudEmbeddingProvider(EmbeddingProvider):
                 error=str(e),
             )
             raise
+        except CircuitOpenError:
+            # Rejections are logged once by the breaker when it opens
+            raise
         except Exception as e:
             logger.error("gemini_embedding_error", error=str(e))
             raise
@@ -115,10 +248,7 @@ class CloudEmbeddingProvider(EmbeddingProvider):
         Returns:
             List of embedding vectors
         """
-        client = await self._get_client()
-
         url = f"/models/{self.MODEL_NAME}:batchEmbedContents"
-        params = {"key": self._api_key}
 
         requests = [
             {
@@ -132,10 +262,7 @@ class CloudEmbeddingProvider(EmbeddingProvider):
         payload = {"requests": requests}
 
         try:
-            response = await client.post(url, params=params, json=payload)
-            response.raise_for_status()
-
-            data = response.json()
+            data = await self._post(url, payload)
             return [emb["values"] for emb in data["embeddings"]]
 
         except httpx.HTTPStatusError as e:
@@ -145,6 +272,9 @@ class CloudEmbeddingProvider(EmbeddingProvider):
                 error=str(e),
             )
             raise
+        except CircuitOpenError:
+            # Rejections are logged once by the breaker when it opens
+            raise
         except Exception as e:
             logger.error("gemini_batch_embedding_error", error=str(e))
             raise
@@ -152,7 +282,8 @@ class CloudEmbeddingProvider(EmbeddingProvider):
     async def embed_query(self, text: str) -> list[float]:
         """Embed a search query.
 
-        Uses RETRIEVAL_QUERY task type for optimal query embedding.
+        Uses RETRIEVAL_QUERY task type for optimal query embedding. The
+        request is hedged once it is slower than the recent p95.
 
         Args:
             text: Query text to embed
@@ -160,7 +291,35 @@ class CloudEmbeddingProvider(EmbeddingProvider):
         Returns:
             Embedding vector as list of floats
         """
-        return await self._embed_text(text, task_type="RETRIEVAL_QUERY")
+        started = time.perf_counter()
+        vector = await hedged(
+            lambda: self._embed_text(text, task_type="RETRIEVAL_QUERY"),
+            self._hedge_delay(),
+            "gemini_query",
+        )
+        get_metrics().observe("gemini_query_ms", round((time.perf_counter() - started) * 1000, 2))
+        return vector
+
+    def _hedge_delay(self) -> float | None:
+        """Delay before hedging a query embedding (None = do not hedge)."""
+        if not self._settings.gemini_hedge_enabled:
+            return None
+        return hedge_delay(
+            "gemini_query_ms",
+            self._settings.gemini_hedge_percentile,
+            self._settings.gemini_hedge_min_samples,
+        )
+
+    async def embed_queries(self, texts: list[str]) -> list[list[float]]:
+        """Embed several search queries with one batch request.
+
+        Args:
+            texts: Query texts to embed
+
+        Returns:
+            List of embedding vectors
+        """
+        return await self._embed_batches(texts, task_type="RETRIEVAL_QUERY")
 
     async def embed_passage(self, text: str) -> list[float]:
         """Embed a document passage.
@@ -178,7 +337,7 @@ class CloudEmbeddingProvider(EmbeddingProvider):
     async def embed_passages(self, texts: list[str]) -> list[list[float]]:
         """Embed multiple passages in batch.
 
-        Uses batch API for efficiency.
+        Batches are sent concurrently, paced by the API rate limit.
 
         Args:
             texts: List of passage texts to embed
@@ -186,22 +345,40 @@ class CloudEmbeddingProvider(EmbeddingProvider):
         Returns:
             List of embedding vectors
         """
+        return await self._embed_batches(texts, task_type="RETRIEVAL_DOCUMENT")
+
+    async def _embed_batches(self, texts: list[str], task_type: str) -> list[list[float]]:
+        """Embed texts in MAX_BATCH_SIZE batches sent concurrently.
+
+        At most gemini_max_concurrency batches are in flight across all
+        callers. If a batch fails for good, the remaining ones are cancelled.
+
+        Args:
+            texts: Texts to embed
+            task_type: Task type for embedding optimization
+
+        Returns:
+            Embedding vectors in the order of texts
+        """
         if not texts:
             return []
 
-        # Gemini batch API has a limit of 100 texts per request
-        batch_size = 100
-        all_embeddings: list[list[float]] = []
+        async def dispatch(batch: list[str]) -> list[list[float]]:
+            async with self._dispatch:
+                return await self._embed_texts_batch(batch, task_type=task_type)
 
-        for i in range(0, len(texts), batch_size):
-            batch = texts[i : i + batch_size]
-            embeddings = await self._embed_texts_batch(
-                batch,
-                task_type="RETRIEVAL_DOCUMENT",
-            )
-            all_embeddings.extend(embeddings)
+        tasks = [
+            asyncio.ensure_future(dispatch(texts[i : i + self.MAX_BATCH_SIZE]))
+            for i in range(0, len(texts), self.MAX_BATCH_SIZE)
+        ]
+        try:
+            batches = await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
 
-        return all_embeddings
+        return [embedding for batch in batches for embedding in batch]
 
     async def close(self) -> None:
         """Close the HTTP client."""
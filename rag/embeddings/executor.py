@@ -0,0 +1,317 @@
+"""Dedicated execution engine for local embedding inference.
+
+Local encode() calls used to share the event loop's default thread pool
+with every other blocking call, while torch's intra-op threads
+oversubscribed the CPU. All local inference now goes through this
+executor, in one of two modes:
+
+- RAG_EMBEDDING_WORKERS=0 (default): one dedicated in-process inference
+  thread, so concurrent requests queue for the model instead of
+  fighting over cores.
+- RAG_EMBEDDING_WORKERS=N: N worker processes, each loading the model
+  once, free of the GIL. Vectors come back through shared memory as raw
+  float32 instead of pickled Python lists.
+
+In both modes the torch / ONNX Runtime thread count is set explicitly
+(RAG_EMBEDDING_THREADS_PER_WORKER, default: cores divided by workers).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import os
+from collections.abc import Callable
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from config import Settings, get_settings
+from metrics import get_metrics
+from middleware.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass(frozen=True)
+class WorkerConfig:
+    """Picklable description of the model each worker loads."""
+
+    backend: str
+    model_name: str
+    cache_dir: str
+    onnx_model_path: str | None
+    onnx_quantize: bool
+    threads: int
+
+
+def resolve_threads_per_worker(settings: Settings) -> int:
+    """Return the inference thread count for each worker.
+
+    Args:
+        settings: Application settings
+
+    Returns:
+        Configured thread count, or the available cores split across workers
+    """
+    if settings.embedding_threads_per_worker:
+        return settings.embedding_threads_per_worker
+    return max(1, (os.cpu_count() or 1) // max(1, settings.embedding_workers))
+
+
+def _configure_torch_threads(threads: int) -> None:
+    """Pin torch intra-op parallelism for the current process."""
+    try:
+        import torch
+    except ImportError:
+        return
+    torch.set_num_threads(threads)
+
+
+def load_worker_model(config: WorkerConfig) -> Any:
+    """Load the configured model with an explicit thread count.
+
+    Args:
+        config: Worker model configuration
+
+    Returns:
+        Model exposing the SentenceTransformer.encode API
+    """
+    if config.backend == "onnx":
+        from .onnx_runtime import _load_onnx_model
+
+        return _load_onnx_model(
+            config.model_name,
+            config.cache_dir,
+            config.onnx_model_path,
+            config.onnx_quantize,
+            config.threads,
+        )
+
+    from .local import _load_model
+
+    _configure_torch_threads(config.threads)
+    return _load_model(config.model_name, config.cache_dir)
+
+
+# ---------------------------------------------------------------------------
+# Worker process side
+# ---------------------------------------------------------------------------
+
+_worker_model: Any = None
+
+
+def _init_worker(config: WorkerConfig) -> None:
+    """Process-pool initializer: load the model once per worker."""
+    global _worker_model
+    os.environ.setdefault("OMP_NUM_THREADS", str(config.threads))
+    _worker_model = load_worker_model(config)
+
+
+def _worker_encode(sentences: str | list[str], batch_size: int) -> tuple[str, tuple[int, ...]]:
+    """Encode in a worker process and publish the result via shared memory.
+
+    Returns:
+        (shared memory block name, array shape); the parent owns and unlinks
+        the block
+    """
+    embeddings = np.ascontiguousarray(
+        _worker_model.encode(
+            sentences,
+            normalize_embeddings=True,
+            batch_size=batch_size,
+            show_progress_bar=False,
+        ),
+        dtype=np.float32,
+    )
+    if embeddings.nbytes == 0:
+        return "", embeddings.shape
+
+    shm = SharedMemory(create=True, size=embeddings.nbytes)
+    np.ndarray(embeddings.shape, dtype=np.float32, buffer=shm.buf)[:] = embeddings
+    # Ownership passes to the parent, which unlinks the block after reading
+    resource_tracker.unregister(shm._name, "shared_memory")  # type: ignore[attr-defined]
+    shm.close()
+    return shm.name, embeddings.shape
+
+
+def _read_shared(name: str, shape: tuple[int, ...]) -> np.ndarray:
+    """Copy a worker result out of shared memory and release the block."""
+    if not name:
+        return np.zeros(shape, dtype=np.float32)
+
+    shm = SharedMemory(name=name)
+    try:
+        return np.ndarray(shape, dtype=np.float32, buffer=shm.buf).copy()
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+# ---------------------------------------------------------------------------
+# Parent side
+# ---------------------------------------------------------------------------
+
+
+def _call_soon(loop: asyncio.AbstractEventLoop, fn: Callable[[Any], None], arg: Any) -> None:
+    """Schedule fn(arg) on the loop from another thread, unless it has closed."""
+    try:
+        loop.call_soon_threadsafe(fn, arg)
+    except RuntimeError:
+        pass
+
+
+class EmbeddingExecutor:
+    """Runs local embedding inference on a dedicated thread or process pool."""
+
+    def __init__(self, config: WorkerConfig, workers: int) -> None:
+        """Create the executor (workers start lazily on first use).
+
+        Args:
+            config: Model configuration loaded by each worker
+            workers: Number of worker processes (0 = one in-process thread)
+        """
+        self._config = config
+        self._workers = workers
+        self._pool: Executor
+
+        if workers > 0:
+            # Spawn, not fork: the parent runs threads (uvicorn, torch) that
+            # must not be duplicated into workers mid-operation
+            self._pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(config,),
+            )
+        elif config.backend == "torch":
+            self._pool = ThreadPoolExecutor(
+                max_workers=1,
+                thread_name_prefix="embedding",
+                initializer=_configure_torch_threads,
+                initargs=(config.threads,),
+            )
+        else:
+            self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embedding")
+
+        get_metrics().set_gauge("embedding_pool_workers", workers)
+        logger.info(
+            "embedding_executor_created",
+            mode="process" if workers > 0 else "thread",
+            workers=workers,
+            threads_per_worker=config.threads,
+        )
+
+    @property
+    def uses_processes(self) -> bool:
+        """Whether inference runs in worker processes."""
+        return self._workers > 0
+
+    async def encode(
+        self,
+        get_model: Callable[[], Any],
+        sentences: str | list[str],
+        batch_size: int,
+    ) -> np.ndarray:
+        """Encode text(s) with L2 normalization on the dedicated pool.
+
+        Args:
+            get_model: Returns the in-process model (thread mode only)
+            sentences: Text or list of texts (prefixes already applied)
+            batch_size: Texts per forward pass
+
+        Returns:
+            1-D array for a single text, 2-D array for a list
+        """
+        loop = asyncio.get_running_loop()
+
+        if self.uses_processes:
+            return await self._encode_in_worker(loop, sentences, batch_size)
+
+        return await loop.run_in_executor(
+            self._pool,
+            lambda: get_model().encode(
+                sentences,
+                normalize_embeddings=True,
+                batch_size=batch_size,
+                show_progress_bar=False,
+            ),
+        )
+
+    async def _encode_in_worker(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        sentences: str | list[str],
+        batch_size: int,
+    ) -> np.ndarray:
+        """Encode in a worker process, releasing its shared memory in any case.
+
+        The block is copied out and unlinked in a done-callback on the pool
+        future, so it is freed even when the caller has stopped waiting
+        (search deadline, wait_for, a cancelled hedge); otherwise it would
+        stay in /dev/shm until reboot.
+        """
+        result: asyncio.Future[np.ndarray] = loop.create_future()
+
+        def set_result(value: np.ndarray) -> None:
+            if not result.done():
+                result.set_result(value)
+
+        def set_exception(error: BaseException) -> None:
+            if not result.done():
+                result.set_exception(error)
+
+        def collect(job: Future[tuple[str, tuple[int, ...]]]) -> None:
+            # Runs on the pool's thread whether or not anyone still awaits result
+            try:
+                value = _read_shared(*job.result())
+            except BaseException as e:
+                _call_soon(loop, set_exception, e)
+                return
+            _call_soon(loop, set_result, value)
+
+        job = self._pool.submit(_worker_encode, sentences, batch_size)
+        job.add_done_callback(collect)
+        try:
+            return await result
+        except asyncio.CancelledError:
+            # Drops the job if no worker has picked it up yet
+            job.cancel()
+            raise
+
+    def shutdown(self) -> None:
+        """Stop the workers."""
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+@lru_cache
+def get_embedding_executor() -> EmbeddingExecutor:
+    """Get the local embedding executor (cached singleton).
+
+    Returns:
+        EmbeddingExecutor configured from settings
+    """
+    settings = get_settings()
+
+    config = WorkerConfig(
+        backend=settings.local_embedding_backend,
+        model_name=settings.embedding_model,
+        cache_dir=str(Path(__file__).parent.parent / "models"),
+        onnx_model_path=settings.onnx_model_path,
+        onnx_quantize=settings.onnx_quantize,
+        threads=resolve_threads_per_worker(settings),
+    )
+    return EmbeddingExecutor(config, workers=settings.embedding_workers)
+
+
+def shutdown_embedding_executor() -> None:
+    """Stop the executor if it was ever started (a later call recreates it)."""
+    if get_embedding_executor.cache_info().currsize:
+        get_embedding_executor().shutdown()
+        get_embedding_executor.cache_clear()
@@ -8,7 +8,7 @@ This ensures optimal retrieval performance as the model was trained
 with these prefixes.
 """
 
-import asyncio
+import threading
 from functools import lru_cache
 from pathlib import Path
 from typing import Any
@@ -17,6 +17,8 @@ from config import get_settings
 from middleware.logging import get_logger
 
 from .base import EmbeddingProvider
+from .batching import QueryBatcher
+from .executor import get_embedding_executor
 
 logger = get_logger(__name__)
 
@@ -67,22 +69,45 @@ class LocalEmbeddingProvider(EmbeddingProvider):
         """Initialize the local embedding provider."""
         self._settings = get_settings()
         self._model: Any = None
+        # The model is loaded on an embedding thread; concurrent cold requests load it once
+        self._model_lock = threading.Lock()
         self._dimension = self._settings.embedding_dimension
 
+        # Coalesce concurrent queries into one forward pass (0 disables batching)
+        self._query_batcher: QueryBatcher | None = None
+        if self._settings.embedding_batch_window_ms > 0:
+            self._query_batcher = QueryBatcher(
+                self._encode_queries,
+                window_ms=self._settings.embedding_batch_window_ms,
+                max_batch_size=self._settings.embedding_batch_max_size,
+            )
+
     def _get_model(self) -> Any:
-        """Get the model instance (lazy loading)."""
+        """Get the model instance (lazy loading, once across threads)."""
         if self._model is None:
-            # Determine cache directory
-            cache_dir = str(Path(__file__).parent.parent / "models")
-            self._model = _load_model(self._settings.embedding_model, cache_dir)
-            self._dimension = self._model.get_sentence_embedding_dimension()
+            with self._model_lock:
+                if self._model is None:
+                    model = self._create_model()
+                    self._dimension = model.get_sentence_embedding_dimension()
+                    self._model = model
         return self._model
 
+    def _create_model(self) -> Any:
+        """Load the sentence-transformers model."""
+        # Determine cache directory
+        cache_dir = str(Path(__file__).parent.parent / "models")
+        return _load_model(self._settings.embedding_model, cache_dir)
+
     @property
     def dimension(self) -> int:
         """Return the embedding dimension."""
         return self._dimension
 
+    @property
+    def model_name(self) -> str:
+        """Return the local model name."""
+        return self._settings.embedding_model
+
     async def embed_query(self, text: str) -> list[float]:
         """Embed a search query with E5 prefix.
 
@@ -95,15 +120,55 @@ class LocalEmbeddingProvider(EmbeddingProvider):
         # Add query prefix for E5 models
         prefixed_text = f"{self.QUERY_PREFIX}{text}"
 
-        # Run synchronous model in thread pool
-        loop = asyncio.get_event_loop()
-        embedding = await loop.run_in_executor(
-            None,
-            lambda: self._get_model().encode(prefixed_text, normalize_embeddings=True),
-        )
+        if self._query_batcher is not None:
+            return await self._query_batcher.submit(prefixed_text)
 
+        embedding = await self._encode(prefixed_text)
         return embedding.tolist()
 
+    async def embed_queries(self, texts: list[str]) -> list[list[float]]:
+        """Embed several queries with the E5 prefix in one forward pass.
+
+        Args:
+            texts: Query texts to embed
+
+        Returns:
+            Embedding vectors in input order
+        """
+        if not texts:
+            return []
+
+        return await self._encode_queries([f"{self.QUERY_PREFIX}{text}" for text in texts])
+
+    async def _encode(self, sentences: str | list[str], batch_size: int = 32) -> Any:
+        """Run the model on the dedicated embedding executor.
+
+        Args:
+            sentences: Text or list of texts with the E5 prefix applied
+            batch_size: Texts per forward pass
+
+        Returns:
+            Numpy array of normalized embeddings
+        """
+        return await get_embedding_executor().encode(self._get_model, sentences, batch_size)
+
+    async def _encode_queries(self, prefixed_texts: list[str]) -> list[list[float]]:
+        """Encode a micro-batch of already-prefixed queries in one forward pass.
+
+        Args:
+            prefixed_texts: Query texts with the E5 query prefix applied
+
+        Returns:
+            Embedding vectors in input order
+        """
+        if len(prefixed_texts) == 1:
+            # A lone query skips the batch code path entirely
+            embedding = await self._encode(prefixed_texts[0])
+            return [embedding.tolist()]
+
+        embeddings = await self._encode(prefixed_texts, batch_size=len(prefixed_texts))
+        return embeddings.tolist()
+
     async def embed_passage(self, text: str) -> list[float]:
         """Embed a document passage with E5 prefix.
 
@@ -116,13 +181,7 @@ class LocalEmbeddingProvider(EmbeddingProvider):
         # Add passage prefix for E5 models
         prefixed_text = f"{self.PASSAGE_PREFIX}{text}"
 
-        # Run synchronous model in thread pool
-        loop = asyncio.get_event_loop()
-        embedding = await loop.run_in_executor(
-            None,
-            lambda: self._get_model().encode(prefixed_text, normalize_embeddings=True),
-        )
-
+        embedding = await self._encode(prefixed_text)
         return embedding.tolist()
 
     async def embed_passages(self, texts: list[str]) -> list[list[float]]:
@@ -142,16 +201,5 @@ class LocalEmbeddingProvider(EmbeddingProvider):
         # Add passage prefix to all texts
         prefixed_texts = [f"{self.PASSAGE_PREFIX}{text}" for text in texts]
 
-        # Run batch embedding in thread pool
-        loop = asyncio.get_event_loop()
-        embeddings = await loop.run_in_executor(
-            None,
-            lambda: self._get_model().encode(
-                prefixed_texts,
-                normalize_embeddings=True,
-                batch_size=32,
-                show_progress_bar=False,
-            ),
-        )
-
+        embeddings = await self._encode(prefixed_texts, batch_size=32)
         return embeddings.tolist()
@@ -0,0 +1,233 @@
+"""Local E5 embedding backend running on ONNX Runtime.
+
+Selected with RAG_LOCAL_EMBEDDING_BACKEND=onnx. Avoids importing torch,
+keeps per-worker RSS low and can optionally run a dynamically
+int8-quantized copy of the model. The E5 "query: " / "passage: " prefixes,
+mean pooling and L2 normalization match the sentence-transformers backend,
+so vectors from both backends live in the same space (verify with
+scripts/compare_embedding_backends.py before switching production pods).
+
+ONNX Runtime is an optional dependency:
+    pip install -e '.[onnx]'
+"""
+
+from __future__ import annotations
+
+import json
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from middleware.logging import get_logger
+
+from .executor import resolve_threads_per_worker
+from .local import LocalEmbeddingProvider
+
+logger = get_logger(__name__)
+
+# Relative path of the exported model inside the HuggingFace repository
+HUB_ONNX_FILE = "onnx/model.onnx"
+MAX_SEQ_LENGTH = 512
+
+
+def _get_onnx_modules() -> tuple[Any, Any]:
+    """Lazy-import onnxruntime and tokenizers, raising a clear error if missing."""
+    try:
+        import onnxruntime
+        from tokenizers import Tokenizer
+
+        return onnxruntime, Tokenizer
+    except ImportError as exc:
+        raise RuntimeError(
+            "ONNX backend is not installed. Install with: pip install onnxruntime tokenizers "
+            "huggingface-hub (or pip install -e '.[onnx]' from the rag/ directory)"
+        ) from exc
+
+
+def quantize_model(model_path: Path) -> Path:
+    """Create (once) a dynamically int8-quantized copy of an ONNX model.
+
+    Args:
+        model_path: Path to the fp32 ONNX model
+
+    Returns:
+        Path to the quantized model next to the original
+    """
+    quantized_path = model_path.with_name(f"{model_path.stem}_int8{model_path.suffix}")
+    if quantized_path.exists():
+        return quantized_path
+
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    logger.info("quantizing_onnx_model", source=str(model_path), target=str(quantized_path))
+    quantize_dynamic(str(model_path), str(quantized_path), weight_type=QuantType.QInt8)
+    return quantized_path
+
+
+class OnnxSentenceEncoder:
+    """Minimal sentence encoder exposing the SentenceTransformer.encode API.
+
+    Runs the transformer through an ONNX Runtime session and applies
+    attention-masked mean pooling, as configured for the E5 models.
+    """
+
+    def __init__(
+        self,
+        session: Any,
+        tokenizer: Any,
+        dimension: int,
+    ) -> None:
+        """Initialize the encoder.
+
+        Args:
+            session: onnxruntime.InferenceSession for the transformer
+            tokenizer: tokenizers.Tokenizer with padding/truncation enabled
+            dimension: Hidden size of the model (embedding dimension)
+        """
+        self._session = session
+        self._tokenizer = tokenizer
+        self._dimension = dimension
+        self._input_names = {i.name for i in session.get_inputs()}
+
+    def get_sentence_embedding_dimension(self) -> int:
+        """Return the embedding dimension."""
+        return self._dimension
+
+    def _encode_batch(self, texts: list[str]) -> np.ndarray:
+        encodings = self._tokenizer.encode_batch(texts)
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self._input_names:
+            feeds["token_type_ids"] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+
+        token_embeddings = self._session.run(None, feeds)[0]
+
+        # Mean pooling over non-padding tokens
+        mask = attention_mask[..., np.newaxis].astype(np.float32)
+        summed = (token_embeddings * mask).sum(axis=1)
+        counts = np.clip(mask.sum(axis=1), 1e-9, None)
+        return summed / counts
+
+    def encode(
+        self,
+        sentences: str | list[str],
+        normalize_embeddings: bool = False,
+        batch_size: int = 32,
+        show_progress_bar: bool = False,
+    ) -> np.ndarray:
+        """Encode one text or a list of texts.
+
+        Args:
+            sentences: Text or list of texts (prefixes already applied)
+            normalize_embeddings: L2-normalize each vector
+            batch_size: Texts per ONNX Runtime call
+            show_progress_bar: Accepted for API compatibility; ignored
+
+        Returns:
+            1-D array for a single text, 2-D array for a list
+        """
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+
+        if not texts:
+            return np.zeros((0, self._dimension), dtype=np.float32)
+
+        embeddings = np.concatenate(
+            [self._encode_batch(texts[i : i + batch_size]) for i in range(0, len(texts), batch_size)]
+        ).astype(np.float32)
+
+        if normalize_embeddings:
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            embeddings = embeddings / np.clip(norms, 1e-12, None)
+
+        return embeddings[0] if single else embeddings
+
+
+@lru_cache(maxsize=1)
+def _load_onnx_model(
+    model_name: str,
+    cache_dir: str | None = None,
+    model_path: str | None = None,
+    quantize: bool = False,
+    intra_op_threads: int | None = None,
+) -> OnnxSentenceEncoder:
+    """Load the ONNX model and tokenizer (cached singleton).
+
+    Args:
+        model_name: HuggingFace model name (tokenizer/config source)
+        cache_dir: Optional cache directory for downloaded files
+        model_path: Local ONNX file overriding the hub export
+        quantize: Use a dynamically int8-quantized copy of the model
+        intra_op_threads: ONNX Runtime intra-op thread count (None = runtime default)
+
+    Returns:
+        OnnxSentenceEncoder instance
+    """
+    onnxruntime, Tokenizer = _get_onnx_modules()
+    from huggingface_hub import snapshot_download
+
+    logger.info("loading_onnx_embedding_model", model=model_name, quantize=quantize)
+
+    patterns = ["tokenizer.json", "config.json"]
+    if model_path is None:
+        patterns.append(HUB_ONNX_FILE)
+    repo_dir = Path(snapshot_download(model_name, cache_dir=cache_dir, allow_patterns=patterns))
+
+    onnx_path = Path(model_path) if model_path else repo_dir / HUB_ONNX_FILE
+    if not onnx_path.exists():
+        raise RuntimeError(
+            f"No ONNX export found for {model_name}. Export one with "
+            f"'optimum-cli export onnx --model {model_name} <dir>' and set RAG_ONNX_MODEL_PATH"
+        )
+    if quantize:
+        onnx_path = quantize_model(onnx_path)
+
+    tokenizer = Tokenizer.from_file(str(repo_dir / "tokenizer.json"))
+    tokenizer.enable_truncation(max_length=MAX_SEQ_LENGTH)
+    tokenizer.enable_padding()
+
+    with open(repo_dir / "config.json", encoding="utf-8") as f:
+        dimension = int(json.load(f)["hidden_size"])
+
+    options = onnxruntime.SessionOptions()
+    if intra_op_threads:
+        options.intra_op_num_threads = intra_op_threads
+        options.inter_op_num_threads = 1
+
+    session = onnxruntime.InferenceSession(
+        str(onnx_path),
+        sess_options=options,
+        providers=["CPUExecutionProvider"],
+    )
+
+    logger.info(
+        "onnx_embedding_model_loaded",
+        model=model_name,
+        path=str(onnx_path),
+        dimension=dimension,
+    )
+
+    return OnnxSentenceEncoder(session, tokenizer, dimension)
+
+
+class OnnxEmbeddingProvider(LocalEmbeddingProvider):
+    """Local E5 embedding provider backed by ONNX Runtime.
+
+    Shares prefixes, batching and normalization with
+    LocalEmbeddingProvider; only model loading differs.
+    """
+
+    def _create_model(self) -> Any:
+        """Load the ONNX encoder instance."""
+        cache_dir = str(Path(__file__).parent.parent / "models")
+        return _load_onnx_model(
+            self._settings.embedding_model,
+            cache_dir,
+            self._settings.onnx_model_path,
+            self._settings.onnx_quantize,
+            resolve_threads_per_worker(self._settings),
+        )
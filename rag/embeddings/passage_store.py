@@ -0,0 +1,146 @@
+"""Content-addressed persistent store for passage embeddings.
+
+Re-ingesting an edited document mostly re-sends chunk texts that were
+already embedded. Vectors are stored in SQLite as float32 blobs keyed by
+sha256(model, prefix, text), so unchanged chunks never reach the model or
+the Gemini batch API again. The store is capped by entry count and evicts
+the least recently used vectors first.
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+from array import array
+from pathlib import Path
+
+from middleware.logging import get_logger
+
+logger = get_logger(__name__)
+
+# SQLite limits the number of bound parameters per statement
+_SQL_BATCH = 500
+
+
+def passage_key(model_name: str, prefix: str, text: str) -> str:
+    """Compute the content address of a passage embedding.
+
+    Args:
+        model_name: Embedding model identifier
+        prefix: Prefix or task type applied by the provider
+        text: Passage text
+
+    Returns:
+        Hex sha256 digest
+    """
+    digest = hashlib.sha256()
+    for part in (model_name, prefix, text):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+class PassageEmbeddingStore:
+    """SQLite-backed passage embedding store with size-capped LRU eviction."""
+
+    def __init__(self, path: str | Path, max_entries: int) -> None:
+        """Open (or create) the store.
+
+        Args:
+            path: SQLite database file, or ":memory:"
+            max_entries: Maximum stored vectors before eviction
+        """
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+
+        if str(path) != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS passage_embeddings ("
+                " key TEXT PRIMARY KEY,"
+                " vector BLOB NOT NULL,"
+                " last_used REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_passage_embeddings_last_used"
+                " ON passage_embeddings(last_used)"
+            )
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM passage_embeddings").fetchone()
+        return int(count)
+
+    def get_many(self, keys: list[str]) -> dict[str, list[float]]:
+        """Fetch stored vectors and mark them as recently used.
+
+        Args:
+            keys: Content addresses to look up
+
+        Returns:
+            Mapping of found keys to vectors (misses are absent)
+        """
+        found: dict[str, list[float]] = {}
+        if not keys:
+            return found
+
+        now = time.time()
+        with self._lock:
+            for i in range(0, len(keys), _SQL_BATCH):
+                batch = keys[i : i + _SQL_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM passage_embeddings WHERE key IN ({placeholders})",
+                    batch,
+                ).fetchall()
+                for key, blob in rows:
+                    vector = array("f")
+                    vector.frombytes(blob)
+                    found[key] = vector.tolist()
+
+                if rows:
+                    self._conn.execute(
+                        f"UPDATE passage_embeddings SET last_used = ? WHERE key IN ({placeholders})",
+                        [now, *batch],
+                    )
+            self._conn.commit()
+
+        return found
+
+    def put_many(self, vectors: dict[str, list[float]]) -> None:
+        """Store vectors and evict the least recently used overflow.
+
+        Args:
+            vectors: Mapping of content address to embedding vector
+        """
+        if not vectors:
+            return
+
+        now = time.time()
+        rows = [(key, array("f", vector).tobytes(), now) for key, vector in vectors.items()]
+
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO passage_embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+                rows,
+            )
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM passage_embeddings").fetchone()
+            overflow = count - self._max_entries
+            if overflow > 0:
+                self._conn.execute(
+                    "DELETE FROM passage_embeddings WHERE key IN ("
+                    " SELECT key FROM passage_embeddings ORDER BY last_used ASC LIMIT ?)",
+                    (overflow,),
+                )
+                logger.info("passage_store_evicted", count=overflow)
+            self._conn.commit()
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,50 @@
+"""Client-side rate limiting for the cloud embedding API.
+
+Sending batches concurrently makes it easy to exceed the API quota, and a
+burst of 429s then costs more time in backoff than it saved. A token bucket
+refilled at the quota rate spaces requests out before they are sent: up to
+`capacity` requests may go at once, after that one per 1/rate seconds.
+"""
+
+import asyncio
+import time
+
+
+class TokenBucket:
+    """Async token bucket; waiters are served in arrival order."""
+
+    def __init__(self, rate_per_sec: float, capacity: float) -> None:
+        """Initialize a full bucket.
+
+        Args:
+            rate_per_sec: Tokens added per second (the sustained request rate)
+            capacity: Maximum tokens held (the burst size, at least 1)
+        """
+        self._rate = rate_per_sec
+        self._capacity = max(capacity, 1.0)
+        self._tokens = self._capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, tokens: float = 1.0) -> float:
+        """Take tokens from the bucket, waiting until enough have accumulated.
+
+        Args:
+            tokens: Tokens to take (at most the capacity)
+
+        Returns:
+            Seconds spent waiting
+        """
+        async with self._lock:
+            waited = 0.0
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self._rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+
+                delay = (tokens - self._tokens) / self._rate
+                await asyncio.sleep(delay)
+                waited += delay
@@ -0,0 +1,106 @@
+"""Hedged requests for tail-latency-sensitive remote calls.
+
+A small fraction of calls to a remote service is slow for reasons unrelated
+to the request (GC pause, a busy replica, a lost packet), and those calls
+dominate p99. Hedging sends a second, identical call when the first has
+not answered within the service's usual latency (its recent p95), uses
+whichever answers first and cancels the other. At a p95 delay at most ~5%
+of calls are duplicated.
+
+Only use this for idempotent calls (searches, embeddings).
+
+Each name reports <name>_hedge_rate (share of calls hedged) and
+<name>_hedge_win_ratio (share of hedges answered by the second call) as
+gauges; a win ratio near zero means the delay is too short to pay off.
+"""
+
+import asyncio
+from collections.abc import Awaitable, Callable
+from typing import TypeVar
+
+from metrics import get_metrics
+
+T = TypeVar("T")
+
+
+def hedge_delay(histogram: str, percentile: float, min_samples: int) -> float | None:
+    """Return the hedge delay in seconds from a latency histogram.
+
+    Args:
+        histogram: Metrics histogram of call latencies in milliseconds
+        percentile: Percentile (0-100) of recent latencies to wait before hedging
+        min_samples: Observations required before hedging at all
+
+    Returns:
+        Delay in seconds, or None while there is too little history
+    """
+    samples = get_metrics().histogram(histogram)
+    if samples.count < min_samples:
+        return None
+    value = samples.percentile(percentile)
+    return value / 1000 if value is not None else None
+
+
+async def hedged(
+    call: Callable[[], Awaitable[T]],
+    delay_sec: float | None,
+    name: str,
+) -> T:
+    """Run call, starting an identical second call if it is slower than delay_sec.
+
+    The first successful result wins and the other call is cancelled. If
+    both fail, the first call's exception is raised.
+
+    Args:
+        call: Factory returning a new awaitable for each attempt
+        delay_sec: Time to wait before hedging (None disables hedging)
+        name: Metric prefix (counters <name>_calls, <name>_hedged and
+            <name>_hedge_wins, gauges <name>_hedge_rate and <name>_hedge_win_ratio)
+
+    Returns:
+        Result of the first successful attempt
+    """
+    metrics = get_metrics()
+    metrics.increment(f"{name}_calls")
+    primary = asyncio.ensure_future(call())
+    if delay_sec is None:
+        try:
+            return await primary
+        finally:
+            _report_ratios(name)
+
+    attempts = [primary]
+    try:
+        done, _ = await asyncio.wait(attempts, timeout=delay_sec)
+        if done:
+            return primary.result()
+
+        metrics.increment(f"{name}_hedged")
+        attempts.append(asyncio.ensure_future(call()))
+
+        pending = set(attempts)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for attempt in done:
+                if attempt.exception() is None:
+                    if attempt is not primary:
+                        metrics.increment(f"{name}_hedge_wins")
+                    return attempt.result()
+        return primary.result()
+    finally:
+        for attempt in attempts:
+            if not attempt.done():
+                attempt.cancel()
+        _report_ratios(name)
+
+
+def _report_ratios(name: str) -> None:
+    """Update the hedge rate and win ratio gauges of a name."""
+    metrics = get_metrics()
+    calls = metrics.counter(f"{name}_calls")
+    hedges = metrics.counter(f"{name}_hedged")
+    metrics.set_gauge(f"{name}_hedge_rate", round(hedges / calls, 4) if calls else 0.0)
+    metrics.set_gauge(
+        f"{name}_hedge_win_ratio",
+        round(metrics.counter(f"{name}_hedge_wins") / hedges, 4) if hedges else 0.0,
+    )
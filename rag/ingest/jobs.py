@@ -0,0 +1,455 @@
+"""Background ingest jobs backed by a local SQLite store.
+
+Synchronous /ingest holds the connection open through parse, embed and
+upsert; large documents hit proxy timeouts and the client retries,
+duplicating the work. In async mode the upload is persisted as a job, the
+request returns a job_id immediately, and a fixed number of worker tasks
+(RAG_INGEST_JOB_WORKERS, independent of the HTTP workers) run the
+pipeline. Job state and the pending upload survive restarts: jobs that
+were queued or running when the process stopped are picked up again on
+the next start. Point IDs are derived from (doc_id, chunk index), so
+re-running an interrupted job overwrites rather than duplicates.
+
+Several processes (HTTP workers, replicas on a shared volume) open the same
+store, so a worker claims a job atomically before running it: the claim
+sets the job's owner and a lease (RAG_INGEST_JOB_LEASE_SEC) that the worker
+renews while the job runs. Another process only takes over a running job
+once its lease has expired, i.e. its owner stopped without finishing it.
+"""
+
+import asyncio
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+from config import get_settings
+from metrics import get_metrics
+from middleware.logging import get_logger
+
+from .pipeline import IngestPipelineError, ParseJob, run_ingest
+
+logger = get_logger(__name__)
+
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_SUCCEEDED = "succeeded"
+STATUS_FAILED = "failed"
+
+_JOB_FIELDS = (
+    "job_id",
+    "doc_id",
+    "filename",
+    "doc_type",
+    "company_id",
+    "status",
+    "stage",
+    "chunks_count",
+    "embeddings_count",
+    "timings_ms",
+    "error",
+    "created_at",
+    "updated_at",
+)
+
+# Queued, or running under a lease that has expired (or predates leases)
+_CLAIMABLE = "status = ? OR (status = ? AND (lease_until IS NULL OR lease_until < ?))"
+
+
+class JobStore:
+    """SQLite-backed ingest job records and pending uploads."""
+
+    def __init__(self, path: str | Path, lease_sec: float = 60.0) -> None:
+        """Open (or create) the job store.
+
+        Args:
+            path: SQLite database file, or ":memory:"
+            lease_sec: How long a claimed job stays owned without a renewal
+        """
+        self._lock = threading.Lock()
+        self.lease_sec = lease_sec
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+        if str(path) != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS ingest_jobs ("
+                " job_id TEXT PRIMARY KEY,"
+                " doc_id TEXT NOT NULL,"
+                " filename TEXT NOT NULL,"
+                " doc_type TEXT NOT NULL,"
+                " company_id TEXT,"
+                " status TEXT NOT NULL,"
+                " stage TEXT NOT NULL,"
+                " chunks_count INTEGER,"
+                " embeddings_count INTEGER,"
+                " timings_ms TEXT NOT NULL DEFAULT '{}',"
+                " error TEXT,"
+                " created_at REAL NOT NULL,"
+                " updated_at REAL NOT NULL,"
+                " payload TEXT,"
+                " content BLOB,"
+                " owner TEXT,"
+                " lease_until REAL)"
+            )
+            # Stores created before job leases lack the ownership columns
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(ingest_jobs)")}
+            for name, kind in (("owner", "TEXT"), ("lease_until", "REAL")):
+                if name not in columns:
+                    self._conn.execute(f"ALTER TABLE ingest_jobs ADD COLUMN {name} {kind}")
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_ingest_jobs_status ON ingest_jobs(status)"
+            )
+            self._conn.commit()
+
+    def create(self, job_id: str, job: ParseJob) -> None:
+        """Persist a new queued job together with its upload."""
+        now = time.time()
+        payload = json.dumps(
+            {
+                "extension": job.extension,
+                "parser_mode": job.parser_mode,
+                "tokenizer_model": job.tokenizer_model,
+            }
+        )
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO ingest_jobs (job_id, doc_id, filename, doc_type, company_id,"
+                " status, stage, created_at, updated_at, payload, content)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    job_id,
+                    job.doc_id,
+                    job.filename,
+                    job.doc_type,
+                    job.company_id,
+                    STATUS_QUEUED,
+                    STATUS_QUEUED,
+                    now,
+                    now,
+                    payload,
+                    job.content,
+                ),
+            )
+            self._conn.commit()
+
+    def update(self, job_id: str, **fields: Any) -> None:
+        """Update job columns; timings_ms is stored as JSON.
+
+        Finished jobs (succeeded or failed) drop their stored upload and
+        their lease.
+        """
+        if "timings_ms" in fields:
+            fields["timings_ms"] = json.dumps(fields["timings_ms"])
+        if fields.get("status") in (STATUS_SUCCEEDED, STATUS_FAILED):
+            fields["payload"] = None
+            fields["content"] = None
+            fields["lease_until"] = None
+        fields["updated_at"] = time.time()
+
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock:
+            self._conn.execute(
+                f"UPDATE ingest_jobs SET {assignments} WHERE job_id = ?",
+                (*fields.values(), job_id),
+            )
+            self._conn.commit()
+
+    def get(self, job_id: str) -> dict[str, Any] | None:
+        """Return a job record (without the upload), or None if unknown."""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(_JOB_FIELDS)} FROM ingest_jobs WHERE job_id = ?",
+                (job_id,),
+            ).fetchone()
+        if row is None:
+            return None
+
+        record = dict(zip(_JOB_FIELDS, row, strict=True))
+        record["timings_ms"] = json.loads(record["timings_ms"])
+        return record
+
+    def load_job(self, job_id: str) -> ParseJob | None:
+        """Rebuild the parse job for a pending record, or None if finished."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT doc_id, filename, doc_type, company_id, payload, content"
+                " FROM ingest_jobs WHERE job_id = ?",
+                (job_id,),
+            ).fetchone()
+        if row is None or row[4] is None:
+            return None
+
+        doc_id, filename, doc_type, company_id, payload, content = row
+        options = json.loads(payload)
+        return ParseJob(
+            content=bytes(content),
+            filename=filename,
+            extension=options["extension"],
+            doc_type=doc_type,
+            company_id=company_id,
+            doc_id=doc_id,
+            parser_mode=options["parser_mode"],
+            tokenizer_model=options["tokenizer_model"],
+        )
+
+    def pending_job_ids(self) -> list[str]:
+        """Return queued jobs and running jobs whose lease expired, oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT job_id FROM ingest_jobs"
+                f" WHERE {_CLAIMABLE} ORDER BY created_at",
+                (STATUS_QUEUED, STATUS_RUNNING, time.time()),
+            ).fetchall()
+        return [job_id for (job_id,) in rows]
+
+    def claim(self, job_id: str) -> bool:
+        """Take ownership of a queued job, or of a running one whose lease expired.
+
+        The check and the update are a single statement, so of several
+        processes claiming the same job exactly one succeeds.
+
+        Returns:
+            True if this store now owns the job
+        """
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE ingest_jobs SET status = ?, owner = ?, lease_until = ?, updated_at = ?"
+                f" WHERE job_id = ? AND ({_CLAIMABLE})",
+                (
+                    STATUS_RUNNING,
+                    self.owner,
+                    now + self.lease_sec,
+                    now,
+                    job_id,
+                    STATUS_QUEUED,
+                    STATUS_RUNNING,
+                    now,
+                ),
+            )
+            self._conn.commit()
+        return cursor.rowcount == 1
+
+    def renew(self, job_id: str) -> bool:
+        """Extend the lease of a job this store is running.
+
+        Returns:
+            False if the job finished or another process took it over
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE ingest_jobs SET lease_until = ?"
+                " WHERE job_id = ? AND owner = ? AND status = ?",
+                (time.time() + self.lease_sec, job_id, self.owner, STATUS_RUNNING),
+            )
+            self._conn.commit()
+        return cursor.rowcount == 1
+
+    def release(self) -> int:
+        """Requeue the running jobs this store owns (graceful shutdown).
+
+        Returns:
+            Number of jobs handed back
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE ingest_jobs SET status = ?, owner = NULL, lease_until = NULL"
+                " WHERE owner = ? AND status = ?",
+                (STATUS_QUEUED, self.owner, STATUS_RUNNING),
+            )
+            self._conn.commit()
+        return cursor.rowcount
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+
+class IngestJobQueue:
+    """Bounded pool of asyncio workers draining persisted ingest jobs."""
+
+    def __init__(self, store: JobStore, workers: int) -> None:
+        """Create the queue (workers start on first use).
+
+        Args:
+            store: Persistent job store
+            workers: Number of jobs processed concurrently
+        """
+        self._store = store
+        self._workers = max(1, workers)
+        self._queue: asyncio.Queue[str] | None = None
+        self._tasks: list[asyncio.Task[None]] = []
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    @property
+    def store(self) -> JobStore:
+        """Return the underlying job store."""
+        return self._store
+
+    async def start(self) -> None:
+        """Start the workers on the running loop and resume pending jobs."""
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._tasks:
+            return
+
+        self._queue = asyncio.Queue()
+        self._loop = loop
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"ingest-job-worker-{i}")
+            for i in range(self._workers)
+        ]
+
+        pending = await asyncio.to_thread(self._store.pending_job_ids)
+        for job_id in pending:
+            self._queue.put_nowait(job_id)
+        get_metrics().set_gauge("ingest_jobs_queued", self._queue.qsize())
+
+        logger.info("ingest_job_queue_started", workers=self._workers, resumed=len(pending))
+
+    async def stop(self) -> None:
+        """Cancel the workers and requeue their jobs for the next start."""
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._loop = None
+        if tasks:
+            released = await asyncio.to_thread(self._store.release)
+            if released:
+                logger.info("ingest_jobs_released", count=released)
+
+    async def submit(self, job: ParseJob) -> str:
+        """Persist a job and queue it for processing.
+
+        Args:
+            job: Validated document and chunking parameters
+
+        Returns:
+            New job ID
+        """
+        await self.start()
+        assert self._queue is not None
+
+        job_id = str(uuid.uuid4())
+        await asyncio.to_thread(self._store.create, job_id, job)
+        self._queue.put_nowait(job_id)
+
+        get_metrics().increment("ingest_jobs_submitted")
+        get_metrics().set_gauge("ingest_jobs_queued", self._queue.qsize())
+        logger.info("ingest_job_queued", job_id=job_id, doc_id=job.doc_id)
+        return job_id
+
+    async def get(self, job_id: str) -> dict[str, Any] | None:
+        """Return the job record, or None if unknown."""
+        return await asyncio.to_thread(self._store.get, job_id)
+
+    async def _worker(self) -> None:
+        assert self._queue is not None
+        queue = self._queue
+        while True:
+            job_id = await queue.get()
+            get_metrics().set_gauge("ingest_jobs_queued", queue.qsize())
+            try:
+                await self._process(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Never let one bad job take a worker down
+                logger.error("ingest_job_worker_error", job_id=job_id, error=str(e))
+            finally:
+                queue.task_done()
+
+    async def _process(self, job_id: str) -> None:
+        if not await asyncio.to_thread(self._store.claim, job_id):
+            # Finished, or running in another process that holds its lease
+            logger.debug("ingest_job_not_claimed", job_id=job_id)
+            return
+
+        job = await asyncio.to_thread(self._store.load_job, job_id)
+        if job is None:
+            return
+
+        heartbeat = asyncio.create_task(self._keep_lease(job_id))
+        try:
+            await self._run_job(job_id, job)
+        finally:
+            heartbeat.cancel()
+
+    async def _keep_lease(self, job_id: str) -> None:
+        """Renew the job's lease until cancelled or lost."""
+        while True:
+            await asyncio.sleep(self._store.lease_sec / 3)
+            if not await asyncio.to_thread(self._store.renew, job_id):
+                logger.warning("ingest_job_lease_lost", job_id=job_id)
+                return
+
+    async def _run_job(self, job_id: str, job: ParseJob) -> None:
+        async def on_stage(stage: str) -> None:
+            await asyncio.to_thread(
+                self._store.update, job_id, status=STATUS_RUNNING, stage=stage
+            )
+
+        start = time.perf_counter()
+        try:
+            result = await run_ingest(job, on_stage=on_stage)
+        except IngestPipelineError as e:
+            await asyncio.to_thread(
+                self._store.update,
+                job_id,
+                status=STATUS_FAILED,
+                stage=e.stage,
+                error=str(e),
+            )
+            get_metrics().increment("ingest_jobs_failed")
+            logger.warning("ingest_job_failed", job_id=job_id, stage=e.stage, error=str(e))
+            return
+
+        timings = dict(result.timings_ms)
+        timings["total"] = round((time.perf_counter() - start) * 1000, 2)
+        await asyncio.to_thread(
+            self._store.update,
+            job_id,
+            status=STATUS_SUCCEEDED,
+            stage="completed",
+            chunks_count=result.chunks_count,
+            embeddings_count=result.embeddings_count,
+            timings_ms=timings,
+        )
+        get_metrics().increment("ingest_jobs_succeeded")
+        get_metrics().observe("ingest_job_duration_ms", timings["total"])
+        logger.info("ingest_job_completed", job_id=job_id, doc_id=job.doc_id, **timings)
+
+
+@lru_cache
+def get_ingest_job_queue() -> IngestJobQueue:
+    """Get the ingest job queue (cached singleton).
+
+    Returns:
+        IngestJobQueue backed by the configured SQLite store
+    """
+    settings = get_settings()
+    return IngestJobQueue(
+        JobStore(settings.ingest_jobs_path, lease_sec=settings.ingest_job_lease_sec),
+        workers=settings.ingest_job_workers,
+    )
+
+
+async def shutdown_ingest_job_queue() -> None:
+    """Stop the queue if it was ever created (a later call recreates it)."""
+    if get_ingest_job_queue.cache_info().currsize:
+        queue = get_ingest_job_queue()
+        await queue.stop()
+        queue.store.close()
+        get_ingest_job_queue.cache_clear()
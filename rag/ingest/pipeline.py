@@ -0,0 +1,286 @@
+"""Ingest pipeline: parse -> chunk -> embed -> upsert.
+
+Parsing a large PDF or running a docling conversion takes seconds of pure
+CPU work. Running it inside the async handler blocked the event loop and
+stalled every concurrent /search. Parse jobs now run on a bounded pool of
+worker processes (or a thread when RAG_PARSE_WORKERS=0), with at most
+RAG_MAX_CONCURRENT_PARSE_JOBS in flight.
+
+run_ingest() drives the whole pipeline and is shared by the synchronous
+/ingest handler and the background job workers.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import time
+from collections.abc import Awaitable, Callable
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any
+
+from chunking import Chunk, chunk_document
+from config import get_settings
+from embeddings import get_embedding_provider
+from middleware.logging import get_logger
+from search.store import get_vector_store
+from search.warmup import get_cache_warmer
+
+from .parser import ParserError, parse_document
+
+logger = get_logger(__name__)
+
+
+@dataclass(frozen=True)
+class ParseJob:
+    """Picklable description of one document to parse and chunk."""
+
+    content: bytes
+    filename: str
+    extension: str
+    doc_type: str
+    company_id: str | None
+    doc_id: str
+    parser_mode: str
+    tokenizer_model: str
+
+
+def parse_and_chunk(job: ParseJob) -> list[Chunk]:
+    """Parse a document and split it into chunks (runs in a worker).
+
+    Chunk lists pickle compactly: source, doc_type and company_id are the
+    same objects on every chunk, so pickle memoizes them once per batch.
+
+    Args:
+        job: Document and chunking parameters
+
+    Returns:
+        List of chunks
+
+    Raises:
+        ParserError: If the document cannot be parsed
+    """
+    if job.parser_mode == "docling":
+        # Docling path: rich multi-format parsing with layout-aware chunking
+        from chunking.docling_chunker import chunk_docling_document
+
+        from .docling_parser import parse_document_with_docling
+
+        docling_doc = parse_document_with_docling(job.content, job.filename, job.extension)
+        return chunk_docling_document(
+            doc=docling_doc,
+            source=job.filename,
+            doc_type=job.doc_type,
+            company_id=job.company_id,
+            metadata={"doc_id": job.doc_id},
+            tokenizer_model=job.tokenizer_model,
+        )
+
+    # Lightweight path: existing pypdf + RecursiveSplitter
+    text = parse_document(job.content, job.filename, job.extension)
+    return chunk_document(
+        text=text,
+        source=job.filename,
+        doc_type=job.doc_type,
+        company_id=job.company_id,
+        metadata={"doc_id": job.doc_id},
+    )
+
+
+class ParseExecutor:
+    """Bounded executor for parse + chunk jobs."""
+
+    def __init__(self, workers: int, max_concurrent_jobs: int) -> None:
+        """Create the executor (workers start lazily on first job).
+
+        Args:
+            workers: Worker processes (0 = a thread pool inside this process)
+            max_concurrent_jobs: Maximum parse jobs running or queued on the pool
+        """
+        self._max_concurrent_jobs = max(1, max_concurrent_jobs)
+        self._semaphore: asyncio.Semaphore | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._pool: Executor
+
+        if workers > 0:
+            # Spawn, not fork: docling/torch state must not be forked mid-operation
+            self._pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        else:
+            self._pool = ThreadPoolExecutor(
+                max_workers=self._max_concurrent_jobs,
+                thread_name_prefix="parse",
+            )
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or loop is not self._loop:
+            self._semaphore = asyncio.Semaphore(self._max_concurrent_jobs)
+            self._loop = loop
+        return self._semaphore
+
+    async def run(
+        self,
+        job: ParseJob,
+        fn: Callable[[ParseJob], list[Chunk]] = parse_and_chunk,
+    ) -> list[Chunk]:
+        """Run a parse job off the event loop.
+
+        Args:
+            job: Document to parse and chunk
+            fn: Job function (module-level so it can be pickled)
+
+        Returns:
+            List of chunks
+        """
+        async with self._get_semaphore():
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._pool, fn, job)
+
+    def shutdown(self) -> None:
+        """Stop the workers."""
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+@lru_cache
+def get_parse_executor() -> ParseExecutor:
+    """Get the parse executor (cached singleton).
+
+    Returns:
+        ParseExecutor configured from settings
+    """
+    settings = get_settings()
+    logger.info(
+        "parse_executor_created",
+        workers=settings.parse_workers,
+        max_concurrent_jobs=settings.max_concurrent_parse_jobs,
+    )
+    return ParseExecutor(
+        workers=settings.parse_workers,
+        max_concurrent_jobs=settings.max_concurrent_parse_jobs,
+    )
+
+
+def shutdown_parse_executor() -> None:
+    """Stop the executor if it was ever started (a later call recreates it)."""
+    if get_parse_executor.cache_info().currsize:
+        get_parse_executor().shutdown()
+        get_parse_executor.cache_clear()
+
+
+class IngestPipelineError(Exception):
+    """Raised when a pipeline stage fails.
+
+    Attributes:
+        stage: Stage that failed ("parsing", "embedding" or "storing")
+        client_error: True if the document itself is at fault (maps to 400)
+    """
+
+    def __init__(self, stage: str, message: str, client_error: bool = False) -> None:
+        super().__init__(message)
+        self.stage = stage
+        self.client_error = client_error
+
+
+@dataclass
+class IngestResult:
+    """Outcome of a successful ingest."""
+
+    doc_id: str
+    chunks_count: int
+    embeddings_count: int
+    timings_ms: dict[str, float] = field(default_factory=dict)
+    cache_stats: dict[str, Any] = field(default_factory=dict)
+
+
+StageCallback = Callable[[str], Awaitable[None]]
+
+
+async def run_ingest(job: ParseJob, on_stage: StageCallback | None = None) -> IngestResult:
+    """Run a validated document through parse, embed and upsert.
+
+    Args:
+        job: Validated document and chunking parameters
+        on_stage: Optional coroutine called with each stage name as it starts
+
+    Returns:
+        IngestResult with counts and per-stage timings
+
+    Raises:
+        IngestPipelineError: If any stage fails
+    """
+    timings: dict[str, float] = {}
+
+    async def enter(stage: str) -> float:
+        if on_stage is not None:
+            await on_stage(stage)
+        return time.perf_counter()
+
+    started = await enter("parsing")
+    try:
+        # Parse + chunk is CPU-bound; run it off the event loop
+        chunks = await get_parse_executor().run(job)
+    except ParserError as e:
+        logger.error("ingest_parse_failed", doc_id=job.doc_id, error=str(e))
+        raise IngestPipelineError("parsing", str(e), client_error=True) from e
+    except Exception as e:
+        logger.error("ingest_chunk_failed", doc_id=job.doc_id, error=str(e))
+        raise IngestPipelineError("parsing", f"Document chunking failed: {str(e)}") from e
+    timings["parsing"] = round((time.perf_counter() - started) * 1000, 2)
+
+    if not chunks:
+        raise IngestPipelineError(
+            "parsing",
+            "Document produced no chunks after processing",
+            client_error=True,
+        )
+
+    logger.info("document_chunked", doc_id=job.doc_id, chunks_count=len(chunks))
+
+    started = await enter("embedding")
+    try:
+        embedding_provider = get_embedding_provider()
+        chunk_texts = [chunk.text for chunk in chunks]
+        embeddings, cache_stats = await embedding_provider.embed_passages_with_stats(chunk_texts)
+    except Exception as e:
+        logger.error("ingest_failed", doc_id=job.doc_id, stage="embedding", error=str(e))
+        raise IngestPipelineError("embedding", f"Failed to process document: {str(e)}") from e
+    timings["embedding"] = round((time.perf_counter() - started) * 1000, 2)
+
+    logger.info(
+        "chunks_embedded",
+        doc_id=job.doc_id,
+        embeddings_count=len(embeddings),
+        **cache_stats,
+    )
+
+    started = await enter("storing")
+    try:
+        vector_store = get_vector_store()
+        await vector_store.upsert_chunks(chunks, embeddings)
+    except Exception as e:
+        logger.error("ingest_failed", doc_id=job.doc_id, stage="storing", error=str(e))
+        raise IngestPipelineError("storing", f"Failed to process document: {str(e)}") from e
+    timings["storing"] = round((time.perf_counter() - started) * 1000, 2)
+
+    # The write invalidated cached results; re-warm the affected tenants
+    get_cache_warmer().schedule_refresh(job.company_id)
+
+    logger.info(
+        "ingest_completed",
+        doc_id=job.doc_id,
+        filename=job.filename,
+        chunks_count=len(chunks),
+    )
+
+    return IngestResult(
+        doc_id=job.doc_id,
+        chunks_count=len(chunks),
+        embeddings_count=len(embeddings),
+        timings_ms=timings,
+        cache_stats=cache_stats,
+    )
@@ -1,20 +1,31 @@
 """Ingest API routes for document upload and processing."""
 
 import uuid
-from typing import Annotated
-
-from fastapi import APIRouter, Depends, File, Form, Header, HTTPException, Request, UploadFile
-from pydantic import BaseModel
+from typing import Annotated, Literal
+
+from fastapi import (
+    APIRouter,
+    Depends,
+    File,
+    Form,
+    Header,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    UploadFile,
+)
+from pydantic import BaseModel, Field
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 
-from chunking import chunk_document
 from config import Settings, get_settings
-from embeddings import get_embedding_provider
 from middleware.logging import get_logger
-from search.store import get_vector_store
+from search.store import VectorStoreError, get_vector_store
+from search.warmup import WarmupPrompt, get_cache_warmer
 
-from .parser import ParserError, parse_document
+from .jobs import STATUS_QUEUED, get_ingest_job_queue
+from .pipeline import IngestPipelineError, ParseJob, run_ingest
 from .validation import (
     ValidationError,
     validate_content,
@@ -36,6 +47,64 @@ class IngestResponse(BaseModel):
     message: str
 
 
+class IngestJobResponse(BaseModel):
+    """Response model for an ingest accepted as a background job."""
+
+    job_id: str
+    doc_id: str
+    status: str
+    status_url: str
+
+
+class IngestJobStatus(BaseModel):
+    """Status of a background ingest job."""
+
+    job_id: str
+    doc_id: str
+    filename: str
+    doc_type: str
+    company_id: str | None = None
+    status: str
+    stage: str
+    chunks_count: int | None = None
+    embeddings_count: int | None = None
+    timings_ms: dict[str, float] = {}
+    error: str | None = None
+    created_at: float
+    updated_at: float
+
+
+class TenantDeleteResponse(BaseModel):
+    """Response model for tenant offboarding."""
+
+    company_id: str
+    method: str
+
+
+class WarmupRequest(BaseModel):
+    """Request model for an on-demand cache warm-up."""
+
+    prompts: list[str] | None = Field(
+        default=None,
+        description="Prompts to warm instead of RAG_WARMUP_PROMPTS_PATH",
+    )
+    company_ids: list[str | None] | None = Field(
+        default=None,
+        description="Tenants to warm (null = unfiltered); defaults to every warm-up target",
+    )
+
+
+class WarmupResponse(BaseModel):
+    """Response model for a cache warm-up run."""
+
+    prompts: int
+    searches: int
+    cached: int
+    failed: int
+    skipped: int
+    duration_ms: float
+
+
 class IngestError(BaseModel):
     """Error response model."""
 
@@ -70,8 +139,9 @@ def verify_api_key(
 
 @router.post(
     "/ingest",
-    response_model=IngestResponse,
+    response_model=IngestResponse | IngestJobResponse,
     responses={
+        202: {"model": IngestJobResponse, "description": "Accepted as a background job"},
         400: {"model": IngestError, "description": "Validation error"},
         401: {"model": IngestError, "description": "Authentication error"},
         429: {"model": IngestError, "description": "Rate limit exceeded"},
@@ -93,12 +163,20 @@ Set `RAG_PARSER_MODE=docling` to enable rich multi-format parsing.
 - `tech_stack`: Technology stack documentation (medium chunks)
 - `general`: General documentation (default)
 
+**Modes:**
+- `sync`: respond once the document is stored
+- `async`: respond 202 with a `job_id` immediately; poll
+  `GET /ingest/jobs/{job_id}` for progress
+
+The default comes from `RAG_INGEST_MODE`; override per request with `?mode=`.
+
 **Authentication:** Requires X-API-Key header.
 """,
 )
 @limiter.limit("10/minute")
 async def ingest_document(
     request: Request,
+    response: Response,
     file: Annotated[UploadFile, File(description="Document file to ingest")],
     doc_type: Annotated[
         str,
@@ -108,8 +186,12 @@ async def ingest_document(
         str | None,
         Form(description="Optional company ID for multi-tenant isolation"),
     ] = None,
+    mode: Annotated[
+        Literal["sync", "async"] | None,
+        Query(description="Override RAG_INGEST_MODE for this request"),
+    ] = None,
     _: None = Depends(verify_api_key),
-) -> IngestResponse:
+) -> IngestResponse | IngestJobResponse:
     """Ingest a document into the knowledge base.
 
     The document is:
@@ -118,6 +200,8 @@ async def ingest_document(
     3. Chunked using document-type-specific strategy
     4. Embedded using configured embedding provider
     5. Stored in Qdrant vector database
+
+    In async mode steps 2-5 run in a background job.
     """
     # Generate document ID
     doc_id = str(uuid.uuid4())
@@ -151,81 +235,107 @@ async def ingest_document(
         raise HTTPException(status_code=400, detail=str(e)) from e
 
     settings = get_settings()
+    job = ParseJob(
+        content=content,
+        filename=file.filename,
+        extension=extension,
+        doc_type=doc_type,
+        company_id=company_id,
+        doc_id=doc_id,
+        parser_mode=settings.parser_mode,
+        tokenizer_model=settings.embedding_model,
+    )
+
+    if (mode or settings.ingest_mode) == "async":
+        job_id = await get_ingest_job_queue().submit(job)
+        response.status_code = 202
+        return IngestJobResponse(
+            job_id=job_id,
+            doc_id=doc_id,
+            status=STATUS_QUEUED,
+            status_url=str(request.url_for("get_ingest_job", job_id=job_id).path),
+        )
 
     try:
-        if settings.parser_mode == "docling":
-            # Docling path: rich multi-format parsing with layout-aware chunking
-            from chunking.docling_chunker import chunk_docling_document
-
-            from .docling_parser import parse_document_with_docling
-
-            docling_doc = parse_document_with_docling(content, file.filename, extension)
-            chunks = chunk_docling_document(
-                doc=docling_doc,
-                source=file.filename,
-                doc_type=doc_type,
-                company_id=company_id,
-                metadata={"doc_id": doc_id},
-                tokenizer_model=settings.embedding_model,
-            )
-        else:
-            # Lightweight path: existing pypdf + RecursiveSplitter
-            text = parse_document(content, file.filename, extension)
-            chunks = chunk_document(
-                text=text,
-                source=file.filename,
-                doc_type=doc_type,
-                company_id=company_id,
-                metadata={"doc_id": doc_id},
-            )
-
-    except ParserError as e:
-        logger.error("ingest_parse_failed", doc_id=doc_id, error=str(e))
-        raise HTTPException(status_code=400, detail=str(e)) from e
-    except Exception as e:
-        logger.error("ingest_chunk_failed", doc_id=doc_id, error=str(e))
+        result = await run_ingest(job)
+    except IngestPipelineError as e:
         raise HTTPException(
-            status_code=500,
-            detail=f"Document chunking failed: {str(e)}",
+            status_code=400 if e.client_error else 500,
+            detail=str(e),
         ) from e
 
-    try:
+    return IngestResponse(
+        doc_id=doc_id,
+        chunks_count=result.chunks_count,
+        message=f"Successfully ingested {file.filename}",
+    )
 
-        if not chunks:
-            raise HTTPException(
-                status_code=400,
-                detail="Document produced no chunks after processing",
-            )
 
-        logger.info("document_chunked", doc_id=doc_id, chunks_count=len(chunks))
+@router.get(
+    "/ingest/jobs/{job_id}",
+    response_model=IngestJobStatus,
+    responses={
+        401: {"model": IngestError, "description": "Authentication error"},
+        404: {"model": IngestError, "description": "Unknown job"},
+    },
+    summary="Get the status of an ingest job",
+)
+async def get_ingest_job(
+    job_id: str,
+    _: None = Depends(verify_api_key),
+) -> IngestJobStatus:
+    """Report stage, chunk counts, timings and errors for an ingest job."""
+    record = await get_ingest_job_queue().get(job_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail=f"Ingest job not found: {job_id}")
+    return IngestJobStatus(**record)
 
-        # Embed chunks
-        embedding_provider = get_embedding_provider()
-        chunk_texts = [chunk.text for chunk in chunks]
-        embeddings = await embedding_provider.embed_passages(chunk_texts)
 
-        logger.info("chunks_embedded", doc_id=doc_id, embeddings_count=len(embeddings))
+@router.delete(
+    "/tenants/{company_id}",
+    response_model=TenantDeleteResponse,
+    responses={
+        401: {"model": IngestError, "description": "Authentication error"},
+        503: {"model": IngestError, "description": "Knowledge base unavailable"},
+    },
+    summary="Delete all documents of a company",
+)
+async def delete_tenant(
+    company_id: str,
+    _: None = Depends(verify_api_key),
+) -> TenantDeleteResponse:
+    """Offboard a tenant.
 
-        # Store in Qdrant
-        vector_store = get_vector_store()
-        await vector_store.upsert_chunks(chunks, embeddings)
+    With RAG_TENANT_PARTITIONING=shards this drops the tenant's shard;
+    otherwise its chunks are deleted by company_id filter.
+    """
+    try:
+        method = await get_vector_store().delete_tenant(company_id)
+    except VectorStoreError as e:
+        raise HTTPException(status_code=503, detail="Knowledge base unavailable") from e
+    return TenantDeleteResponse(company_id=company_id, method=method)
 
-        logger.info(
-            "ingest_completed",
-            doc_id=doc_id,
-            filename=file.filename,
-            chunks_count=len(chunks),
-        )
 
-        return IngestResponse(
-            doc_id=doc_id,
-            chunks_count=len(chunks),
-            message=f"Successfully ingested {file.filename}",
-        )
+@router.post(
+    "/warmup",
+    response_model=WarmupResponse,
+    responses={
+        401: {"model": IngestError, "description": "Authentication error"},
+    },
+    summary="Pre-fill the search caches with a prompt list",
+)
+async def warmup_caches(
+    warmup_request: WarmupRequest | None = None,
+    _: None = Depends(verify_api_key),
+) -> WarmupResponse:
+    """Embed and search the warm-up prompts so their first real search is cached.
 
-    except Exception as e:
-        logger.error("ingest_failed", doc_id=doc_id, error=str(e))
-        raise HTTPException(
-            status_code=500,
-            detail=f"Failed to process document: {str(e)}",
-        ) from e
+    Uses RAG_WARMUP_PROMPTS_PATH unless prompts are given. Searches that fail
+    are counted, not raised, so a partial warm-up still returns 200.
+    """
+    warmup_request = warmup_request or WarmupRequest()
+    prompts = None
+    if warmup_request.prompts is not None:
+        prompts = [WarmupPrompt(p) for p in warmup_request.prompts]
+    stats = await get_cache_warmer().warm(warmup_request.company_ids, prompts)
+    return WarmupResponse(**stats)
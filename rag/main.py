@@ -3,6 +3,7 @@
 import time
 from collections.abc import AsyncGenerator
 from contextlib import asynccontextmanager
+from pathlib import Path
 from typing import Any
 
 from fastapi import FastAPI, Request, Response
@@ -11,11 +12,21 @@ from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
 from slowapi.util import get_remote_address
 
+from circuit_breaker import circuit_breaker_states
 from config import get_settings
+from embeddings import close_embedding_provider, get_passage_store, get_query_cache
+from embeddings.executor import shutdown_embedding_executor
+from ingest.jobs import get_ingest_job_queue, shutdown_ingest_job_queue
+from ingest.pipeline import shutdown_parse_executor
 from ingest.routes import router as ingest_router
+from metrics import get_metrics
 from middleware import RequestIDMiddleware, setup_logging
 from middleware.logging import get_logger
+from readiness import get_readiness_prober
+from search.rerank import shutdown_reranker
 from search.routes import router as search_router
+from search.store import close_vector_store
+from search.warmup import get_cache_warmer
 
 # Initialize settings and logging
 settings = get_settings()
@@ -43,9 +54,24 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     """Application lifespan manager for startup and shutdown."""
     logger.info("starting_rag_service", settings=settings.model_dump(exclude={"ingest_api_key", "gemini_api_key"}))
 
-    # Lazy initialization - resources are loaded on first request
-    # This allows the service to start quickly and report healthy
-    # while heavy resources (embedding model) load in background
+    # Resources are created lazily; the startup warm-up loads the embedding
+    # model and connects to Qdrant in the background so the service starts
+    # quickly and only reports ready once the first search will be fast
+    if settings.startup_warmup_enabled:
+        get_readiness_prober().start()
+
+    # Restore cached query embeddings so a restarted pod starts warm
+    query_cache = get_query_cache()
+    if query_cache is not None and settings.query_cache_path:
+        query_cache.load(settings.query_cache_path)
+
+    # Resume ingest jobs interrupted by the last shutdown
+    if settings.ingest_mode == "async" or Path(settings.ingest_jobs_path).exists():
+        await get_ingest_job_queue().start()
+
+    # Pre-fill the caches with the gallery prompts without delaying startup
+    if settings.warmup_on_startup:
+        get_cache_warmer().start()
 
     yield
 
@@ -53,6 +79,28 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     logger.info("shutting_down_rag_service")
     app_state.is_ready = False
 
+    await get_readiness_prober().close()
+    await get_cache_warmer().close()
+    await shutdown_ingest_job_queue()
+
+    # Release the Qdrant and embedding API connections
+    await close_vector_store()
+    await close_embedding_provider()
+
+    if query_cache is not None and settings.query_cache_path:
+        try:
+            query_cache.save(settings.query_cache_path)
+        except OSError as e:
+            logger.error("query_cache_save_failed", error=str(e))
+
+    passage_store = get_passage_store()
+    if passage_store is not None:
+        passage_store.close()
+
+    shutdown_embedding_executor()
+    shutdown_parse_executor()
+    shutdown_reranker()
+
 
 # Create FastAPI application
 app = FastAPI(
@@ -116,50 +164,42 @@ async def health_check() -> dict[str, str]:
 
 
 @app.get("/health/ready", tags=["Health"])
-async def readiness_check() -> dict[str, Any]:
+async def readiness_check(response: Response) -> dict[str, Any]:
     """Readiness probe - check if the service is ready to accept requests.
 
-    This endpoint checks:
-    - Embedding model is loaded (or can be loaded)
-    - Qdrant connection is available
+    Returns the state cached by the background readiness prober:
+    - Startup warm-up (model load, Qdrant connection) has finished
+    - Embedding model answers a probe query within the latency limit
+    - Qdrant connection is available within the latency limit
+
+    Responds 503 while not ready, so probes using curl -f fail. It also
+    reports the circuit breaker state of each remote dependency (closed,
+    open or half_open); checks against an open circuit fail without
+    waiting for a timeout.
 
     Use for Kubernetes/Docker readiness probes.
     """
-    from embeddings import get_embedding_provider
-    from search.store import get_vector_store
-
-    checks: dict[str, bool] = {}
-    all_ready = True
-
-    # Check embedding provider
-    try:
-        provider = get_embedding_provider()
-        # Test with a simple embedding (this will lazy-load the model)
-        _ = await provider.embed_query("test")
-        checks["embeddings"] = True
-    except Exception as e:
-        logger.error("readiness_check_embeddings_failed", error=str(e))
-        checks["embeddings"] = False
-        all_ready = False
-
-    # Check Qdrant connection
-    try:
-        store = get_vector_store()
-        await store.health_check()
-        checks["qdrant"] = True
-    except Exception as e:
-        logger.error("readiness_check_qdrant_failed", error=str(e))
-        checks["qdrant"] = False
-        all_ready = False
-
-    app_state.is_ready = all_ready
+    state = await get_readiness_prober().current()
+    app_state.is_ready = state["status"] == "ready"
+    if not app_state.is_ready:
+        response.status_code = 503
 
     return {
-        "status": "ready" if all_ready else "not_ready",
-        "checks": checks,
+        **state,
+        "circuits": circuit_breaker_states(),
     }
 
 
+@app.get("/metrics", tags=["Health"])
+async def service_metrics() -> dict[str, Any]:
+    """In-process service metrics.
+
+    Returns counters, gauges and recent-window latency histograms
+    (e.g. embedding batch sizes and wait times) as JSON.
+    """
+    return get_metrics().snapshot()
+
+
 # ======================
 # Include Routers
 # ======================
@@ -0,0 +1,134 @@
+"""In-process metrics registry for service observability.
+
+Counters, gauges and latency histograms are kept in memory and exposed as
+JSON via ``GET /metrics``. Histograms keep a bounded window of recent
+samples so percentiles reflect current behaviour rather than the whole
+process lifetime.
+"""
+
+import math
+import threading
+from collections import deque
+from typing import Any
+
+
+class Histogram:
+    """Sliding-window histogram of observed values."""
+
+    def __init__(self, window: int = 1024) -> None:
+        """Initialize the histogram.
+
+        Args:
+            window: Number of most recent samples kept for percentiles
+        """
+        self._samples: deque[float] = deque(maxlen=window)
+        self._count = 0
+        self._total = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        """Record a single observation."""
+        with self._lock:
+            self._samples.append(value)
+            self._count += 1
+            self._total += value
+
+    @property
+    def count(self) -> int:
+        """Total number of observations since startup."""
+        with self._lock:
+            return self._count
+
+    def percentile(self, q: float) -> float | None:
+        """Return the q-th percentile (0-100) of the recent window.
+
+        Returns:
+            Percentile value, or None if nothing has been observed yet
+        """
+        with self._lock:
+            if not self._samples:
+                return None
+            ordered = sorted(self._samples)
+        rank = max(0, math.ceil(q / 100 * len(ordered)) - 1)
+        return ordered[rank]
+
+    def snapshot(self) -> dict[str, Any]:
+        """Return a JSON-serializable summary of the histogram."""
+        with self._lock:
+            count = self._count
+            total = self._total
+            window_max = max(self._samples) if self._samples else None
+
+        return {
+            "count": count,
+            "mean": round(total / count, 3) if count else None,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "max": window_max,
+        }
+
+
+class MetricsRegistry:
+    """Thread-safe registry of named counters, gauges and histograms."""
+
+    def __init__(self) -> None:
+        """Initialize an empty registry."""
+        self._counters: dict[str, float] = {}
+        self._gauges: dict[str, float] = {}
+        self._histograms: dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def increment(self, name: str, value: float = 1) -> None:
+        """Increment a counter."""
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def set_gauge(self, name: str, value: float) -> None:
+        """Set a gauge to an absolute value."""
+        with self._lock:
+            self._gauges[name] = value
+
+    def histogram(self, name: str) -> Histogram:
+        """Get or create a histogram by name."""
+        with self._lock:
+            if name not in self._histograms:
+                self._histograms[name] = Histogram()
+            return self._histograms[name]
+
+    def observe(self, name: str, value: float) -> None:
+        """Record an observation in the named histogram."""
+        self.histogram(name).observe(value)
+
+    def counter(self, name: str) -> float:
+        """Return the current value of a counter (0 if never incremented)."""
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def snapshot(self) -> dict[str, Any]:
+        """Return all metrics as a JSON-serializable dictionary."""
+        with self._lock:
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+            histograms = dict(self._histograms)
+
+        return {
+            "counters": counters,
+            "gauges": gauges,
+            "histograms": {name: h.snapshot() for name, h in histograms.items()},
+        }
+
+    def reset(self) -> None:
+        """Clear all metrics (used by tests)."""
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._histograms.clear()
+
+
+_registry = MetricsRegistry()
+
+
+def get_metrics() -> MetricsRegistry:
+    """Get the process-wide metrics registry."""
+    return _registry
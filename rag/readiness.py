@@ -0,0 +1,239 @@
+"""Startup warm-up and cached readiness state.
+
+Resources are created lazily, so after a deploy the first real search paid
+for loading the embedding model, the first forward pass (kernel selection,
+memory allocation) and the Qdrant connection, while /health/ready already
+reported the pod as ready. Each readiness probe (every 15s per pod) also ran
+a fresh query embedding and a Qdrant call of its own.
+
+At startup the prober now warms the service in the background: it loads the
+model by embedding a dummy batch, opens the Qdrant connection and ensures
+the collection, and loads the rerank cross-encoder when reranking is
+enabled (a load inside a request would exceed the rerank budget). It then probes the dependencies periodically and caches the
+result, which /health/ready returns without doing any work. The service
+only reports ready once warm-up has finished and the probes are fast
+(RAG_READINESS_MAX_EMBEDDING_MS, RAG_READINESS_MAX_QDRANT_MS).
+
+Probes bypass the query and passage caches so they measure the model, not
+a cache hit, and leave no entries behind.
+"""
+
+import asyncio
+import time
+from collections.abc import Awaitable, Callable
+from functools import lru_cache
+from typing import Any
+
+from config import get_settings
+from embeddings.base import EmbeddingProvider
+from metrics import get_metrics
+from middleware.logging import get_logger
+
+logger = get_logger(__name__)
+
+PROBE_QUERY = "readiness probe"
+WARMUP_PASSAGE = "Warm-up passage used to initialize the embedding model."
+
+
+class ReadinessProber:
+    """Warms the service up and keeps a cached readiness state."""
+
+    def __init__(
+        self,
+        interval_sec: float,
+        timeout_sec: float,
+        max_embedding_ms: float,
+        max_qdrant_ms: float,
+        warmup_batch_size: int,
+        warm_up_reranker: bool = False,
+    ) -> None:
+        """Initialize the prober.
+
+        Args:
+            interval_sec: Time between background probes (also the maximum
+                age of a cached state when probing on demand)
+            timeout_sec: Timeout of each check
+            max_embedding_ms: Slowest probe embedding still ready (0 = no limit)
+            max_qdrant_ms: Slowest Qdrant probe still ready (0 = no limit)
+            warmup_batch_size: Dummy passages embedded during warm-up
+            warm_up_reranker: Also load the rerank cross-encoder during warm-up
+        """
+        self._interval_sec = interval_sec
+        self._timeout_sec = timeout_sec
+        self._limits_ms = {"embeddings": max_embedding_ms, "qdrant": max_qdrant_ms}
+        self._warmup_batch_size = warmup_batch_size
+        self._warm_up_reranker = warm_up_reranker
+        self._state: dict[str, Any] | None = None
+        self._checked_at = 0.0
+        self._task: asyncio.Task[None] | None = None
+
+    @property
+    def running(self) -> bool:
+        """Whether the background warm-up and probe loop is active."""
+        return self._task is not None and not self._task.done()
+
+    async def warm_up(self) -> float:
+        """Load the models and open the Qdrant connection.
+
+        Failures are logged and left to the probes to report.
+
+        Returns:
+            Warm-up duration in milliseconds
+        """
+        from search.rerank import get_reranker
+        from search.store import get_vector_store
+
+        started = time.perf_counter()
+        try:
+            await _embedding_provider().embed_passages([WARMUP_PASSAGE] * self._warmup_batch_size)
+        except Exception as e:
+            logger.warning("startup_warmup_embeddings_failed", error=str(e))
+        try:
+            # Connects and creates the collection (with its indexes) if missing
+            await get_vector_store().health_check()
+        except Exception as e:
+            logger.warning("startup_warmup_qdrant_failed", error=str(e))
+        if self._warm_up_reranker:
+            try:
+                await get_reranker().warm_up()
+            except Exception as e:
+                logger.warning("startup_warmup_rerank_failed", error=str(e))
+
+        duration_ms = round((time.perf_counter() - started) * 1000, 2)
+        get_metrics().observe("startup_warmup_ms", duration_ms)
+        logger.info("startup_warmup_completed", duration_ms=duration_ms)
+        return duration_ms
+
+    async def probe(self) -> dict[str, Any]:
+        """Check every dependency and cache the resulting state.
+
+        Returns:
+            Readiness state (status, checks, latency_ms, checked_at)
+        """
+        from search.store import get_vector_store
+
+        provider = _embedding_provider()
+        store = get_vector_store()
+        results = await asyncio.gather(
+            self._check("embeddings", lambda: provider.embed_query(PROBE_QUERY)),
+            self._check("qdrant", store.health_check),
+        )
+        checks = {name: ok for name, ok, _ in results}
+        latency_ms = {name: ms for name, _, ms in results}
+        slow = [
+            name
+            for name, ms in latency_ms.items()
+            if checks[name] and self._limits_ms[name] and ms > self._limits_ms[name]
+        ]
+
+        status = "ready" if all(checks.values()) and not slow else "not_ready"
+
+        state: dict[str, Any] = {
+            "status": status,
+            "checks": checks,
+            "latency_ms": latency_ms,
+            "checked_at": round(time.time(), 3),
+        }
+        if slow:
+            state["slow"] = slow
+            logger.warning("readiness_probe_slow", checks=slow, latency_ms=latency_ms)
+
+        previous = self._state["status"] if self._state is not None else None
+        if status != previous:
+            logger.info("readiness_changed", previous=previous, status=status)
+        self._state = state
+        self._checked_at = time.monotonic()
+        get_metrics().set_gauge("service_ready", 1 if status == "ready" else 0)
+        return state
+
+    async def current(self) -> dict[str, Any]:
+        """Return the cached readiness state.
+
+        Without the background loop (startup warm-up disabled) the state is
+        probed on demand, at most once per interval.
+
+        Returns:
+            Readiness state
+        """
+        if self.running:
+            if self._state is None:
+                # Warm-up has not finished yet
+                return {"status": "warming_up", "checks": {}, "latency_ms": {}, "checked_at": None}
+            return self._state
+        if self._state is None or time.monotonic() - self._checked_at >= self._interval_sec:
+            return await self.probe()
+        return self._state
+
+    def start(self) -> None:
+        """Warm up and probe in the background (service startup)."""
+        if not self.running:
+            self._state = None
+            self._task = asyncio.ensure_future(self._run())
+
+    async def close(self) -> None:
+        """Stop the background loop."""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    async def _run(self) -> None:
+        """Warm up, then probe every interval."""
+        await self.warm_up()
+        while True:
+            try:
+                await self.probe()
+            except Exception as e:
+                logger.error("readiness_probe_failed", error=str(e))
+            await asyncio.sleep(self._interval_sec)
+
+    async def _check(
+        self,
+        name: str,
+        call: Callable[[], Awaitable[Any]],
+    ) -> tuple[str, bool, float]:
+        """Run one check with the probe timeout.
+
+        Returns:
+            Tuple of (name, passed, latency in milliseconds)
+        """
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(call(), timeout=self._timeout_sec)
+            ok = True
+        except Exception as e:
+            logger.error(f"readiness_check_{name}_failed", error=str(e) or type(e).__name__)
+            ok = False
+        return name, ok, round((time.perf_counter() - started) * 1000, 2)
+
+
+def _embedding_provider() -> EmbeddingProvider:
+    """Return the embedding provider without its query and passage caches."""
+    from embeddings import get_embedding_provider
+    from embeddings.cache import CachedEmbeddingProvider
+
+    provider = get_embedding_provider()
+    if isinstance(provider, CachedEmbeddingProvider):
+        return provider.provider
+    return provider
+
+
+@lru_cache
+def get_readiness_prober() -> ReadinessProber:
+    """Get the readiness prober (cached singleton).
+
+    Returns:
+        ReadinessProber configured from settings
+    """
+    settings = get_settings()
+    return ReadinessProber(
+        interval_sec=settings.readiness_probe_interval_sec,
+        timeout_sec=settings.readiness_probe_timeout_sec,
+        max_embedding_ms=settings.readiness_max_embedding_ms,
+        max_qdrant_ms=settings.readiness_max_qdrant_ms,
+        warmup_batch_size=settings.startup_warmup_batch_size,
+        warm_up_reranker=settings.rerank_enabled,
+    )
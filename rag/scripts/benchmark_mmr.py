@@ -0,0 +1,52 @@
+"""Latency check for MMR diversification over search candidates.
+
+Runs search.mmr.mmr_select on random unit vectors shaped like real search
+candidates (top_k * RAG_MMR_OVERSAMPLE rows of the embedding dimension)
+and reports p50/p95 latency, so the extra step can be checked against
+the search latency budget.
+
+Usage (from the rag/ directory):
+    python scripts/benchmark_mmr.py
+    python scripts/benchmark_mmr.py --candidates 100 --dim 768 --top-k 10
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from search.mmr import mmr_select  # noqa: E402
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--candidates", type=int, default=100)
+    parser.add_argument("--dim", type=int, default=384, help="Embedding dimension")
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--lambda-mult", type=float, default=0.5)
+    parser.add_argument("--repeat", type=int, default=200, help="Timed runs")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    candidates = rng.normal(size=(args.candidates, args.dim)).astype(np.float32)
+    relevance = rng.random(args.candidates).astype(np.float32)
+
+    mmr_select(relevance, candidates, args.top_k, args.lambda_mult)
+    timings_ms = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        mmr_select(relevance, candidates, args.top_k, args.lambda_mult)
+        timings_ms.append((time.perf_counter() - start) * 1000)
+
+    p50, p95 = np.percentile(timings_ms, [50, 95])
+    print(f"candidates x dim: {args.candidates} x {args.dim}, top_k {args.top_k}")
+    print(f"mmr p50/p95:      {p50:.3f} / {p95:.3f} ms over {args.repeat} runs")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
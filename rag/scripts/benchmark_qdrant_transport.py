@@ -0,0 +1,141 @@
+"""REST vs gRPC (vs embedded) transport benchmark for Qdrant.
+
+Creates a scratch collection per transport, upserts random vectors in
+batches of 100 (as ingest does) and then runs single-vector searches with
+the requested concurrency. Reports upsert throughput and search
+p50/p99 for each transport, using the same client options as the
+service (pool limits, keep-alive, timeouts from RAG_* settings). The
+"embedded" transport runs qdrant-client's in-process local mode in memory
+and needs no server.
+
+Usage (from the rag/ directory, Qdrant on localhost:6333/6334):
+    python scripts/benchmark_qdrant_transport.py
+    python scripts/benchmark_qdrant_transport.py --points 20000 --searches 2000 --concurrency 16
+    python scripts/benchmark_qdrant_transport.py --transports rest,grpc,embedded
+    python scripts/benchmark_qdrant_transport.py --transports embedded  # no server needed
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+import uuid
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from qdrant_client import AsyncQdrantClient  # noqa: E402
+from qdrant_client.http import models  # noqa: E402
+
+from config import get_settings  # noqa: E402
+from search.store import _client_options  # noqa: E402
+
+BATCH_SIZE = 100
+
+
+TRANSPORTS = ("rest", "grpc", "embedded")
+
+
+async def _bench_transport(args: argparse.Namespace, transport: str) -> dict[str, float]:
+    """Run the upsert and search benchmark over one transport."""
+    settings = get_settings()
+    if transport == "embedded":
+        options = _client_options(settings.model_copy(update={"qdrant_url": ":memory:"}))
+    else:
+        options = _client_options(settings, prefer_grpc=transport == "grpc")
+        if args.url:
+            options["url"] = args.url
+    client = AsyncQdrantClient(**options)
+    collection = f"bench_transport_{transport}_{uuid.uuid4().hex[:8]}"
+
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(args.points, args.dim)).astype(np.float32)
+    queries = rng.normal(size=(args.searches, args.dim)).astype(np.float32)
+
+    await client.create_collection(
+        collection_name=collection,
+        vectors_config=models.VectorParams(size=args.dim, distance=models.Distance.COSINE),
+    )
+    try:
+        start = time.perf_counter()
+        for i in range(0, args.points, BATCH_SIZE):
+            await client.upsert(
+                collection_name=collection,
+                points=[
+                    models.PointStruct(
+                        id=j,
+                        vector=vectors[j].tolist(),
+                        payload={"text": f"chunk {j} " * 40, "source": "bench.md"},
+                    )
+                    for j in range(i, min(i + BATCH_SIZE, args.points))
+                ],
+                wait=True,
+            )
+        upsert_pps = args.points / (time.perf_counter() - start)
+
+        semaphore = asyncio.Semaphore(args.concurrency)
+        latencies_ms: list[float] = []
+
+        async def one_search(query: np.ndarray) -> None:
+            async with semaphore:
+                began = time.perf_counter()
+                await client.search(
+                    collection_name=collection,
+                    query_vector=query.tolist(),
+                    limit=args.top_k,
+                    with_payload=True,
+                )
+                latencies_ms.append((time.perf_counter() - began) * 1000)
+
+        # Warm up connections before timing
+        await asyncio.gather(*(one_search(q) for q in queries[: args.concurrency]))
+        latencies_ms.clear()
+        await asyncio.gather(*(one_search(q) for q in queries))
+
+        p50, p99 = np.percentile(latencies_ms, [50, 99])
+        return {"upsert_pps": upsert_pps, "search_p50_ms": p50, "search_p99_ms": p99}
+    finally:
+        await client.delete_collection(collection)
+        await client.close()
+
+
+async def _run(args: argparse.Namespace) -> int:
+    results = {transport: await _bench_transport(args, transport) for transport in args.transports}
+
+    print(f"points x dim: {args.points} x {args.dim}, searches {args.searches} @ {args.concurrency}")
+    for transport, stats in results.items():
+        print(
+            f"{transport:8s} upsert {stats['upsert_pps']:9.1f} points/s   "
+            f"search p50 {stats['search_p50_ms']:7.2f} ms   p99 {stats['search_p99_ms']:7.2f} ms"
+        )
+    if "rest" in results and "grpc" in results:
+        speedup = results["grpc"]["upsert_pps"] / results["rest"]["upsert_pps"]
+        print(f"grpc/rest upsert throughput: {speedup:.2f}x")
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default=None, help="Qdrant URL (defaults to RAG_QDRANT_URL)")
+    parser.add_argument("--points", type=int, default=5000)
+    parser.add_argument("--dim", type=int, default=384, help="Embedding dimension")
+    parser.add_argument("--searches", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument(
+        "--transports",
+        type=lambda value: value.split(","),
+        default=["rest", "grpc"],
+        help=f"Comma-separated subset of {','.join(TRANSPORTS)}",
+    )
+    args = parser.parse_args()
+    unknown = set(args.transports) - set(TRANSPORTS)
+    if unknown:
+        parser.error(f"unknown transports: {', '.join(sorted(unknown))}")
+    return asyncio.run(_run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+"""Parity and throughput check: sentence-transformers (torch) vs ONNX Runtime.
+
+Embeds the same texts with both local backends (using the E5 query/passage
+prefixes exactly as the service does) and fails if any pair of vectors
+falls below the cosine-similarity threshold. Also reports texts/second for
+each backend so the switch can be justified with numbers.
+
+Usage (from the rag/ directory, with the onnx extra installed):
+    python scripts/compare_embedding_backends.py
+    python scripts/compare_embedding_backends.py --quantize --threshold 0.98
+    python scripts/compare_embedding_backends.py --texts-file corpus.txt --repeat 5
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from embeddings.local import LocalEmbeddingProvider, _load_model  # noqa: E402
+from embeddings.onnx_runtime import _load_onnx_model  # noqa: E402
+
+SAMPLE_TEXTS = [
+    "How does the authentication service issue and refresh JWT tokens?",
+    "The API gateway routes requests to the order and payment microservices.",
+    "Kafka topics decouple the inventory service from downstream consumers.",
+    "PostgreSQL is the system of record; Redis caches session state.",
+    "user login flow",
+    "sequence diagram for checkout with retries",
+    "Glossary: SLA - Service Level Agreement between provider and customer.",
+    "Deployments run on Kubernetes with horizontal pod autoscaling enabled.",
+]
+
+
+def _throughput(encode, texts: list[str], repeat: int) -> float:
+    """Return texts/second for an encode callable (after one warm-up run)."""
+    encode(texts)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        encode(texts)
+    return len(texts) * repeat / (time.perf_counter() - start)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default="intfloat/e5-small-v2")
+    parser.add_argument("--onnx-model-path", default=None)
+    parser.add_argument("--quantize", action="store_true", help="Compare the int8 ONNX model")
+    parser.add_argument("--threshold", type=float, default=0.99, help="Minimum cosine similarity")
+    parser.add_argument("--texts-file", type=Path, help="One text per line (defaults to built-ins)")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--repeat", type=int, default=3, help="Timed passes per backend")
+    args = parser.parse_args()
+
+    texts = SAMPLE_TEXTS
+    if args.texts_file:
+        texts = [line.strip() for line in args.texts_file.read_text().splitlines() if line.strip()]
+
+    prefixed = [f"{LocalEmbeddingProvider.QUERY_PREFIX}{t}" for t in texts]
+    prefixed += [f"{LocalEmbeddingProvider.PASSAGE_PREFIX}{t}" for t in texts]
+
+    cache_dir = str(Path(__file__).resolve().parent.parent / "models")
+    torch_model = _load_model(args.model, cache_dir)
+    onnx_model = _load_onnx_model(args.model, cache_dir, args.onnx_model_path, args.quantize)
+
+    def torch_encode(batch: list[str]) -> np.ndarray:
+        return torch_model.encode(
+            batch, normalize_embeddings=True, batch_size=args.batch_size, show_progress_bar=False
+        )
+
+    def onnx_encode(batch: list[str]) -> np.ndarray:
+        return onnx_model.encode(batch, normalize_embeddings=True, batch_size=args.batch_size)
+
+    reference = torch_encode(prefixed)
+    candidate = onnx_encode(prefixed)
+    # Both sides are L2-normalized, so the row-wise dot product is the cosine
+    cosines = np.sum(reference * candidate, axis=1)
+
+    torch_tps = _throughput(torch_encode, prefixed, args.repeat)
+    onnx_tps = _throughput(onnx_encode, prefixed, args.repeat)
+
+    backend = "onnx-int8" if args.quantize else "onnx-fp32"
+    print(f"texts compared:   {len(prefixed)}")
+    print(f"cosine min/mean:  {cosines.min():.5f} / {cosines.mean():.5f} (threshold {args.threshold})")
+    print(f"torch throughput: {torch_tps:8.1f} texts/s")
+    print(f"{backend} throughput: {onnx_tps:8.1f} texts/s ({onnx_tps / torch_tps:.2f}x)")
+
+    failures = [text for text, cos in zip(prefixed, cosines, strict=True) if cos < args.threshold]
+    for text in failures:
+        print(f"BELOW THRESHOLD: {text[:80]}")
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
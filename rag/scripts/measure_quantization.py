@@ -0,0 +1,190 @@
+"""Memory and recall@k of Qdrant quantization modes (none / scalar / binary).
+
+For each mode, creates a scratch collection configured exactly as the
+service does (quantized vectors in RAM, originals on disk), loads the same
+vectors, waits for indexing and then compares search results against an
+exact NumPy brute-force top-k. Recall is reported with and without
+rescoring. Memory is Qdrant's resident set growth while the collection is
+loaded (from its Prometheus /metrics) next to the expected in-RAM vector
+bytes.
+
+Vectors are random unit vectors by default; pass --vectors-file with an
+.npy array of real chunk embeddings for representative recall numbers.
+
+Usage (from the rag/ directory, Qdrant on localhost:6333):
+    python scripts/measure_quantization.py
+    python scripts/measure_quantization.py --vectors-file chunks.npy --queries 500 --top-k 10
+"""
+
+import argparse
+import asyncio
+import re
+import sys
+import time
+import uuid
+from pathlib import Path
+
+import httpx
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from qdrant_client import AsyncQdrantClient  # noqa: E402
+from qdrant_client.http import models  # noqa: E402
+
+from config import get_settings  # noqa: E402
+from search.store import _client_options, _quantization_config  # noqa: E402
+
+MODES = ("none", "scalar", "binary")
+BATCH_SIZE = 256
+# Bytes per dimension of the vectors kept in RAM
+RAM_BYTES_PER_DIM = {"none": 4.0, "scalar": 1.0, "binary": 1 / 8}
+
+
+async def _resident_bytes(url: str) -> float | None:
+    """Read Qdrant's resident memory from its Prometheus metrics."""
+    try:
+        async with httpx.AsyncClient(base_url=url, timeout=5) as http:
+            text = (await http.get("/metrics")).text
+    except httpx.HTTPError:
+        return None
+    match = re.search(r"^memory_resident_bytes (\S+)$", text, re.MULTILINE)
+    return float(match.group(1)) if match else None
+
+
+async def _wait_indexed(client: AsyncQdrantClient, collection: str, timeout: float = 300) -> None:
+    """Wait until the optimizer has built the HNSW (and quantized) index."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        info = await client.get_collection(collection)
+        if info.status == models.CollectionStatus.GREEN and (info.indexed_vectors_count or 0) > 0:
+            return
+        await asyncio.sleep(1)
+    raise TimeoutError(f"{collection} was not indexed within {timeout}s")
+
+
+async def _measure_mode(
+    client: AsyncQdrantClient,
+    url: str,
+    mode: str,
+    vectors: np.ndarray,
+    queries: np.ndarray,
+    exact: np.ndarray,
+    args: argparse.Namespace,
+) -> dict[str, float | None]:
+    settings = get_settings()
+    collection = f"bench_quantization_{mode}_{uuid.uuid4().hex[:8]}"
+    quantization = _quantization_config(mode)
+    before = await _resident_bytes(url)
+
+    await client.create_collection(
+        collection_name=collection,
+        vectors_config=models.VectorParams(
+            size=vectors.shape[1],
+            distance=models.Distance.COSINE,
+            on_disk=quantization is not None and settings.qdrant_vectors_on_disk,
+        ),
+        quantization_config=quantization,
+        optimizers_config=models.OptimizersConfigDiff(indexing_threshold=1000),
+    )
+    try:
+        for i in range(0, len(vectors), BATCH_SIZE):
+            await client.upsert(
+                collection_name=collection,
+                points=models.Batch(
+                    ids=list(range(i, min(i + BATCH_SIZE, len(vectors)))),
+                    vectors=vectors[i : i + BATCH_SIZE].tolist(),
+                ),
+                wait=True,
+            )
+        await _wait_indexed(client, collection)
+        after = await _resident_bytes(url)
+
+        recall = {}
+        for rescore in (True, False):
+            params = (
+                models.SearchParams(
+                    quantization=models.QuantizationSearchParams(
+                        rescore=rescore,
+                        oversampling=args.oversampling,
+                    )
+                )
+                if quantization is not None
+                else None
+            )
+            responses = await client.search_batch(
+                collection_name=collection,
+                requests=[
+                    models.SearchRequest(vector=q.tolist(), limit=args.top_k, params=params)
+                    for q in queries
+                ],
+            )
+            hits = [
+                len({p.id for p in points} & set(expected.tolist()))
+                for points, expected in zip(responses, exact, strict=True)
+            ]
+            recall[rescore] = sum(hits) / (len(queries) * args.top_k)
+
+        return {
+            "expected_ram_mb": len(vectors) * vectors.shape[1] * RAM_BYTES_PER_DIM[mode] / 2**20,
+            "resident_delta_mb": (after - before) / 2**20 if before and after else None,
+            "recall_rescored": recall[True],
+            "recall_raw": recall[False],
+        }
+    finally:
+        await client.delete_collection(collection)
+
+
+async def _run(args: argparse.Namespace) -> int:
+    rng = np.random.default_rng(0)
+    if args.vectors_file:
+        vectors = np.load(args.vectors_file).astype(np.float32)
+    else:
+        vectors = rng.normal(size=(args.points, args.dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    query_idx = rng.choice(len(vectors), size=min(args.queries, len(vectors)), replace=False)
+    # Perturbed copies of stored vectors behave like queries near real chunks
+    queries = vectors[query_idx] + rng.normal(scale=0.05, size=(len(query_idx), vectors.shape[1]))
+    queries = (queries / np.linalg.norm(queries, axis=1, keepdims=True)).astype(np.float32)
+    exact = np.argsort(-(queries @ vectors.T), axis=1)[:, : args.top_k]
+
+    settings = get_settings()
+    options = _client_options(settings)
+    if args.url:
+        options["url"] = args.url
+    client = AsyncQdrantClient(**options)
+    try:
+        print(
+            f"vectors: {len(vectors)} x {vectors.shape[1]}, queries: {len(queries)}, "
+            f"recall@{args.top_k}, oversampling {args.oversampling}"
+        )
+        for mode in MODES:
+            stats = await _measure_mode(client, options["url"], mode, vectors, queries, exact, args)
+            resident = stats["resident_delta_mb"]
+            resident_text = f"+{resident:8.1f} MB" if resident is not None else "     n/a   "
+            print(
+                f"{mode:7s} vectors in RAM {stats['expected_ram_mb']:8.1f} MB   "
+                f"qdrant RSS {resident_text}   "
+                f"recall rescored {stats['recall_rescored']:.4f}   raw {stats['recall_raw']:.4f}"
+            )
+    finally:
+        await client.close()
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default=None, help="Qdrant URL (defaults to RAG_QDRANT_URL)")
+    parser.add_argument("--points", type=int, default=50000)
+    parser.add_argument("--dim", type=int, default=384, help="Embedding dimension")
+    parser.add_argument("--vectors-file", type=Path, help=".npy array of embeddings (n x dim)")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--oversampling", type=float, default=2.0)
+    args = parser.parse_args()
+    return asyncio.run(_run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
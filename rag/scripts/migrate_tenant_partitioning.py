@@ -0,0 +1,111 @@
+"""Copy a collection into a new one with a tenant partitioning layout.
+
+Custom sharding is fixed when a collection is created, so moving the
+existing single-graph collection to RAG_TENANT_PARTITIONING=shards (or
+starting fresh with payload partitioning) means copying its points into
+a new collection. Points keep their IDs, payloads and vectors; each one is
+routed to its company's shard. Chunks without a BM25 sparse vector get one
+computed from their text, so the copy also supports sparse/hybrid search.
+
+The source collection is left untouched. After verifying the counts,
+point the service at the new collection and restart:
+
+    RAG_QDRANT_COLLECTION=<target> RAG_TENANT_PARTITIONING=<mode>
+
+Usage (from the rag/ directory):
+    python scripts/migrate_tenant_partitioning.py --target archigram_v2 --mode shards
+    python scripts/migrate_tenant_partitioning.py --source archigram_v1 --target archigram_v2 \\
+        --mode payload --batch-size 512
+"""
+
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from qdrant_client.http import models  # noqa: E402
+
+from config import get_settings  # noqa: E402
+from search.store import SPARSE_VECTOR_NAME, QdrantVectorStore  # noqa: E402
+
+
+async def _run(args: argparse.Namespace) -> int:
+    settings = get_settings()
+    source = args.source or settings.qdrant_collection
+    if source == args.target:
+        print("source and target collections must differ")
+        return 2
+
+    target_store = QdrantVectorStore(
+        settings.model_copy(
+            update={"qdrant_collection": args.target, "tenant_partitioning": args.mode}
+        )
+    )
+    # Creates the target collection with the requested layout
+    client = await target_store._get_client()
+    if target_store.partitioning != args.mode:
+        print(f"{args.target} already exists with partitioning {target_store.partitioning!r}")
+        return 2
+
+    copied = 0
+    offset = None
+    try:
+        while True:
+            records, offset = await client.scroll(
+                collection_name=source,
+                limit=args.batch_size,
+                offset=offset,
+                with_payload=True,
+                with_vectors=True,
+            )
+            points = []
+            for record in records:
+                vector = record.vector
+                if not isinstance(vector, dict):
+                    vector = {"": vector}
+                if target_store.sparse_enabled and SPARSE_VECTOR_NAME not in vector:
+                    vector[SPARSE_VECTOR_NAME] = target_store._bm25.encode_document(
+                        (record.payload or {}).get("text", "")
+                    )
+                elif not target_store.sparse_enabled:
+                    vector = vector[""]
+                points.append(models.PointStruct(id=record.id, vector=vector, payload=record.payload))
+
+            await target_store._upsert_points(client, points)
+            copied += len(points)
+            print(f"copied {copied} points", end="\r")
+            if offset is None:
+                break
+
+        source_count = (await client.count(collection_name=source, exact=True)).count
+        target_count = (await client.count(collection_name=args.target, exact=True)).count
+    finally:
+        await target_store.close()
+
+    print(f"copied {copied} points from {source} to {args.target} ({args.mode})")
+    print(f"points: source {source_count}, target {target_count}")
+    if target_count < source_count:
+        print("target has fewer points than the source; do not switch yet")
+        return 1
+
+    print(
+        f"next: set RAG_QDRANT_COLLECTION={args.target} RAG_TENANT_PARTITIONING={args.mode}, "
+        f"restart, then delete {source} once searches look right"
+    )
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--source", default=None, help="Source collection (RAG_QDRANT_COLLECTION)")
+    parser.add_argument("--target", required=True, help="New collection to create")
+    parser.add_argument("--mode", choices=["none", "payload", "shards"], default="shards")
+    parser.add_argument("--batch-size", type=int, default=256)
+    args = parser.parse_args()
+    return asyncio.run(_run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,61 @@
+"""End-to-end deadline for one search request.
+
+Applying search_timeout_sec separately to embedding and to Qdrant let a
+search run for twice the timeout, long after the frontend (RAG_TIMEOUT_MS)
+had given up and the work was wasted. A Deadline is fixed when the request
+arrives, from the client's X-Deadline-Ms header capped at
+search_timeout_sec, and every stage times out against what is left of it:
+embedding may use a share of it, Qdrant the rest, and rerank/MMR are
+skipped when too little remains.
+"""
+
+import time
+
+from config import Settings
+
+# Smallest budget a request gets, even when the client's deadline is shorter
+# than the response margin: enough to answer from a cache, where a zero
+# budget would time out every stage before it starts
+MIN_BUDGET_MS = 10.0
+
+
+class Deadline:
+    """Monotonic point in time by which a request must be answered."""
+
+    def __init__(self, budget_sec: float) -> None:
+        """Start the deadline.
+
+        Args:
+            budget_sec: Seconds from now until the deadline
+        """
+        self.budget_sec = max(budget_sec, 0.0)
+        self._expires_at = time.monotonic() + self.budget_sec
+
+    @classmethod
+    def for_request(cls, settings: Settings, client_budget_ms: float | None = None) -> "Deadline":
+        """Build the deadline of a search request.
+
+        Args:
+            settings: Application settings
+            client_budget_ms: Time the client will wait (X-Deadline-Ms), if sent
+
+        Returns:
+            Deadline of the client budget capped at search_timeout_sec, minus
+            the margin for returning the response (at least MIN_BUDGET_MS)
+        """
+        budget_ms: float = settings.search_timeout_sec * 1000
+        if client_budget_ms is not None:
+            budget_ms = min(budget_ms, client_budget_ms)
+        return cls(max(budget_ms - settings.search_deadline_margin_ms, MIN_BUDGET_MS) / 1000)
+
+    def remaining(self) -> float:
+        """Seconds left until the deadline (0 once it has passed)."""
+        return max(self._expires_at - time.monotonic(), 0.0)
+
+    def remaining_ms(self) -> float:
+        """Milliseconds left until the deadline (0 once it has passed)."""
+        return self.remaining() * 1000
+
+    def share(self, fraction: float) -> float:
+        """Timeout for a stage allowed a fraction of the remaining time."""
+        return self.remaining() * fraction
@@ -0,0 +1,106 @@
+"""Maximal Marginal Relevance (MMR) diversification of search results.
+
+RecursiveSplitter emits overlapping windows, so plain top-k retrieval
+often returns several neighbouring chunks of the same section and wastes
+the prompt budget. MMR picks each next result by
+
+    lambda * relevance(c) - (1 - lambda) * max_similarity(c, selected)
+
+Candidate vectors come back from Qdrant with the search (with_vectors).
+All similarities are computed up front as one matrix product; each of the
+k selection steps is then a handful of vector operations over the
+candidate set, with no per-candidate Python loop.
+"""
+
+from typing import Any
+
+import numpy as np
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.clip(norms, 1e-12, None)
+
+
+def mmr_select(
+    relevance: np.ndarray,
+    candidates: np.ndarray,
+    k: int,
+    lambda_mult: float = 0.5,
+) -> list[int]:
+    """Select k diverse, relevant candidates.
+
+    Args:
+        relevance: Relevance of each candidate to the query, shape (n,)
+        candidates: Candidate vectors, shape (n, d)
+        k: Number of candidates to select
+        lambda_mult: 1.0 = pure relevance, 0.0 = pure diversity
+
+    Returns:
+        Indices of the selected candidates in selection order
+    """
+    n = len(relevance)
+    k = min(k, n)
+    if k <= 0:
+        return []
+
+    unit = _normalize_rows(np.asarray(candidates, dtype=np.float32))
+    similarity = unit @ unit.T
+    relevance = np.asarray(relevance, dtype=np.float32)
+
+    selected = [int(np.argmax(relevance))]
+    available = np.ones(n, dtype=bool)
+    available[selected[0]] = False
+    max_similarity = similarity[selected[0]].copy()
+
+    for _ in range(k - 1):
+        scores = lambda_mult * relevance - (1 - lambda_mult) * max_similarity
+        scores[~available] = -np.inf
+        chosen = int(np.argmax(scores))
+        selected.append(chosen)
+        available[chosen] = False
+        np.maximum(max_similarity, similarity[chosen], out=max_similarity)
+
+    return selected
+
+
+def diversify(
+    results: list[dict[str, Any]],
+    top_k: int,
+    lambda_mult: float,
+    query_embedding: list[float] | None = None,
+) -> list[dict[str, Any]]:
+    """Reduce search results to a diverse top_k with MMR.
+
+    Relevance is the cosine similarity to the query embedding when one is
+    available; otherwise (sparse results, reranked results) the result
+    order's own scores are min-max scaled to [0, 1].
+
+    Args:
+        results: Candidates carrying a dense "vector"
+        top_k: Number of results to return
+        lambda_mult: Relevance/diversity trade-off
+        query_embedding: Query vector used for dense relevance
+
+    Returns:
+        Up to top_k results in MMR selection order
+    """
+    candidates = [r for r in results if r.get("vector")]
+    if len(candidates) <= top_k:
+        return results[:top_k]
+
+    vectors = np.asarray([r["vector"] for r in candidates], dtype=np.float32)
+
+    if query_embedding is not None and not any("rerank_score" in r for r in candidates):
+        query = _normalize_rows(np.asarray(query_embedding, dtype=np.float32))
+        relevance = _normalize_rows(vectors) @ query
+    else:
+        raw = np.asarray(
+            [r.get("rerank_score", r["score"]) for r in candidates],
+            dtype=np.float32,
+        )
+        spread = float(raw.max() - raw.min())
+        relevance = (raw - raw.min()) / spread if spread > 0 else np.ones_like(raw)
+
+    order = mmr_select(relevance, vectors, top_k, lambda_mult)
+    return [candidates[i] for i in order]
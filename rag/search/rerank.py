@@ -0,0 +1,286 @@
+"""Cross-encoder reranking of vector search candidates.
+
+Vector similarity orders candidates well enough to find them but not to
+rank them: weak chunks still pad the prompt. When reranking is enabled,
+search fetches top_k * RAG_RERANK_OVERSAMPLE candidates, scores each
+(query, chunk) pair with a small local cross-encoder and keeps the best
+top_k.
+
+Reranking runs on its own CPU thread under a hard per-request budget
+(RAG_RERANK_BUDGET_MS). If scoring does not finish in time, the request
+gets the vector order instead of waiting, and work that has not started
+by its deadline is skipped rather than queued behind newer requests.
+Loading the model takes far longer than the budget, so the startup
+warm-up loads it when reranking is enabled; otherwise the first searches
+of every pod would fall back to vector order.
+
+Backends:
+- torch (default): sentence-transformers CrossEncoder
+- onnx: ONNX Runtime session over the model's hub ONNX export
+  (requires the onnx extra)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from config import get_settings
+from metrics import get_metrics
+from middleware.logging import get_logger
+
+logger = get_logger(__name__)
+
+ScoreFn = Callable[[str, list[str]], list[float]]
+
+WARMUP_QUERY = "rerank warm-up"
+WARMUP_PASSAGE = "Warm-up passage used to load the cross-encoder."
+
+
+class _DeadlineExpired(Exception):
+    """Raised in the rerank thread when a job starts after its deadline."""
+
+
+class OnnxCrossEncoder:
+    """Minimal cross-encoder exposing the CrossEncoder.predict API on ONNX Runtime."""
+
+    def __init__(self, session: Any, tokenizer: Any) -> None:
+        """Initialize the cross-encoder.
+
+        Args:
+            session: onnxruntime.InferenceSession returning relevance logits
+            tokenizer: tokenizers.Tokenizer with padding/truncation enabled
+        """
+        self._session = session
+        self._tokenizer = tokenizer
+        self._input_names = {i.name for i in session.get_inputs()}
+
+    def predict(
+        self,
+        pairs: list[tuple[str, str]],
+        batch_size: int = 32,
+        show_progress_bar: bool = False,
+    ) -> np.ndarray:
+        """Score (query, passage) pairs.
+
+        Args:
+            pairs: Query/passage pairs
+            batch_size: Pairs per ONNX Runtime call
+            show_progress_bar: Accepted for API compatibility; ignored
+
+        Returns:
+            1-D array of relevance logits
+        """
+        scores = []
+        for i in range(0, len(pairs), batch_size):
+            encodings = self._tokenizer.encode_batch(pairs[i : i + batch_size])
+            feeds = {
+                "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+                "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+            }
+            if "token_type_ids" in self._input_names:
+                feeds["token_type_ids"] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+            scores.append(self._session.run(None, feeds)[0].reshape(-1))
+        return np.concatenate(scores) if scores else np.zeros(0, dtype=np.float32)
+
+
+@lru_cache(maxsize=1)
+def _load_cross_encoder(
+    model_name: str,
+    backend: str,
+    cache_dir: str | None = None,
+    max_length: int = 512,
+) -> Any:
+    """Load the cross-encoder (cached singleton).
+
+    Args:
+        model_name: HuggingFace model name
+        backend: "torch" or "onnx"
+        cache_dir: Optional cache directory for model files
+        max_length: Maximum tokens per (query, passage) pair
+
+    Returns:
+        Model exposing CrossEncoder.predict
+    """
+    logger.info("loading_rerank_model", model=model_name, backend=backend)
+
+    if backend == "onnx":
+        from huggingface_hub import snapshot_download
+
+        from embeddings.onnx_runtime import HUB_ONNX_FILE, _get_onnx_modules
+
+        onnxruntime, Tokenizer = _get_onnx_modules()
+        repo_dir = Path(
+            snapshot_download(
+                model_name,
+                cache_dir=cache_dir,
+                allow_patterns=["tokenizer.json", HUB_ONNX_FILE],
+            )
+        )
+        tokenizer = Tokenizer.from_file(str(repo_dir / "tokenizer.json"))
+        tokenizer.enable_truncation(max_length=max_length)
+        tokenizer.enable_padding()
+        session = onnxruntime.InferenceSession(
+            str(repo_dir / HUB_ONNX_FILE),
+            providers=["CPUExecutionProvider"],
+        )
+        return OnnxCrossEncoder(session, tokenizer)
+
+    from sentence_transformers import CrossEncoder
+
+    return CrossEncoder(model_name, max_length=max_length, device="cpu", cache_folder=cache_dir)
+
+
+class Reranker:
+    """Reorders search results by cross-encoder relevance within a time budget."""
+
+    def __init__(self, score_fn: ScoreFn, budget_ms: float) -> None:
+        """Create the reranker.
+
+        Args:
+            score_fn: Blocking function scoring passages against a query
+            budget_ms: Maximum time a request waits for reranking
+        """
+        self._score_fn = score_fn
+        self._budget_ms = budget_ms
+        # One dedicated thread: reranks queue instead of competing for cores
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rerank")
+
+    async def warm_up(self) -> float:
+        """Load the model and score one pair, outside any request budget.
+
+        Returns:
+            Warm-up duration in milliseconds
+        """
+        start = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._pool, self._score_fn, WARMUP_QUERY, [WARMUP_PASSAGE])
+        duration_ms = round((time.perf_counter() - start) * 1000, 2)
+        logger.info("rerank_warmup_completed", duration_ms=duration_ms)
+        return duration_ms
+
+    def _score_before(self, deadline: float, query: str, texts: list[str]) -> list[float]:
+        if time.monotonic() >= deadline:
+            raise _DeadlineExpired
+        return list(self._score_fn(query, texts))
+
+    async def rerank(
+        self,
+        query: str,
+        results: list[dict[str, Any]],
+        top_k: int,
+        budget_ms: float | None = None,
+    ) -> tuple[list[dict[str, Any]], dict[str, Any]]:
+        """Rerank candidates, falling back to vector order on timeout or error.
+
+        Reranking is an optional refinement: a model that fails to load or
+        score never fails the search, it only costs the reordering.
+
+        Args:
+            query: Search query text
+            results: Candidates in vector-similarity order
+            top_k: Number of results to return
+            budget_ms: Time allowed for this call (default: the configured
+                budget), e.g. what is left of the request deadline
+
+        Returns:
+            Tuple of (top_k results, stats); reranked results carry a
+            "rerank_score" key
+        """
+        metrics = get_metrics()
+        if len(results) <= 1:
+            return results[:top_k], {"reranked": False}
+
+        if budget_ms is None:
+            budget_ms = self._budget_ms
+        start = time.perf_counter()
+        deadline = time.monotonic() + budget_ms / 1000
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(
+            self._pool,
+            self._score_before,
+            deadline,
+            query,
+            [r["text"] for r in results],
+        )
+
+        try:
+            scores = await asyncio.wait_for(future, timeout=budget_ms / 1000)
+        except (TimeoutError, _DeadlineExpired):
+            elapsed_ms = round((time.perf_counter() - start) * 1000, 2)
+            metrics.increment("rerank_timeouts")
+            logger.warning("rerank_budget_exceeded", budget_ms=round(budget_ms, 1), elapsed_ms=elapsed_ms)
+            return results[:top_k], {"reranked": False, "timed_out": True, "rerank_ms": elapsed_ms}
+        except Exception as e:
+            elapsed_ms = round((time.perf_counter() - start) * 1000, 2)
+            metrics.increment("rerank_failed")
+            logger.error("rerank_failed", error=str(e), elapsed_ms=elapsed_ms)
+            return results[:top_k], {"reranked": False, "failed": True, "rerank_ms": elapsed_ms}
+
+        elapsed_ms = round((time.perf_counter() - start) * 1000, 2)
+        order = sorted(range(len(results)), key=lambda i: scores[i], reverse=True)[:top_k]
+        reranked = [{**results[i], "rerank_score": float(scores[i])} for i in order]
+
+        # How much the reranker changed the result set relative to vector order
+        kept = min(top_k, len(results))
+        score_delta = float(np.mean([scores[i] for i in order]) - np.mean(scores[:kept]))
+        displaced = sum(1 for rank, i in enumerate(order) if i != rank)
+
+        metrics.increment("rerank_requests")
+        metrics.observe("rerank_latency_ms", elapsed_ms)
+        metrics.observe("rerank_score_delta", score_delta)
+
+        stats = {
+            "reranked": True,
+            "rerank_ms": elapsed_ms,
+            "candidates": len(results),
+            "score_delta": round(score_delta, 4),
+            "displaced": displaced,
+        }
+        logger.info("search_reranked", **stats)
+        return reranked, stats
+
+    def shutdown(self) -> None:
+        """Stop the rerank thread."""
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+@lru_cache
+def get_reranker() -> Reranker:
+    """Get the cross-encoder reranker (cached singleton; model loads on first use).
+
+    Returns:
+        Reranker configured from settings
+    """
+    settings = get_settings()
+    cache_dir = str(Path(__file__).parent.parent / "models")
+
+    def score(query: str, texts: list[str]) -> list[float]:
+        model = _load_cross_encoder(
+            settings.rerank_model,
+            settings.rerank_backend,
+            cache_dir,
+            settings.rerank_max_length,
+        )
+        scores = model.predict(
+            [(query, text) for text in texts],
+            batch_size=settings.rerank_batch_size,
+            show_progress_bar=False,
+        )
+        return np.asarray(scores, dtype=np.float32).tolist()
+
+    return Reranker(score, budget_ms=settings.rerank_budget_ms)
+
+
+def shutdown_reranker() -> None:
+    """Stop the reranker if it was ever created (a later call recreates it)."""
+    if get_reranker.cache_info().currsize:
+        get_reranker().shutdown()
+        get_reranker.cache_clear()
@@ -0,0 +1,185 @@
+"""Search result cache with per-tenant generation invalidation.
+
+Identical searches (gallery prompts, retries) would otherwise repeat both
+the query embedding and the Qdrant search. Responses are cached in a
+bounded LRU with TTL expiry, keyed by the normalized query and every
+request parameter that changes the result.
+
+TTL alone would serve stale results after an ingest, so each tenant
+(company_id) has a generation counter that every write to that tenant
+bumps. Entries remember the generation they were computed under and are
+dropped on lookup once it has moved on. Unfiltered searches span all
+tenants and depend on a global generation that every write bumps; writes
+of documents without a company_id bump only the global one, since
+tenant-filtered searches never see them. Writes that may touch any
+tenant (e.g. deleting a source across companies) advance an epoch that
+every generation includes.
+
+The cache and its generations are per process: with several workers a
+write invalidates only the worker that handled it, and others serve
+their cached results until the TTL expires.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Hashable
+from functools import lru_cache
+from typing import Any
+
+from config import get_settings
+from metrics import get_metrics
+
+
+class SearchResultCache:
+    """Bounded LRU of search responses with TTL and tenant generations."""
+
+    def __init__(self, max_size: int, ttl_sec: float) -> None:
+        """Initialize the cache.
+
+        Args:
+            max_size: Maximum number of cached responses (0 disables caching)
+            ttl_sec: Seconds before an entry expires (0 disables expiry)
+        """
+        self._max_size = max_size
+        self._ttl_sec = ttl_sec
+        self._entries: OrderedDict[Hashable, tuple[Any, float, tuple[int, int]]] = OrderedDict()
+        self._epoch = 0
+        self._global_generation = 0
+        self._generations: dict[str, int] = {}
+        # Writes bump generations from ingest worker threads as well
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def enabled(self) -> bool:
+        """Whether responses are cached at all."""
+        return self._max_size > 0
+
+    def generation(self, company_id: str | None) -> tuple[int, int]:
+        """Return the generation results for this tenant scope depend on.
+
+        Args:
+            company_id: Tenant filter of the search (None = all tenants)
+        """
+        with self._lock:
+            if company_id is None:
+                return self._epoch, self._global_generation
+            return self._epoch, self._generations.get(company_id, 0)
+
+    def get(self, key: Hashable, company_id: str | None) -> Any | None:
+        """Look up a response, refreshing its LRU position on hit.
+
+        Args:
+            key: Cache key built from the request
+            company_id: Tenant filter of the search
+
+        Returns:
+            Cached response, or None on miss, expiry or invalidation
+        """
+        if not self.enabled:
+            return None
+
+        generation = self.generation(company_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                _, stored_at, stored_generation = entry
+                expired = self._ttl_sec > 0 and time.monotonic() - stored_at > self._ttl_sec
+                if expired or stored_generation != generation:
+                    del self._entries[key]
+                    entry = None
+
+            if entry is None:
+                self.misses += 1
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            lookups = self.hits + self.misses
+            hit_ratio = self.hits / lookups
+
+        metrics = get_metrics()
+        metrics.increment("search_cache_hits" if entry is not None else "search_cache_misses")
+        metrics.set_gauge("search_cache_hit_ratio", round(hit_ratio, 4))
+        return entry[0] if entry is not None else None
+
+    def put(
+        self,
+        key: Hashable,
+        company_id: str | None,
+        value: Any,
+        generation: tuple[int, int],
+    ) -> None:
+        """Store a response computed under the given generation.
+
+        The response is dropped if a write happened while it was being
+        computed, since it may not reflect that write.
+
+        Args:
+            key: Cache key built from the request
+            company_id: Tenant filter of the search
+            value: Response to cache
+            generation: generation(company_id) read before searching
+        """
+        if not self.enabled or generation != self.generation(company_id):
+            return
+
+        with self._lock:
+            self._entries[key] = (value, time.monotonic(), generation)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+            size = len(self._entries)
+        get_metrics().set_gauge("search_cache_size", size)
+
+    def invalidate(self, company_id: str | None) -> None:
+        """Invalidate cached results affected by a write to a tenant.
+
+        Args:
+            company_id: Tenant whose documents changed (None = shared documents)
+        """
+        with self._lock:
+            self._global_generation += 1
+            if company_id is not None:
+                self._generations[company_id] = self._generations.get(company_id, 0) + 1
+        get_metrics().increment("search_cache_invalidations")
+
+    def invalidate_all(self) -> None:
+        """Invalidate every cached result (writes that may touch any tenant)."""
+        with self._lock:
+            self._epoch += 1
+        get_metrics().increment("search_cache_invalidations")
+
+    def clear(self) -> None:
+        """Remove all entries and reset counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict[str, Any]:
+        """Return hit/miss counters and current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self._max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+@lru_cache
+def get_search_result_cache() -> SearchResultCache:
+    """Get the search result cache (cached singleton).
+
+    Returns:
+        SearchResultCache configured from settings
+    """
+    settings = get_settings()
+    return SearchResultCache(settings.search_cache_size, settings.search_cache_ttl_sec)
@@ -1,23 +1,37 @@
 """Search API routes for RAG retrieval."""
 
 import asyncio
-from typing import Any
+import time
+from collections.abc import Awaitable
+from typing import Annotated, Any, Literal
 
-from fastapi import APIRouter, HTTPException, Request
+from fastapi import APIRouter, Header, HTTPException, Request, Response
 from pydantic import BaseModel, Field
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 
 from config import get_settings
 from embeddings import get_embedding_provider
+from embeddings.cache import normalize_query
+from hedging import hedge_delay, hedged
+from metrics import get_metrics
 from middleware.logging import get_logger
 
+from .deadline import Deadline
+from .mmr import diversify
+from .rerank import get_reranker
+from .result_cache import get_search_result_cache
+from .semantic_cache import get_semantic_query_cache
+from .singleflight import SingleFlight
 from .store import VectorStoreError, get_vector_store
 
 logger = get_logger(__name__)
 router = APIRouter()
 limiter = Limiter(key_func=get_remote_address)
 
+# Coalesces identical concurrent /search requests
+_search_flights = SingleFlight("search")
+
 
 class SearchRequest(BaseModel):
     """Request model for search endpoint."""
@@ -48,6 +62,30 @@ class SearchRequest(BaseModel):
         le=1.0,
         description="Minimum similarity score threshold",
     )
+    mode: Literal["dense", "sparse", "hybrid"] | None = Field(
+        default=None,
+        description="Retrieval mode: dense (E5), sparse (BM25) or hybrid (RRF); "
+        "defaults to RAG_SEARCH_MODE",
+    )
+    rerank: bool | None = Field(
+        default=None,
+        description="Rerank candidates with the cross-encoder; defaults to RAG_RERANK_ENABLED",
+    )
+    diversify: bool | None = Field(
+        default=None,
+        description="Drop near-duplicate chunks with MMR; defaults to RAG_MMR_ENABLED",
+    )
+    mmr_lambda: float | None = Field(
+        default=None,
+        ge=0.0,
+        le=1.0,
+        description="MMR trade-off (1 = relevance only, 0 = diversity only); "
+        "defaults to RAG_MMR_LAMBDA",
+    )
+    bypass_semantic_cache: bool = Field(
+        default=False,
+        description="Do not answer from the results of a near-duplicate earlier query",
+    )
 
 
 class SearchChunk(BaseModel):
@@ -57,6 +95,7 @@ class SearchChunk(BaseModel):
     source: str
     score: float
     doc_type: str = ""
+    rerank_score: float | None = None
 
 
 class SearchResponse(BaseModel):
@@ -64,6 +103,40 @@ class SearchResponse(BaseModel):
 
     chunks: list[SearchChunk]
     query: str
+    mode: str = "dense"
+    degraded: bool = False
+    reranked: bool = False
+    diversified: bool = False
+    partial: bool = False
+
+
+class BatchSearchRequest(BaseModel):
+    """Request model for the batch search endpoint."""
+
+    queries: list[SearchRequest] = Field(
+        ...,
+        min_length=1,
+        description="Queries to run, each with its own filters and threshold",
+    )
+
+
+class BatchSearchResult(BaseModel):
+    """Results (or the error) for one query of a batch."""
+
+    query: str
+    chunks: list[SearchChunk] = []
+    error: str | None = None
+    mode: str = "dense"
+    degraded: bool = False
+    reranked: bool = False
+    diversified: bool = False
+    partial: bool = False
+
+
+class BatchSearchResponse(BaseModel):
+    """Response model for the batch search endpoint (results in request order)."""
+
+    results: list[BatchSearchResult]
 
 
 class SearchError(BaseModel):
@@ -72,6 +145,127 @@ class SearchError(BaseModel):
     detail: str
 
 
+def _to_search_chunks(results: list[dict[str, Any]]) -> list[SearchChunk]:
+    """Convert vector store results into response chunks."""
+    return [
+        SearchChunk(
+            text=r["text"],
+            source=r["source"],
+            score=r["score"],
+            doc_type=r.get("doc_type", ""),
+            rerank_score=r.get("rerank_score"),
+        )
+        for r in results
+    ]
+
+
+def _wants_rerank(search_request: SearchRequest) -> bool:
+    """Resolve the per-request rerank flag against the configured default."""
+    if search_request.rerank is not None:
+        return search_request.rerank
+    return get_settings().rerank_enabled
+
+
+def _wants_diversify(search_request: SearchRequest) -> bool:
+    """Resolve the per-request MMR flag against the configured default."""
+    if search_request.diversify is not None:
+        return search_request.diversify
+    return get_settings().mmr_enabled
+
+
+def _candidate_count(search_request: SearchRequest) -> int:
+    """Number of candidates to fetch (oversampled for rerank and MMR)."""
+    settings = get_settings()
+    factor = 1
+    if _wants_rerank(search_request):
+        factor = max(factor, settings.rerank_oversample)
+    if _wants_diversify(search_request):
+        factor = max(factor, settings.mmr_oversample)
+    return search_request.top_k * factor
+
+
+def _cache_key(search_request: SearchRequest, mode: str) -> tuple:
+    """Build the result cache key from every parameter that shapes the response."""
+    settings = get_settings()
+    diversified = _wants_diversify(search_request)
+    mmr_lambda = search_request.mmr_lambda
+    if mmr_lambda is None:
+        mmr_lambda = settings.mmr_lambda
+    return (
+        normalize_query(search_request.query, settings.query_cache_case_sensitive),
+        search_request.company_id,
+        search_request.doc_type,
+        search_request.top_k,
+        search_request.score_threshold,
+        mode,
+        _wants_rerank(search_request),
+        mmr_lambda if diversified else None,
+    )
+
+
+def _qdrant_hedge_delay() -> float | None:
+    """Delay before hedging a Qdrant search (None = do not hedge)."""
+    settings = get_settings()
+    if not settings.qdrant_hedge_enabled:
+        return None
+    return hedge_delay(
+        "search_qdrant_ms",
+        settings.qdrant_hedge_percentile,
+        settings.qdrant_hedge_min_samples,
+    )
+
+
+async def _refine(
+    search_request: SearchRequest,
+    results: list[dict[str, Any]],
+    query_embedding: list[float] | None,
+    deadline: Deadline,
+) -> tuple[list[dict[str, Any]], bool, bool, bool]:
+    """Apply the optional rerank and MMR stages to the candidates.
+
+    Reranking reorders the candidates; MMR then picks a diverse top_k from
+    them (using the rerank scores as relevance when present). A stage is
+    skipped when less than search_refine_min_ms of the deadline is left,
+    and reranking never runs past the deadline.
+
+    Returns:
+        Tuple of (top_k results, reranked, diversified, partial), where
+        partial means a requested stage was skipped for the deadline
+    """
+    settings = get_settings()
+    diversified = _wants_diversify(search_request)
+    reranked = False
+    partial = False
+
+    if _wants_rerank(search_request):
+        if deadline.remaining_ms() < settings.search_refine_min_ms:
+            partial = True
+        else:
+            keep = len(results) if diversified else search_request.top_k
+            budget_ms = min(settings.rerank_budget_ms, deadline.remaining_ms())
+            results, stats = await get_reranker().rerank(
+                search_request.query, results, keep, budget_ms=budget_ms
+            )
+            reranked = stats["reranked"]
+
+    if diversified and deadline.remaining_ms() < settings.search_refine_min_ms:
+        diversified, partial = False, True
+    if diversified:
+        start = time.perf_counter()
+        lambda_mult = search_request.mmr_lambda
+        if lambda_mult is None:
+            lambda_mult = settings.mmr_lambda
+        results = diversify(results, search_request.top_k, lambda_mult, query_embedding)
+        get_metrics().observe("mmr_ms", round((time.perf_counter() - start) * 1000, 3))
+
+    if partial:
+        # Vector order now beats a complete answer the client has given up on
+        logger.warning("search_refine_skipped", remaining_ms=round(deadline.remaining_ms(), 1))
+        get_metrics().increment("search_refine_skipped")
+
+    return results[: search_request.top_k], reranked, diversified, partial
+
+
 @router.post(
     "/search",
     response_model=SearchResponse,
@@ -86,23 +280,49 @@ Search for relevant document chunks based on a query.
 
 Returns chunks ordered by similarity score.
 
+**Modes:** `dense` (E5 similarity), `sparse` (BM25 keyword match, good for
+service names and acronyms) or `hybrid` (both, fused with reciprocal-rank
+fusion). Defaults to `RAG_SEARCH_MODE`. If the embedding provider times out,
+the search falls back to `sparse` and the response has `degraded: true`.
+
+**Deadline:** send `X-Deadline-Ms` with the time the client will wait. The
+whole search (embedding, Qdrant, rerank/MMR) runs within it, capped at
+`RAG_SEARCH_TIMEOUT_SEC`. When little time is left, rerank/MMR are skipped
+and the vector-order results are returned with `partial: true`.
+
 **Graceful degradation:** If the RAG service is unavailable or times out,
 the frontend should fall back to non-RAG diagram generation.
 """,
 )
 @limiter.limit("60/minute")
-async def search(request: Request, search_request: SearchRequest) -> SearchResponse:
+async def search(
+    request: Request,
+    response: Response,
+    search_request: SearchRequest,
+    x_deadline_ms: Annotated[
+        float | None,
+        Header(gt=0, description="Milliseconds the client will wait for the response"),
+    ] = None,
+) -> SearchResponse:
     """Search for relevant chunks in the knowledge base.
 
     The search process:
-    1. Embed the query using the configured embedding provider
-    2. Search Qdrant for similar chunks
-    3. Return results with similarity scores
-
-    Returns 503 if the service is unavailable (allows frontend fallback).
+    1. Serve the response from the result cache if an identical search
+       ran since the tenant's last write (X-Cache: HIT), or join an
+       identical search that is already running
+    2. Embed the query using the configured embedding provider
+       (skipped in sparse mode) and reuse the results of a near-duplicate
+       earlier query if the semantic cache has one
+    3. Search Qdrant for similar chunks (dense, BM25 or RRF-fused hybrid)
+    4. Return results with similarity scores
+
+    All stages share one deadline (X-Deadline-Ms, capped at
+    search_timeout_sec). If embedding fails or runs out of its share of
+    the deadline, the search degrades to BM25 instead of failing. Returns
+    503 if the service is unavailable or the deadline passes (allows
+    frontend fallback).
     """
-    settings = get_settings()
-    timeout_sec = settings.search_timeout_sec
+    deadline = Deadline.for_request(get_settings(), x_deadline_ms)
 
     logger.info(
         "search_started",
@@ -111,66 +331,222 @@ async def search(request: Request, search_request: SearchRequest) -> SearchRespo
         company_id=search_request.company_id,
     )
 
-    try:
-        # Get embedding provider
-        embedding_provider = get_embedding_provider()
+    search_response, cache_status = await run_search(search_request, deadline)
+    if cache_status is not None:
+        response.headers["X-Cache"] = cache_status
+    return search_response
 
-        # Embed query with timeout
-        try:
-            query_embedding = await asyncio.wait_for(
-                embedding_provider.embed_query(search_request.query),
-                timeout=timeout_sec,
-            )
-        except TimeoutError as e:
-            logger.error("search_embedding_timeout", timeout=timeout_sec)
-            raise HTTPException(
-                status_code=503,
-                detail="Embedding service timed out",
-            ) from e
 
-        # Search vector store with timeout
+async def run_search(
+    search_request: SearchRequest,
+    deadline: Deadline | None = None,
+) -> tuple[SearchResponse, str | None]:
+    """Answer a search from the result cache or by running it.
+
+    Shared by /search and the cache warm-up so both fill the same caches.
+
+    Args:
+        search_request: The search parameters
+        deadline: Deadline of the request (default: search_timeout_sec)
+
+    Returns:
+        Tuple of (response, "HIT" / "MISS", or None if the cache is disabled)
+
+    Raises:
+        HTTPException: 503 if the search cannot be served
+    """
+    settings = get_settings()
+    if deadline is None:
+        deadline = Deadline.for_request(settings)
+    mode = search_request.mode or settings.search_mode
+
+    cache = get_search_result_cache()
+    cache_key = _cache_key(search_request, mode)
+    # Read before searching so a write that lands mid-search is not masked
+    generation = cache.generation(search_request.company_id)
+    cache_status = None
+    if cache.enabled:
+        cached = cache.get(cache_key, search_request.company_id)
+        if cached is not None:
+            logger.info("search_cache_hit", results_count=len(cached.chunks), mode=mode)
+            return cached.model_copy(update={"query": search_request.query}), "HIT"
+        cache_status = "MISS"
+
+    # Identical requests already in flight share that search (same
+    # generation, so none of them can miss a write); each waits only
+    # until its own deadline. The shared search runs under the first
+    # request's deadline, so only requests with the same budget join it:
+    # one with a longer X-Deadline-Ms must not be served a search degraded
+    # to fit a shorter one
+    flight_key = (
+        cache_key,
+        generation,
+        search_request.bypass_semantic_cache,
+        round(deadline.budget_sec * 1000),
+    )
+    try:
+        search_response = await asyncio.wait_for(
+            _search_flights.do(
+                flight_key,
+                lambda: _execute_search(search_request, mode, cache_key, generation, deadline),
+            ),
+            timeout=deadline.remaining(),
+        )
+    except TimeoutError as e:
+        logger.error("search_deadline_exceeded", budget_ms=round(deadline.budget_sec * 1000))
+        raise HTTPException(
+            status_code=503,
+            detail="Search deadline exceeded",
+        ) from e
+    return search_response.model_copy(update={"query": search_request.query}), cache_status
+
+
+async def _execute_search(
+    search_request: SearchRequest,
+    mode: str,
+    cache_key: tuple,
+    generation: tuple[int, int],
+    deadline: Deadline,
+) -> SearchResponse:
+    """Embed, retrieve and refine one search, caching the response.
+
+    Args:
+        search_request: The search parameters
+        mode: Resolved retrieval mode
+        cache_key: Result cache key of the request
+        generation: Result cache generation read before searching
+        deadline: Deadline every stage times out against
+
+    Returns:
+        The search response
+
+    Raises:
+        HTTPException: 503 if the search cannot be served
+    """
+    settings = get_settings()
+    cache = get_search_result_cache()
+    semantic_cache = get_semantic_query_cache()
+    degraded = False
+
+    try:
         vector_store = get_vector_store()
 
+        query_embedding = None
+        if mode != "sparse":
+            # Get embedding provider
+            embedding_provider = get_embedding_provider()
+
+            # Embed query within its share of the deadline
+            embedding_timeout = deadline.share(settings.search_embedding_budget_share)
+            try:
+                query_embedding = await asyncio.wait_for(
+                    embedding_provider.embed_query(search_request.query),
+                    timeout=embedding_timeout,
+                )
+            except TimeoutError as e:
+                logger.error("search_embedding_timeout", timeout=round(embedding_timeout, 3))
+                if not vector_store.sparse_enabled:
+                    raise HTTPException(
+                        status_code=503,
+                        detail="Embedding service timed out",
+                    ) from e
+                mode, degraded = "sparse", True
+            except Exception as e:
+                logger.error("search_embedding_error", error=str(e))
+                if not vector_store.sparse_enabled:
+                    raise
+                mode, degraded = "sparse", True
+
+            if degraded:
+                # Keyword results beat no results while embeddings are down
+                logger.warning("search_degraded_to_sparse")
+                get_metrics().increment("search_degraded_sparse")
+
+        use_semantic_cache = (
+            semantic_cache.enabled
+            and query_embedding is not None
+            and not search_request.bypass_semantic_cache
+        )
+        if use_semantic_cache:
+            similar = semantic_cache.lookup(
+                cache_key[1:], search_request.company_id, query_embedding, generation
+            )
+            if similar is not None:
+                logger.info("search_semantic_cache_hit", results_count=len(similar.chunks), mode=mode)
+                cache.put(cache_key, search_request.company_id, similar, generation)
+                return similar.model_copy(update={"query": search_request.query})
+
+        def vector_search() -> Awaitable[list[dict[str, Any]]]:
+            return vector_store.search(
+                query_embedding=query_embedding,
+                top_k=_candidate_count(search_request),
+                company_id=search_request.company_id,
+                doc_type=search_request.doc_type,
+                score_threshold=search_request.score_threshold,
+                mode=mode,
+                query_text=search_request.query,
+                with_vectors=_wants_diversify(search_request),
+            )
+
+        # Search vector store with what is left of the deadline, hedging
+        # searches slower than Qdrant's recent p95
+        search_timeout = deadline.remaining()
+        started = time.perf_counter()
         try:
             results = await asyncio.wait_for(
-                vector_store.search(
-                    query_embedding=query_embedding,
-                    top_k=search_request.top_k,
-                    company_id=search_request.company_id,
-                    doc_type=search_request.doc_type,
-                    score_threshold=search_request.score_threshold,
-                ),
-                timeout=timeout_sec,
+                hedged(vector_search, _qdrant_hedge_delay(), "search_qdrant"),
+                timeout=search_timeout,
             )
         except TimeoutError as e:
-            logger.error("search_qdrant_timeout", timeout=timeout_sec)
+            logger.error("search_qdrant_timeout", timeout=round(search_timeout, 3))
             raise HTTPException(
                 status_code=503,
                 detail="Vector search timed out",
             ) from e
+        get_metrics().observe("search_qdrant_ms", round((time.perf_counter() - started) * 1000, 2))
+
+        results, reranked, diversified, partial = await _refine(
+            search_request, results, query_embedding, deadline
+        )
 
         # Format response
-        chunks = [
-            SearchChunk(
-                text=r["text"],
-                source=r["source"],
-                score=r["score"],
-                doc_type=r.get("doc_type", ""),
-            )
-            for r in results
-        ]
+        chunks = _to_search_chunks(results)
 
         logger.info(
             "search_completed",
             results_count=len(chunks),
             top_score=chunks[0].score if chunks else 0,
+            mode=mode,
+            degraded=degraded,
+            reranked=reranked,
+            diversified=diversified,
+            partial=partial,
         )
 
-        return SearchResponse(
+        search_response = SearchResponse(
             chunks=chunks,
             query=search_request.query,
+            mode=mode,
+            degraded=degraded,
+            reranked=reranked,
+            diversified=diversified,
+            partial=partial,
         )
 
+        # Degraded, partial or unreranked fallbacks should not outlive the outage
+        if not degraded and not partial and reranked == _wants_rerank(search_request):
+            cache.put(cache_key, search_request.company_id, search_response, generation)
+            if use_semantic_cache:
+                semantic_cache.put(
+                    cache_key[1:],
+                    search_request.company_id,
+                    query_embedding,
+                    search_response,
+                    generation,
+                )
+
+        return search_response
+
     except VectorStoreError as e:
         logger.error("search_vector_store_error", error=str(e))
         raise HTTPException(
@@ -190,6 +566,180 @@ async def search(request: Request, search_request: SearchRequest) -> SearchRespo
         ) from e
 
 
+@router.post(
+    "/search/batch",
+    response_model=BatchSearchResponse,
+    responses={
+        400: {"model": SearchError, "description": "Invalid request"},
+        429: {"model": SearchError, "description": "Rate limit exceeded"},
+        503: {"model": SearchError, "description": "Service unavailable"},
+    },
+    summary="Search the knowledge base for several queries at once",
+    description="""
+Run up to `RAG_SEARCH_BATCH_MAX_QUERIES` searches in one request. All
+queries are embedded in a single batched pass and sent to Qdrant as one
+batch request.
+
+Results are returned in request order. A query that fails carries an
+`error` message instead of failing the whole batch. The batch shares one
+deadline (`X-Deadline-Ms`, capped at `RAG_SEARCH_TIMEOUT_SEC`).
+""",
+)
+@limiter.limit("60/minute")
+async def search_batch(
+    request: Request,
+    batch_request: BatchSearchRequest,
+    x_deadline_ms: Annotated[
+        float | None,
+        Header(gt=0, description="Milliseconds the client will wait for the response"),
+    ] = None,
+) -> BatchSearchResponse:
+    """Search the knowledge base for several queries in one round trip.
+
+    Returns 503 only if the shared embedding pass or the whole batch runs
+    out of the deadline; individual query failures are reported per result.
+    """
+    settings = get_settings()
+    deadline = Deadline.for_request(settings, x_deadline_ms)
+    queries = batch_request.queries
+
+    if len(queries) > settings.search_batch_max_queries:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.search_batch_max_queries} queries per batch",
+        )
+
+    logger.info("search_batch_started", queries=len(queries))
+
+    vector_store = get_vector_store()
+    modes = [q.mode or settings.search_mode for q in queries]
+    degraded = False
+
+    # One embedding pass for every query that needs a dense vector
+    dense_positions = [i for i, mode in enumerate(modes) if mode != "sparse"]
+    query_embeddings: list[list[float] | None] = [None] * len(queries)
+    if dense_positions:
+        embedding_provider = get_embedding_provider()
+        embedding_timeout = deadline.share(settings.search_embedding_budget_share)
+        try:
+            embeddings = await asyncio.wait_for(
+                embedding_provider.embed_queries([queries[i].query for i in dense_positions]),
+                timeout=embedding_timeout,
+            )
+            for i, embedding in zip(dense_positions, embeddings, strict=True):
+                query_embeddings[i] = embedding
+        except TimeoutError as e:
+            logger.error(
+                "search_embedding_timeout",
+                timeout=round(embedding_timeout, 3),
+                queries=len(queries),
+            )
+            if not vector_store.sparse_enabled:
+                raise HTTPException(
+                    status_code=503,
+                    detail="Embedding service timed out",
+                ) from e
+            degraded = True
+        except Exception as e:
+            logger.error("search_batch_embedding_error", error=str(e))
+            if not vector_store.sparse_enabled:
+                raise HTTPException(
+                    status_code=503,
+                    detail="Search service unavailable",
+                ) from e
+            degraded = True
+
+        if degraded:
+            logger.warning("search_degraded_to_sparse", queries=len(dense_positions))
+            get_metrics().increment("search_degraded_sparse", len(dense_positions))
+            modes = ["sparse"] * len(queries)
+
+    search_timeout = deadline.remaining()
+    try:
+        outcomes = await asyncio.wait_for(
+            vector_store.search_batch(
+                [
+                    {
+                        "query_embedding": embedding,
+                        "top_k": _candidate_count(q),
+                        "company_id": q.company_id,
+                        "doc_type": q.doc_type,
+                        "score_threshold": q.score_threshold,
+                        "mode": mode,
+                        "query_text": q.query,
+                        "with_vectors": _wants_diversify(q),
+                    }
+                    for q, embedding, mode in zip(queries, query_embeddings, modes, strict=True)
+                ]
+            ),
+            timeout=search_timeout,
+        )
+    except TimeoutError as e:
+        logger.error("search_qdrant_timeout", timeout=round(search_timeout, 3), queries=len(queries))
+        raise HTTPException(
+            status_code=503,
+            detail="Vector search timed out",
+        ) from e
+    except Exception as e:
+        logger.error("search_vector_store_error", error=str(e))
+        raise HTTPException(
+            status_code=503,
+            detail="Knowledge base unavailable",
+        ) from e
+
+    async def refine_or_vector_order(
+        i: int, outcome: list[dict[str, Any]]
+    ) -> tuple[list[dict[str, Any]], bool, bool, bool]:
+        # A failed rerank/MMR must not fail the other queries of the batch
+        try:
+            return await _refine(queries[i], outcome, query_embeddings[i], deadline)
+        except Exception as e:
+            logger.error("search_batch_refine_failed", query=queries[i].query[:100], error=str(e))
+            return outcome[: queries[i].top_k], False, False, False
+
+    # Refine successful queries concurrently (reranks share the rerank thread)
+    succeeded = [
+        (i, outcome) for i, outcome in enumerate(outcomes) if not isinstance(outcome, Exception)
+    ]
+    refined = await asyncio.gather(
+        *(refine_or_vector_order(i, outcome) for i, outcome in succeeded)
+    )
+    refined_by_position = {i: r for (i, _), r in zip(succeeded, refined, strict=True)}
+
+    results: list[BatchSearchResult] = []
+    for i, (q, mode) in enumerate(zip(queries, modes, strict=True)):
+        if i not in refined_by_position:
+            results.append(
+                BatchSearchResult(
+                    query=q.query,
+                    error="Knowledge base unavailable",
+                    mode=mode,
+                    degraded=degraded,
+                )
+            )
+        else:
+            chunks, reranked, diversified, partial = refined_by_position[i]
+            results.append(
+                BatchSearchResult(
+                    query=q.query,
+                    chunks=_to_search_chunks(chunks),
+                    mode=mode,
+                    degraded=degraded,
+                    reranked=reranked,
+                    diversified=diversified,
+                    partial=partial,
+                )
+            )
+
+    logger.info(
+        "search_batch_completed",
+        queries=len(queries),
+        failed=sum(1 for r in results if r.error),
+    )
+
+    return BatchSearchResponse(results=results)
+
+
 @router.get(
     "/stats",
     summary="Get knowledge base statistics",
@@ -198,18 +748,7 @@ async def search(request: Request, search_request: SearchRequest) -> SearchRespo
 async def get_stats() -> dict[str, Any]:
     """Get statistics about the knowledge base."""
     try:
-        vector_store = get_vector_store()
-        client = await vector_store._get_client()
-        settings = get_settings()
-
-        collection_info = await client.get_collection(settings.qdrant_collection)
-
-        return {
-            "collection": settings.qdrant_collection,
-            "vectors_count": collection_info.vectors_count,
-            "points_count": collection_info.points_count,
-            "status": collection_info.status.value,
-        }
+        return await get_vector_store().stats()
 
     except Exception as e:
         logger.error("stats_error", error=str(e))
@@ -0,0 +1,239 @@
+"""Semantic (near-duplicate) query cache.
+
+Prompts often differ only trivially ("user login flow" vs "login flow for
+users"); the exact-key result cache misses those even though they retrieve
+the same chunks. This cache keeps the embeddings of recently answered
+queries in a small NumPy matrix per tenant. A new query whose embedding is
+within max_distance (cosine distance) of a cached one, and whose other
+search parameters are identical, is answered with that query's results
+without calling Qdrant.
+
+Each tenant's index holds at most tenant_capacity queries and evicts the
+least recently used one when full; the number of tenants is bounded the
+same way. Lookups are one matrix-vector product over at most
+tenant_capacity rows.
+
+Invalidation reuses the result cache's generations: an index remembers
+the generation its entries were computed under and is emptied as soon as
+that tenant has been written to.
+"""
+
+import threading
+from collections import OrderedDict
+from collections.abc import Hashable
+from functools import lru_cache
+from typing import Any
+
+import numpy as np
+
+from config import get_settings
+from metrics import get_metrics
+
+
+class _TenantIndex:
+    """Normalized query embeddings of one tenant with their responses."""
+
+    def __init__(self, capacity: int, dimension: int, generation: tuple[int, int]) -> None:
+        self.generation = generation
+        self.vectors = np.zeros((capacity, dimension), dtype=np.float32)
+        self.params: list[Hashable] = []
+        self.values: list[Any] = []
+        # Logical clock of each row's last use, for LRU eviction
+        self.last_used = np.zeros(capacity, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    @property
+    def dimension(self) -> int:
+        return self.vectors.shape[1]
+
+
+class SemanticQueryCache:
+    """Per-tenant nearest-neighbour cache of search responses."""
+
+    def __init__(self, tenant_capacity: int, max_distance: float, max_tenants: int) -> None:
+        """Initialize the cache.
+
+        Args:
+            tenant_capacity: Maximum cached queries per tenant (0 disables the cache)
+            max_distance: Largest cosine distance (1 - cosine similarity)
+                at which a cached query is reused
+            max_tenants: Maximum tenants with an index before the least
+                recently used one is dropped
+        """
+        self._capacity = tenant_capacity
+        self._max_distance = max_distance
+        self._max_tenants = max_tenants
+        self._tenants: OrderedDict[str | None, _TenantIndex] = OrderedDict()
+        self._clock = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        """Whether responses are cached at all."""
+        return self._capacity > 0
+
+    def lookup(
+        self,
+        params: Hashable,
+        company_id: str | None,
+        embedding: list[float],
+        generation: tuple[int, int],
+    ) -> Any | None:
+        """Find the response of a near-duplicate query.
+
+        Args:
+            params: Every search parameter except the query text
+            company_id: Tenant filter of the search
+            embedding: Embedding of the new query
+            generation: Result cache generation for company_id
+
+        Returns:
+            Cached response of the closest matching query, or None
+        """
+        if not self.enabled:
+            return None
+
+        query = _normalize(embedding)
+        distance = None
+        value = None
+        with self._lock:
+            index = self._index(company_id, generation, query.shape[0], create=False)
+            if index is not None and len(index):
+                size = len(index)
+                similarities = index.vectors[:size] @ query
+                same_params = np.fromiter((p == params for p in index.params), dtype=bool, count=size)
+                similarities[~same_params] = -np.inf
+                best = int(np.argmax(similarities))
+                if same_params[best] and 1.0 - similarities[best] <= self._max_distance:
+                    distance = float(1.0 - similarities[best])
+                    value = index.values[best]
+                    self._clock += 1
+                    index.last_used[best] = self._clock
+
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        metrics = get_metrics()
+        if value is None:
+            metrics.increment("semantic_cache_misses")
+        else:
+            assert distance is not None
+            metrics.increment("semantic_cache_hits")
+            metrics.observe("semantic_cache_hit_distance", round(distance, 4))
+        return value
+
+    def put(
+        self,
+        params: Hashable,
+        company_id: str | None,
+        embedding: list[float],
+        value: Any,
+        generation: tuple[int, int],
+    ) -> None:
+        """Store the response of a query, evicting the tenant's LRU entry when full.
+
+        Args:
+            params: Every search parameter except the query text
+            company_id: Tenant filter of the search
+            embedding: Embedding of the query
+            value: Response to cache
+            generation: Result cache generation read before searching
+        """
+        if not self.enabled:
+            return
+
+        query = _normalize(embedding)
+        with self._lock:
+            index = self._index(company_id, generation, query.shape[0], create=True)
+            if index is None:
+                # Computed before a write to this tenant; may be stale
+                return
+            if len(index) < self._capacity:
+                row = len(index)
+                index.params.append(params)
+                index.values.append(value)
+            else:
+                row = int(np.argmin(index.last_used))
+                index.params[row] = params
+                index.values[row] = value
+            index.vectors[row] = query
+            self._clock += 1
+            index.last_used[row] = self._clock
+
+    def clear(self) -> None:
+        """Remove all entries and reset counters."""
+        with self._lock:
+            self._tenants.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict[str, Any]:
+        """Return hit/miss counters and the number of cached queries."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "tenants": len(self._tenants),
+                "size": sum(len(index) for index in self._tenants.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+    def _index(
+        self,
+        company_id: str | None,
+        generation: tuple[int, int],
+        dimension: int,
+        create: bool,
+    ) -> _TenantIndex | None:
+        """Return the tenant's index for this generation (caller holds the lock).
+
+        An index from an older generation is dropped. A generation older
+        than the index's (a search that started before a write) gets None.
+        """
+        index = self._tenants.get(company_id)
+        if index is not None:
+            if generation < index.generation:
+                return None
+            if generation != index.generation or dimension != index.dimension:
+                del self._tenants[company_id]
+                index = None
+
+        if index is None:
+            if not create:
+                return None
+            index = _TenantIndex(self._capacity, dimension, generation)
+            self._tenants[company_id] = index
+            while len(self._tenants) > self._max_tenants:
+                self._tenants.popitem(last=False)
+
+        self._tenants.move_to_end(company_id)
+        return index
+
+
+def _normalize(embedding: list[float]) -> np.ndarray:
+    """Return the embedding as a unit-length float32 vector."""
+    vector = np.asarray(embedding, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
+
+@lru_cache
+def get_semantic_query_cache() -> SemanticQueryCache:
+    """Get the semantic query cache (cached singleton).
+
+    Returns:
+        SemanticQueryCache configured from settings
+    """
+    settings = get_settings()
+    return SemanticQueryCache(
+        settings.semantic_cache_tenant_capacity,
+        settings.semantic_cache_max_distance,
+        settings.semantic_cache_max_tenants,
+    )
@@ -0,0 +1,95 @@
+"""Single-flight coalescing of identical concurrent requests.
+
+When a popular prompt is submitted by many users at once, or a client
+retries while its first attempt is still running, every copy would run
+the same embed + search. With single-flight, the first request for a key
+starts the work as a task and identical requests arriving while it runs
+await that same task instead of starting their own.
+
+Every waiter receives the task's result or its exception. A waiter that
+is cancelled (client gone, timeout) only stops waiting; the shared work
+keeps running for the others and is cancelled once the last waiter has
+left; a request for the same key arriving after that starts fresh work.
+"""
+
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+from dataclasses import dataclass
+from typing import Any, Generic, TypeVar
+
+from metrics import get_metrics
+from middleware.logging import get_logger
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+
+@dataclass
+class _Flight(Generic[T]):
+    """Work in progress for one key and the number of requests awaiting it."""
+
+    task: "asyncio.Task[T]"
+    waiters: int = 0
+
+
+class SingleFlight:
+    """Runs at most one call per key at a time and shares its outcome."""
+
+    def __init__(self, name: str) -> None:
+        """Create a single-flight group.
+
+        Args:
+            name: Metric prefix (counters <name>_coalesced and
+                <name>_flights_cancelled)
+        """
+        self._name = name
+        self._flights: dict[Hashable, _Flight[Any]] = {}
+
+    def in_flight(self) -> int:
+        """Number of keys with work currently running."""
+        return len(self._flights)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """Run fn for key, or join the call already running for it.
+
+        Args:
+            key: Identity of the request (equal keys share one call)
+            fn: Coroutine factory doing the work; only called by the
+                first request for the key
+
+        Returns:
+            Result of the shared call
+
+        Raises:
+            Exception: Whatever the shared call raised
+        """
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight(task=asyncio.ensure_future(fn()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _: self._forget(key, flight))
+        else:
+            get_metrics().increment(f"{self._name}_coalesced")
+
+        flight.waiters += 1
+        try:
+            # Shield so one waiter's cancellation does not cancel the others' work
+            return await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if not flight.task.done() and flight.waiters == 1:
+                # Forget the flight now: its done callback only runs on a later
+                # loop iteration, and a retry arriving before then must not
+                # join the cancelled task
+                self._forget(key, flight)
+                flight.task.cancel()
+                get_metrics().increment(f"{self._name}_flights_cancelled")
+                logger.info("single_flight_cancelled", group=self._name)
+            raise
+        finally:
+            flight.waiters -= 1
+
+    def _forget(self, key: Hashable, flight: _Flight[Any]) -> None:
+        """Drop a finished flight so later requests start fresh work."""
+        if self._flights.get(key) is flight:
+            del self._flights[key]
@@ -0,0 +1,112 @@
+"""Local BM25 sparse encoder for lexical (keyword) retrieval.
+
+Dense E5 similarity blurs exact identifiers such as service names,
+acronyms and glossary terms. Each chunk is therefore also indexed as a
+sparse vector whose values are the BM25 term-frequency component:
+
+    tf * (k1 + 1) / (tf + k1 * (1 - b + b * doc_len / avg_doc_len))
+
+The IDF half of BM25 is applied by Qdrant itself (sparse vector with the
+IDF modifier), which keeps document-frequency statistics per collection
+and updates them as chunks are added or deleted. Queries are encoded as
+unit weights over their distinct terms.
+
+Term IDs are CRC32 hashes of the token, which are stable across processes
+and restarts (unlike hash()), so no vocabulary has to be stored.
+"""
+
+import re
+import zlib
+from collections import Counter
+
+from qdrant_client.http import models
+
+# Tokens keep inner '-', '_' and '.' so "auth-service", "order_id" and
+# "v1.2" stay searchable as a whole; their parts are indexed as well.
+_TOKEN_RE = re.compile(r"\w(?:[\w.\-]*\w)?")
+_SPLIT_RE = re.compile(r"[.\-_]")
+
+STOPWORDS = frozenset(
+    """
+    a an and are as at be but by for from has have how in is it its of on or
+    that the this to was were what when where which who why will with
+    """.split()
+)
+
+
+def tokenize(text: str) -> list[str]:
+    """Split text into lowercase lexical tokens.
+
+    Compound identifiers are kept and also split into their parts.
+
+    Args:
+        text: Input text
+
+    Returns:
+        Tokens in order of appearance (with repeats), stopwords removed
+    """
+    tokens: list[str] = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        parts = [part for part in _SPLIT_RE.split(token) if part]
+        if len(parts) > 1:
+            tokens.append(token)
+        tokens.extend(part for part in parts if part not in STOPWORDS)
+    return tokens
+
+
+def term_id(token: str) -> int:
+    """Return the stable sparse index for a token."""
+    return zlib.crc32(token.encode("utf-8"))
+
+
+def _to_sparse(weights: dict[int, float]) -> models.SparseVector:
+    indices = sorted(weights)
+    return models.SparseVector(indices=indices, values=[weights[i] for i in indices])
+
+
+class BM25Encoder:
+    """Encodes documents and queries as BM25 sparse vectors."""
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75, avg_doc_len: float = 256.0) -> None:
+        """Initialize the encoder.
+
+        Args:
+            k1: Term-frequency saturation
+            b: Document-length normalization strength
+            avg_doc_len: Expected average chunk length in tokens
+        """
+        self._k1 = k1
+        self._b = b
+        self._avg_doc_len = avg_doc_len
+
+    def encode_document(self, text: str) -> models.SparseVector:
+        """Encode a chunk with BM25 term-frequency weights.
+
+        Args:
+            text: Chunk text
+
+        Returns:
+            Sparse vector (empty if the text has no indexable terms)
+        """
+        tokens = tokenize(text)
+        length_norm = 1 - self._b + self._b * len(tokens) / self._avg_doc_len
+
+        weights: dict[int, float] = {}
+        for token, tf in Counter(tokens).items():
+            index = term_id(token)
+            # Hash collisions merge into one index; Qdrant rejects duplicates
+            weights[index] = weights.get(index, 0.0) + (
+                tf * (self._k1 + 1) / (tf + self._k1 * length_norm)
+            )
+        return _to_sparse(weights)
+
+    def encode_query(self, text: str) -> models.SparseVector:
+        """Encode a query as unit weights over its distinct terms.
+
+        Args:
+            text: Query text
+
+        Returns:
+            Sparse vector (empty if the query has no indexable terms)
+        """
+        return _to_sparse({term_id(token): 1.0 for token in set(tokenize(text))})
@@ -1,17 +1,79 @@
-"""Qdrant vector store client with retry logic and collection management."""
+"""Qdrant vector store client with retry logic and collection management.
 
+The client talks REST/JSON by default. With RAG_QDRANT_PREFER_GRPC the
+same calls (search, upsert, delete, collection info) go over gRPC, which
+sends vectors as packed protobuf floats instead of JSON text and
+multiplexes concurrent requests over one HTTP/2 connection. REST
+connections are pooled and kept alive (the client's default for
+localhost is a fresh connection per request).
+
+With RAG_QDRANT_QUANTIZATION the collection keeps an int8 (scalar) or
+1-bit (binary) copy of every vector in RAM and the float32 originals on
+disk. Searches do a coarse pass over the quantized index, fetching
+oversampling x limit candidates, and rescore those with the originals.
+
+RAG_TENANT_PARTITIONING keeps each company's chunks apart so a
+tenant-scoped search only walks that tenant's data:
+- payload: company_id is an is_tenant payload index and HNSW builds a
+  graph per tenant (payload_m); Qdrant co-locates each tenant's points
+- shards: the collection uses custom sharding keyed by company_id
+  (chunks without a company go to a shared shard); searches are routed
+  to the tenant's shard and offboarding a tenant drops its shard
+Switching an existing collection to shards requires copying it with
+scripts/migrate_tenant_partitioning.py.
+
+If RAG_QDRANT_URL is a filesystem path or ":memory:", qdrant-client's
+embedded local mode runs in-process instead (no network hop, no
+serialization), for single-node installs with a few thousand vectors and
+for tests. Local mode keeps the same API and collection setup but has no
+quantization or sharding, and a path can only be opened by one process.
+
+Requests go through the "qdrant" circuit breaker: while Qdrant keeps
+failing or answering slowly, calls fail at once with VectorStoreError
+instead of each waiting for the client timeout.
+"""
+
+import asyncio
+import threading
+import time
 import uuid
-from typing import Any
+from collections import defaultdict
+from collections.abc import Awaitable, Callable
+from typing import Any, TypeVar
 
+import httpx
 from qdrant_client import AsyncQdrantClient
 from qdrant_client.http import models
+from qdrant_client.http.exceptions import UnexpectedResponse
 
 from chunking import Chunk
-from config import get_settings
+from circuit_breaker import CircuitOpenError, get_circuit_breaker
+from config import Settings, get_settings
 from middleware.logging import get_logger
 
+from .result_cache import get_search_result_cache
+from .sparse import BM25Encoder
+
 logger = get_logger(__name__)
 
+# Named sparse vector holding BM25 term weights (the dense vector is unnamed)
+SPARSE_VECTOR_NAME = "bm25"
+
+# Shard key for chunks ingested without a company_id (tenant shards mode)
+SHARED_SHARD_KEY = "_shared"
+
+# Points per upsert request
+UPSERT_BATCH_SIZE = 100
+
+# Minimum age of the shard key list before a request for an unknown tenant
+# refreshes it, so such requests do not each cost a cluster info round trip
+SHARD_KEY_REFRESH_SEC = 5.0
+
+# gRPC status codes meaning the request was rejected, not that Qdrant is down
+_GRPC_CLIENT_ERRORS = {"INVALID_ARGUMENT", "NOT_FOUND", "ALREADY_EXISTS", "FAILED_PRECONDITION"}
+
+T = TypeVar("T")
+
 
 class VectorStoreError(Exception):
     """Raised when vector store operations fail."""
@@ -19,6 +81,146 @@ class VectorStoreError(Exception):
     pass
 
 
+def _build_filter(company_id: str | None, doc_type: str | None) -> models.Filter | None:
+    """Build a payload filter for the optional company and doc type."""
+    filter_conditions = []
+
+    if company_id:
+        filter_conditions.append(
+            models.FieldCondition(
+                key="company_id",
+                match=models.MatchValue(value=company_id),
+            )
+        )
+
+    if doc_type:
+        filter_conditions.append(
+            models.FieldCondition(
+                key="doc_type",
+                match=models.MatchValue(value=doc_type),
+            )
+        )
+
+    if not filter_conditions:
+        return None
+    return models.Filter(must=filter_conditions)
+
+
+def _format_result(result: Any, with_vector: bool = False) -> dict[str, Any]:
+    """Convert a scored Qdrant point into a result dict.
+
+    With with_vector, the dense vector is included under "vector" (taken
+    from the unnamed vector when the point also carries a sparse one).
+    """
+    payload = result.payload or {}
+    formatted = {
+        "text": payload.get("text", ""),
+        "source": payload.get("source", ""),
+        "doc_type": payload.get("doc_type", ""),
+        "score": result.score,
+        "company_id": payload.get("company_id"),
+    }
+    if with_vector:
+        vector = result.vector
+        formatted["vector"] = vector.get("") if isinstance(vector, dict) else vector
+    return formatted
+
+
+def _is_qdrant_failure(error: BaseException) -> bool:
+    """Whether an error means Qdrant is unhealthy rather than the request invalid."""
+    if isinstance(error, VectorStoreError) and error.__cause__ is not None:
+        error = error.__cause__
+    if isinstance(error, UnexpectedResponse):
+        return error.status_code is None or error.status_code >= 500 or error.status_code == 429
+    code = getattr(error, "code", None)
+    if callable(code):
+        try:
+            return getattr(code(), "name", None) not in _GRPC_CLIENT_ERRORS
+        except TypeError:
+            pass
+    return True
+
+
+def _is_embedded(url: str) -> bool:
+    """Whether a Qdrant URL selects embedded local mode (a path or ":memory:")."""
+    return url == ":memory:" or "://" not in url
+
+
+def _client_options(settings: Settings, prefer_grpc: bool | None = None) -> dict[str, Any]:
+    """Build AsyncQdrantClient keyword arguments from settings.
+
+    Args:
+        settings: Application settings
+        prefer_grpc: Override settings.qdrant_prefer_grpc (used by benchmarks)
+
+    Returns:
+        Keyword arguments for AsyncQdrantClient
+    """
+    if settings.qdrant_url == ":memory:":
+        return {"location": ":memory:"}
+    if _is_embedded(settings.qdrant_url):
+        return {"path": settings.qdrant_url}
+
+    keepalive_ms = int(settings.qdrant_keepalive_sec * 1000)
+    return {
+        "url": settings.qdrant_url,
+        "prefer_grpc": settings.qdrant_prefer_grpc if prefer_grpc is None else prefer_grpc,
+        "grpc_port": settings.qdrant_grpc_port,
+        "timeout": settings.qdrant_timeout_sec,
+        "limits": httpx.Limits(
+            max_connections=settings.qdrant_pool_max_connections,
+            max_keepalive_connections=settings.qdrant_pool_max_keepalive,
+            keepalive_expiry=settings.qdrant_keepalive_sec,
+        ),
+        "grpc_options": {
+            "grpc.keepalive_time_ms": keepalive_ms,
+            "grpc.keepalive_timeout_ms": min(keepalive_ms, 10_000),
+            "grpc.keepalive_permit_without_calls": 1,
+        },
+    }
+
+
+def _quantization_config(mode: str) -> models.QuantizationConfig | None:
+    """Return the collection quantization config for a quantization mode."""
+    if mode == "scalar":
+        return models.ScalarQuantization(
+            scalar=models.ScalarQuantizationConfig(
+                type=models.ScalarType.INT8,
+                quantile=0.99,
+                always_ram=True,
+            )
+        )
+    if mode == "binary":
+        return models.BinaryQuantization(
+            binary=models.BinaryQuantizationConfig(always_ram=True),
+        )
+    return None
+
+
+def _quantization_mode(config: Any) -> str:
+    """Return the quantization mode of an existing collection config."""
+    if isinstance(config, models.ScalarQuantization):
+        return "scalar"
+    if isinstance(config, models.BinaryQuantization):
+        return "binary"
+    if isinstance(config, models.ProductQuantization):
+        return "product"
+    return "none"
+
+
+def _point_id(chunk: Chunk) -> str:
+    """Return a point ID for a chunk.
+
+    Chunks of a known document get a deterministic ID derived from
+    (doc_id, chunk index), so retried or resumed ingest jobs overwrite
+    their earlier points instead of duplicating them.
+    """
+    doc_id = (chunk.metadata or {}).get("doc_id")
+    if doc_id is None:
+        return str(uuid.uuid4())
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"{doc_id}:{chunk.index}"))
+
+
 class QdrantVectorStore:
     """Qdrant vector database client.
 
@@ -30,32 +232,94 @@ class QdrantVectorStore:
     - Automatic retries on connection errors
     """
 
-    def __init__(self) -> None:
-        """Initialize the Qdrant client."""
-        self._settings = get_settings()
+    def __init__(self, settings: Settings | None = None) -> None:
+        """Initialize the Qdrant client.
+
+        Args:
+            settings: Settings to use instead of the global ones (e.g. to
+                address another collection in migration scripts)
+        """
+        self._settings = settings or get_settings()
         self._client: AsyncQdrantClient | None = None
         self._collection_initialized = False
+        # Concurrent first requests must create one client and check the collection once
+        self._init_lock = asyncio.Lock()
+        self._embedded = _is_embedded(self._settings.qdrant_url)
+        self._partitioning = self._settings.tenant_partitioning
+        if self._embedded and self._partitioning == "shards":
+            logger.warning("qdrant_embedded_sharding_unsupported", fallback="none")
+            self._partitioning = "none"
+        # Local mode searches the original vectors directly
+        self._quantization = "none" if self._embedded else self._settings.qdrant_quantization
+        self._shard_keys: set[str] = set()
+        self._shard_keys_loaded_at = float("-inf")
+        self._shard_key_lock = asyncio.Lock()
+        self._breaker = get_circuit_breaker("qdrant")
+        self._sparse_enabled = self._settings.hybrid_search_enabled
+        self._bm25 = BM25Encoder(avg_doc_len=self._settings.bm25_avg_doc_len)
+        self._search_params = (
+            models.SearchParams(
+                quantization=models.QuantizationSearchParams(
+                    rescore=self._settings.qdrant_quantization_rescore,
+                    oversampling=self._settings.qdrant_quantization_oversampling,
+                )
+            )
+            if self._quantization != "none"
+            else None
+        )
 
     async def _get_client(self) -> AsyncQdrantClient:
-        """Get or create the Qdrant client."""
-        if self._client is None:
-            self._client = AsyncQdrantClient(url=self._settings.qdrant_url)
+        """Get or create the Qdrant client, ensuring the collection exists once.
+
+        Callers arriving while another one initializes wait for it instead
+        of creating their own client. If the collection check fails, the
+        next call retries it.
+        """
+        if self._client is not None and self._collection_initialized:
+            return self._client
+
+        async with self._init_lock:
+            if self._client is None:
+                self._client = self._create_client()
 
-            # Ensure collection exists
             if not self._collection_initialized:
-                await self._ensure_collection()
+                try:
+                    await self._call(self._ensure_collection)
+                except CircuitOpenError as e:
+                    raise VectorStoreError(f"Qdrant unavailable: {e}") from e
                 self._collection_initialized = True
 
-        return self._client
+            return self._client
+
+    async def _call(self, fn: Callable[[], Awaitable[T]]) -> T:
+        """Run a Qdrant request through the circuit breaker.
+
+        Raises:
+            CircuitOpenError: If Qdrant has been failing and the circuit is open
+        """
+        return await self._breaker.call(fn, _is_qdrant_failure)
+
+    def _create_client(self) -> AsyncQdrantClient:
+        """Create the Qdrant client over the configured transport."""
+        options = _client_options(self._settings)
+        if self._embedded:
+            logger.info("qdrant_client_created", transport="embedded", location=self._settings.qdrant_url)
+        else:
+            logger.info(
+                "qdrant_client_created",
+                transport="grpc" if options["prefer_grpc"] else "rest",
+                timeout_sec=options["timeout"],
+            )
+        return AsyncQdrantClient(**options)
 
     async def _ensure_collection(self) -> None:
         """Ensure the collection exists with proper configuration."""
-        client = await self._get_client() if self._client else AsyncQdrantClient(url=self._settings.qdrant_url)
-
         if self._client is None:
-            self._client = client
+            self._client = self._create_client()
+        client = self._client
 
         collection_name = self._settings.qdrant_collection
+        quantization = _quantization_config(self._quantization)
 
         try:
             # Check if collection exists
@@ -71,6 +335,23 @@ class QdrantVectorStore:
                     vectors_config=models.VectorParams(
                         size=self._settings.embedding_dimension,
                         distance=models.Distance.COSINE,
+                        # Originals are only read to rescore quantized candidates
+                        on_disk=quantization is not None and self._settings.qdrant_vectors_on_disk,
+                    ),
+                    quantization_config=quantization,
+                    # One shard per tenant, created on first upsert
+                    sharding_method=(
+                        models.ShardingMethod.CUSTOM if self._partitioning == "shards" else None
+                    ),
+                    # Per-tenant HNSW graphs alongside the global one
+                    hnsw_config=(
+                        models.HnswConfigDiff(payload_m=16) if self._partitioning == "payload" else None
+                    ),
+                    # BM25 term weights; Qdrant applies collection-wide IDF
+                    sparse_vectors_config=(
+                        {SPARSE_VECTOR_NAME: models.SparseVectorParams(modifier=models.Modifier.IDF)}
+                        if self._sparse_enabled
+                        else None
                     ),
                     # Payload indexes for filtering
                     optimizers_config=models.OptimizersConfigDiff(
@@ -82,7 +363,7 @@ class QdrantVectorStore:
                 await client.create_payload_index(
                     collection_name=collection_name,
                     field_name="company_id",
-                    field_schema=models.PayloadSchemaType.KEYWORD,
+                    field_schema=self._company_index_schema(),
                 )
                 await client.create_payload_index(
                     collection_name=collection_name,
@@ -97,10 +378,148 @@ class QdrantVectorStore:
 
                 logger.info("qdrant_collection_created", collection=collection_name)
 
+            else:
+                info = await client.get_collection(collection_name)
+                current = _quantization_mode(info.config.quantization_config)
+                if current != self._quantization:
+                    # Qdrant rebuilds the quantized index in the background
+                    logger.info(
+                        "qdrant_collection_quantization_changed",
+                        collection=collection_name,
+                        previous=current,
+                        quantization=self._quantization,
+                    )
+                    await client.update_collection(
+                        collection_name=collection_name,
+                        quantization_config=quantization or models.Disabled.DISABLED,
+                    )
+
+                await self._sync_partitioning(client, info)
+
+                if self._sparse_enabled and SPARSE_VECTOR_NAME not in (
+                    info.config.params.sparse_vectors or {}
+                ):
+                    # Collections created before hybrid search have no sparse
+                    # vector; recreate and re-ingest to enable it
+                    logger.warning(
+                        "qdrant_collection_missing_sparse_vectors",
+                        collection=collection_name,
+                    )
+                    self._sparse_enabled = False
+
         except Exception as e:
             logger.error("qdrant_collection_setup_failed", error=str(e))
             raise VectorStoreError(f"Failed to setup Qdrant collection: {e}") from e
 
+    def _company_index_schema(self) -> models.PayloadSchemaType | models.KeywordIndexParams:
+        """Return the company_id payload index schema for the partitioning mode."""
+        if self._partitioning == "payload":
+            return models.KeywordIndexParams(type=models.KeywordIndexType.KEYWORD, is_tenant=True)
+        return models.PayloadSchemaType.KEYWORD
+
+    async def _sync_partitioning(self, client: AsyncQdrantClient, info: Any) -> None:
+        """Reconcile the partitioning mode with an existing collection.
+
+        The payload mode is applied in place. Custom sharding is fixed at
+        collection creation, so a collection's own sharding wins over the
+        setting (upserts into a custom-sharded collection need shard keys).
+        """
+        collection_name = self._settings.qdrant_collection
+        sharded = info.config.params.sharding_method == models.ShardingMethod.CUSTOM
+
+        if sharded != (self._partitioning == "shards"):
+            logger.warning(
+                "qdrant_collection_partitioning_mismatch",
+                collection=collection_name,
+                setting=self._partitioning,
+                collection_sharded=sharded,
+            )
+            self._partitioning = "shards" if sharded else "none"
+
+        if self._partitioning == "shards":
+            await self._load_shard_keys(client)
+
+        elif self._partitioning == "payload":
+            schema = (info.payload_schema or {}).get("company_id")
+            params = getattr(schema, "params", None)
+            if not getattr(params, "is_tenant", False):
+                logger.info("qdrant_collection_tenant_index_created", collection=collection_name)
+                await client.create_payload_index(
+                    collection_name=collection_name,
+                    field_name="company_id",
+                    field_schema=self._company_index_schema(),
+                )
+                await client.update_collection(
+                    collection_name=collection_name,
+                    hnsw_config=models.HnswConfigDiff(payload_m=16),
+                )
+
+    async def _load_shard_keys(self, client: AsyncQdrantClient) -> None:
+        """Refresh the known tenant shard keys from the cluster info."""
+        response = await client.http.distributed_api.collection_cluster_info(
+            collection_name=self._settings.qdrant_collection,
+        )
+        info = response.result
+        self._shard_keys = {
+            str(shard.shard_key)
+            for shard in [*(info.local_shards or []), *(info.remote_shards or [])]
+            if shard.shard_key is not None
+        }
+        self._shard_keys_loaded_at = time.monotonic()
+
+    async def _ensure_shard_key(self, client: AsyncQdrantClient, shard_key: str) -> None:
+        """Create a tenant's shard on first use."""
+        if shard_key in self._shard_keys:
+            return
+        async with self._shard_key_lock:
+            if shard_key in self._shard_keys:
+                return
+            await self._load_shard_keys(client)
+            if shard_key not in self._shard_keys:
+                await client.create_shard_key(
+                    collection_name=self._settings.qdrant_collection,
+                    shard_key=shard_key,
+                )
+                logger.info("qdrant_shard_key_created", shard_key=shard_key)
+                self._shard_keys.add(shard_key)
+
+    def _shard_selector(self, company_id: str | None) -> str | None:
+        """Return the shard key a tenant-scoped request is routed to."""
+        if self._partitioning == "shards" and company_id:
+            return company_id
+        return None
+
+    async def _missing_shard(self, client: AsyncQdrantClient, company_id: str | None) -> bool:
+        """Whether a tenant-scoped request targets a tenant with no shard yet.
+
+        Another replica may have created the shard since the last refresh,
+        so an unknown tenant triggers a refresh, but at most once per
+        SHARD_KEY_REFRESH_SEC.
+        """
+        shard_key = self._shard_selector(company_id)
+        if shard_key is None or shard_key in self._shard_keys:
+            return False
+        if self._shard_keys_stale():
+            async with self._shard_key_lock:
+                # Concurrent requests wait for one refresh instead of each doing one
+                if shard_key not in self._shard_keys and self._shard_keys_stale():
+                    await self._load_shard_keys(client)
+        return shard_key not in self._shard_keys
+
+    def _shard_keys_stale(self) -> bool:
+        """Whether the shard key list is old enough to refresh for an unknown tenant."""
+        return time.monotonic() - self._shard_keys_loaded_at >= SHARD_KEY_REFRESH_SEC
+
+    @property
+    def partitioning(self) -> str:
+        """Active tenant partitioning mode ("none", "payload" or "shards")."""
+        return self._partitioning
+
+    @property
+    def sparse_enabled(self) -> bool:
+        """Whether chunks are indexed with BM25 sparse vectors."""
+        return self._sparse_enabled
+
     async def health_check(self) -> bool:
         """Check if Qdrant is healthy and accessible.
 
@@ -113,7 +532,7 @@ class QdrantVectorStore:
         try:
             client = await self._get_client()
             # Simple health check - get collection info
-            await client.get_collection(self._settings.qdrant_collection)
+            await self._call(lambda: client.get_collection(self._settings.qdrant_collection))
             return True
         except Exception as e:
             raise VectorStoreError(f"Qdrant health check failed: {e}") from e
@@ -145,23 +564,23 @@ class QdrantVectorStore:
         # Create points for upsert
         points = [
             models.PointStruct(
-                id=str(uuid.uuid4()),
-                vector=embedding,
+                id=_point_id(chunk),
+                vector=(
+                    {"": embedding, SPARSE_VECTOR_NAME: self._bm25.encode_document(chunk.text)}
+                    if self._sparse_enabled
+                    else embedding
+                ),
                 payload=chunk.to_dict(),
             )
             for chunk, embedding in zip(chunks, embeddings, strict=False)
         ]
 
         try:
-            # Upsert in batches of 100
-            batch_size = 100
-            for i in range(0, len(points), batch_size):
-                batch = points[i : i + batch_size]
-                await client.upsert(
-                    collection_name=self._settings.qdrant_collection,
-                    points=batch,
-                    wait=True,
-                )
+            await self._upsert_points(client, points)
+
+            cache = get_search_result_cache()
+            for company_id in {chunk.company_id for chunk in chunks}:
+                cache.invalidate(company_id)
 
             logger.info(
                 "chunks_upserted",
@@ -173,22 +592,140 @@ class QdrantVectorStore:
             logger.error("qdrant_upsert_failed", error=str(e))
             raise VectorStoreError(f"Failed to upsert chunks: {e}") from e
 
+    async def _upsert_points(
+        self,
+        client: AsyncQdrantClient,
+        points: list[models.PointStruct],
+    ) -> None:
+        """Upsert points in batches, routed to tenant shards when sharded."""
+        groups: dict[str | None, list[models.PointStruct]] = defaultdict(list)
+        for point in points:
+            shard_key = None
+            if self._partitioning == "shards":
+                shard_key = (point.payload or {}).get("company_id") or SHARED_SHARD_KEY
+            groups[shard_key].append(point)
+
+        for shard_key, group in groups.items():
+            if shard_key is not None:
+                await self._ensure_shard_key(client, shard_key)
+            for i in range(0, len(group), UPSERT_BATCH_SIZE):
+                batch = group[i : i + UPSERT_BATCH_SIZE]
+                await self._call(
+                    lambda batch=batch, shard_key=shard_key: client.upsert(
+                        collection_name=self._settings.qdrant_collection,
+                        points=batch,
+                        shard_key_selector=shard_key,
+                        wait=True,
+                    )
+                )
+
+    def _query_request(
+        self,
+        query_embedding: list[float] | None,
+        top_k: int = 5,
+        company_id: str | None = None,
+        doc_type: str | None = None,
+        score_threshold: float = 0.0,
+        mode: str = "dense",
+        query_text: str | None = None,
+        with_vectors: bool = False,
+    ) -> models.QueryRequest | None:
+        """Build a Query API request for the given retrieval mode.
+
+        Returns:
+            QueryRequest, or None if the query has no searchable terms
+        """
+        query_filter = _build_filter(company_id, doc_type)
+        shard_key = self._shard_selector(company_id)
+
+        sparse_query = None
+        if mode != "dense":
+            if not self._sparse_enabled:
+                if mode == "sparse":
+                    raise VectorStoreError("Sparse retrieval is not enabled for this collection")
+                mode = "dense"
+            else:
+                sparse_query = self._bm25.encode_query(query_text or "")
+                if not sparse_query.indices:
+                    sparse_query = None
+
+        if mode == "sparse" or query_embedding is None:
+            if sparse_query is None:
+                return None
+            # BM25 scores are unbounded, so the cosine threshold does not apply
+            return models.QueryRequest(
+                shard_key=shard_key,
+                query=sparse_query,
+                using=SPARSE_VECTOR_NAME,
+                filter=query_filter,
+                limit=top_k,
+                with_payload=True,
+                with_vector=with_vectors,
+            )
+
+        if mode == "dense" or sparse_query is None:
+            return models.QueryRequest(
+                shard_key=shard_key,
+                query=query_embedding,
+                filter=query_filter,
+                params=self._search_params,
+                score_threshold=score_threshold,
+                limit=top_k,
+                with_payload=True,
+                with_vector=with_vectors,
+            )
+
+        # Hybrid: fuse dense and BM25 candidates with reciprocal-rank fusion.
+        # The threshold gates dense candidates; fused RRF scores are rank-based.
+        prefetch_limit = top_k * self._settings.hybrid_prefetch_factor
+        return models.QueryRequest(
+            shard_key=shard_key,
+            prefetch=[
+                models.Prefetch(
+                    query=query_embedding,
+                    filter=query_filter,
+                    params=self._search_params,
+                    score_threshold=score_threshold,
+                    limit=prefetch_limit,
+                ),
+                models.Prefetch(
+                    query=sparse_query,
+                    using=SPARSE_VECTOR_NAME,
+                    filter=query_filter,
+                    limit=prefetch_limit,
+                ),
+            ],
+            query=models.FusionQuery(fusion=models.Fusion.RRF),
+            filter=query_filter,
+            limit=top_k,
+            with_payload=True,
+            with_vector=with_vectors,
+        )
+
     async def search(
         self,
-        query_embedding: list[float],
+        query_embedding: list[float] | None,
         top_k: int = 5,
         company_id: str | None = None,
         doc_type: str | None = None,
         score_threshold: float = 0.0,
+        mode: str = "dense",
+        query_text: str | None = None,
+        with_vectors: bool = False,
     ) -> list[dict[str, Any]]:
         """Search for similar chunks.
 
         Args:
-            query_embedding: Query embedding vector
+            query_embedding: Query embedding vector (may be None in sparse mode)
             top_k: Number of results to return
             company_id: Optional company filter
             doc_type: Optional document type filter
-            score_threshold: Minimum similarity score (0-1)
+            score_threshold: Minimum similarity score (0-1); applies to dense
+                similarity only
+            mode: "dense" (E5 similarity), "sparse" (BM25) or "hybrid"
+                (both, fused with RRF)
+            query_text: Raw query text (required for sparse and hybrid)
+            with_vectors: Include each chunk's dense vector under "vector"
 
         Returns:
             List of matching chunks with scores
@@ -198,53 +735,188 @@ class QdrantVectorStore:
         """
         client = await self._get_client()
 
-        # Build filter conditions
-        filter_conditions = []
+        try:
+            if await self._missing_shard(client, company_id):
+                return []
 
-        if company_id:
-            filter_conditions.append(
-                models.FieldCondition(
-                    key="company_id",
-                    match=models.MatchValue(value=company_id),
+            if mode == "dense":
+                results = await self._call(
+                    lambda: client.search(
+                        collection_name=self._settings.qdrant_collection,
+                        query_vector=query_embedding,
+                        shard_key_selector=self._shard_selector(company_id),
+                        limit=top_k,
+                        query_filter=_build_filter(company_id, doc_type),
+                        score_threshold=score_threshold,
+                        with_vectors=with_vectors,
+                        search_params=self._search_params,
+                        timeout=self._settings.qdrant_search_timeout_sec,
+                    )
                 )
+                return [_format_result(result, with_vectors) for result in results]
+
+            request = self._query_request(
+                query_embedding,
+                top_k,
+                company_id,
+                doc_type,
+                score_threshold,
+                mode,
+                query_text,
+                with_vectors,
             )
+            if request is None:
+                return []
 
-        if doc_type:
-            filter_conditions.append(
-                models.FieldCondition(
-                    key="doc_type",
-                    match=models.MatchValue(value=doc_type),
+            response = await self._call(
+                lambda: client.query_points(
+                    collection_name=self._settings.qdrant_collection,
+                    query=request.query,
+                    prefetch=request.prefetch,
+                    using=request.using,
+                    query_filter=request.filter,
+                    search_params=request.params,
+                    shard_key_selector=request.shard_key,
+                    score_threshold=request.score_threshold,
+                    limit=request.limit,
+                    with_payload=True,
+                    with_vectors=with_vectors,
+                    timeout=self._settings.qdrant_search_timeout_sec,
                 )
             )
+            return [_format_result(point, with_vectors) for point in response.points]
+
+        except VectorStoreError:
+            raise
+        except CircuitOpenError as e:
+            raise VectorStoreError(f"Search failed: {e}") from e
+        except Exception as e:
+            logger.error("qdrant_search_failed", error=str(e), mode=mode)
+            raise VectorStoreError(f"Search failed: {e}") from e
+
+    async def search_batch(
+        self,
+        queries: list[dict[str, Any]],
+    ) -> list[list[dict[str, Any]] | VectorStoreError]:
+        """Run several searches in one Qdrant batch request.
+
+        If the batch request fails, each query is retried on its own so a
+        single bad query does not fail the others.
+
+        Args:
+            queries: One dict per query with the keyword arguments of
+                search() (query_embedding, top_k, company_id, doc_type,
+                score_threshold, mode, query_text, with_vectors)
 
-        # Create filter if conditions exist
-        query_filter = None
-        if filter_conditions:
-            query_filter = models.Filter(must=filter_conditions)
+        Returns:
+            Per-query results in input order; failed queries are returned
+            as a VectorStoreError instead of a result list
+        """
+        if not queries:
+            return []
+
+        client = await self._get_client()
+
+        if self._partitioning == "shards":
+            # Tenants without a shard have no chunks; keep them out of the batch
+            try:
+                missing = [await self._missing_shard(client, q.get("company_id")) for q in queries]
+            except Exception as e:
+                raise VectorStoreError(f"Failed to read tenant shards: {e}") from e
+            if any(missing):
+                present = iter(
+                    await self.search_batch([q for q, m in zip(queries, missing, strict=True) if not m])
+                )
+                return [[] if m else next(present) for m in missing]
+
+        if any(query.get("mode", "dense") != "dense" for query in queries):
+            return await self._query_batch(client, queries)
+
+        requests = [
+            models.SearchRequest(
+                shard_key=self._shard_selector(query.get("company_id")),
+                vector=query["query_embedding"],
+                limit=query.get("top_k", 5),
+                filter=_build_filter(query.get("company_id"), query.get("doc_type")),
+                score_threshold=query.get("score_threshold", 0.0),
+                params=self._search_params,
+                with_payload=True,
+                with_vector=query.get("with_vectors", False),
+            )
+            for query in queries
+        ]
 
         try:
-            results = await client.search(
-                collection_name=self._settings.qdrant_collection,
-                query_vector=query_embedding,
-                limit=top_k,
-                query_filter=query_filter,
-                score_threshold=score_threshold,
+            batches = await self._call(
+                lambda: client.search_batch(
+                    collection_name=self._settings.qdrant_collection,
+                    requests=requests,
+                    timeout=self._settings.qdrant_search_timeout_sec,
+                )
             )
+            return [
+                [_format_result(result, query.get("with_vectors", False)) for result in batch]
+                for query, batch in zip(queries, batches, strict=True)
+            ]
 
+        except Exception as e:
+            logger.warning("qdrant_search_batch_failed", error=str(e), queries=len(queries))
+
+        return await self._search_each(queries)
+
+    async def _query_batch(
+        self,
+        client: AsyncQdrantClient,
+        queries: list[dict[str, Any]],
+    ) -> list[list[dict[str, Any]] | VectorStoreError]:
+        """Run mixed-mode queries as one Query API batch."""
+        try:
+            requests = [self._query_request(**query) for query in queries]
+            sendable = [request for request in requests if request is not None]
+            responses = iter(
+                await self._call(
+                    lambda: client.query_batch_points(
+                        collection_name=self._settings.qdrant_collection,
+                        requests=sendable,
+                        timeout=self._settings.qdrant_search_timeout_sec,
+                    )
+                )
+                if sendable
+                else []
+            )
             return [
-                {
-                    "text": result.payload.get("text", "") if result.payload else "",
-                    "source": result.payload.get("source", "") if result.payload else "",
-                    "doc_type": result.payload.get("doc_type", "") if result.payload else "",
-                    "score": result.score,
-                    "company_id": result.payload.get("company_id") if result.payload else None,
-                }
-                for result in results
+                [
+                    _format_result(point, query.get("with_vectors", False))
+                    for point in next(responses).points
+                ]
+                if request is not None
+                else []
+                for query, request in zip(queries, requests, strict=True)
             ]
 
         except Exception as e:
-            logger.error("qdrant_search_failed", error=str(e))
-            raise VectorStoreError(f"Search failed: {e}") from e
+            logger.warning("qdrant_query_batch_failed", error=str(e), queries=len(queries))
+
+        return await self._search_each(queries)
+
+    async def _search_each(
+        self,
+        queries: list[dict[str, Any]],
+    ) -> list[list[dict[str, Any]] | VectorStoreError]:
+        """Run queries individually, capturing each failure."""
+        outcomes = await asyncio.gather(
+            *(self.search(**query) for query in queries),
+            return_exceptions=True,
+        )
+        results: list[list[dict[str, Any]] | VectorStoreError] = []
+        for outcome in outcomes:
+            if isinstance(outcome, VectorStoreError):
+                results.append(outcome)
+            elif isinstance(outcome, BaseException):
+                results.append(VectorStoreError(f"Search failed: {outcome}"))
+            else:
+                results.append(outcome)
+        return results
 
     async def delete_by_source(self, source: str, company_id: str | None = None) -> int:
         """Delete all chunks from a specific source.
@@ -277,14 +949,25 @@ class QdrantVectorStore:
             )
 
         try:
-            result = await client.delete(
-                collection_name=self._settings.qdrant_collection,
-                points_selector=models.FilterSelector(
-                    filter=models.Filter(must=conditions),
-                ),
-                wait=True,
+            if await self._missing_shard(client, company_id):
+                return 0
+
+            result = await self._call(
+                lambda: client.delete(
+                    collection_name=self._settings.qdrant_collection,
+                    points_selector=models.FilterSelector(
+                        filter=models.Filter(must=conditions),
+                    ),
+                    shard_key_selector=self._shard_selector(company_id),
+                    wait=True,
+                )
             )
 
+            if company_id:
+                get_search_result_cache().invalidate(company_id)
+            else:
+                get_search_result_cache().invalidate_all()
+
             logger.info("chunks_deleted", source=source, company_id=company_id)
             return result.status  # type: ignore
 
@@ -292,15 +975,92 @@ class QdrantVectorStore:
             logger.error("qdrant_delete_failed", error=str(e))
             raise VectorStoreError(f"Delete failed: {e}") from e
 
+    async def delete_tenant(self, company_id: str) -> str:
+        """Delete all chunks of a company.
+
+        In shards mode the tenant's shard is dropped; otherwise its points
+        are deleted by company_id filter (served by the tenant index in
+        payload mode).
+
+        Args:
+            company_id: Company to offboard
+
+        Returns:
+            "shard" if a shard was dropped, "filter" if points were deleted
+            by filter, or "none" if the tenant had no shard
+
+        Raises:
+            VectorStoreError: If deletion fails
+        """
+        client = await self._get_client()
+        collection_name = self._settings.qdrant_collection
+
+        try:
+            if self._partitioning == "shards":
+                if await self._missing_shard(client, company_id):
+                    return "none"
+                async with self._shard_key_lock:
+                    await self._call(
+                        lambda: client.delete_shard_key(
+                            collection_name=collection_name,
+                            shard_key=company_id,
+                        )
+                    )
+                    self._shard_keys.discard(company_id)
+                method = "shard"
+            else:
+                await self._call(
+                    lambda: client.delete(
+                        collection_name=collection_name,
+                        points_selector=models.FilterSelector(
+                            filter=_build_filter(company_id, None),
+                        ),
+                        wait=True,
+                    )
+                )
+                method = "filter"
+
+        except Exception as e:
+            logger.error("qdrant_tenant_delete_failed", error=str(e), company_id=company_id)
+            raise VectorStoreError(f"Tenant delete failed: {e}") from e
+
+        get_search_result_cache().invalidate(company_id)
+        logger.info("tenant_deleted", company_id=company_id, method=method)
+        return method
+
+    async def stats(self) -> dict[str, Any]:
+        """Get collection statistics.
+
+        Returns:
+            Collection name, vector/point counts and status
+
+        Raises:
+            VectorStoreError: If the collection cannot be read
+        """
+        client = await self._get_client()
+        try:
+            info = await self._call(lambda: client.get_collection(self._settings.qdrant_collection))
+        except Exception as e:
+            raise VectorStoreError(f"Failed to read collection info: {e}") from e
+
+        return {
+            "collection": self._settings.qdrant_collection,
+            "vectors_count": info.vectors_count,
+            "points_count": info.points_count,
+            "status": info.status.value,
+        }
+
     async def close(self) -> None:
-        """Close the Qdrant client."""
-        if self._client:
-            await self._client.close()
-            self._client = None
+        """Close the Qdrant client (waits for an initialization in progress)."""
+        async with self._init_lock:
+            if self._client:
+                await self._client.close()
+                self._client = None
 
 
 # Singleton instance
 _vector_store: QdrantVectorStore | None = None
+_vector_store_lock = threading.Lock()
 
 
 def get_vector_store() -> QdrantVectorStore:
@@ -311,5 +1071,15 @@ def get_vector_store() -> QdrantVectorStore:
     """
     global _vector_store
     if _vector_store is None:
-        _vector_store = QdrantVectorStore()
+        with _vector_store_lock:
+            if _vector_store is None:
+                _vector_store = QdrantVectorStore()
     return _vector_store
+
+
+async def close_vector_store() -> None:
+    """Close the vector store singleton if it was created (service shutdown)."""
+    global _vector_store
+    store, _vector_store = _vector_store, None
+    if store is not None:
+        await store.close()
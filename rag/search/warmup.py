@@ -0,0 +1,275 @@
+"""Cache warm-up from the app's seed and popular prompts.
+
+The gallery prompts (data/seedPrompts.ts, data/popularSeedPrompts.ts) are
+what most users click first, yet after every deploy the first click on each
+pays the full cold embed + search. The warm-up job loads a prompt list
+(exported to JSON with scripts/export-warmup-prompts.ts, or any file in the
+same format), embeds it in one batched pass, and runs each prompt through
+the /search path so the query-embedding, result and semantic caches hold
+exactly what those clicks will ask for.
+
+It runs in the background at startup, on demand via POST /warmup, and
+again after ingests: every write invalidates the cached results of
+unfiltered searches and of the written tenant, so those targets are
+re-warmed once the ingest burst has settled.
+"""
+
+import asyncio
+import json
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+from pydantic import ValidationError
+
+from config import get_settings
+from embeddings import get_embedding_provider
+from metrics import get_metrics
+from middleware.logging import get_logger
+
+from .routes import SearchRequest, run_search
+
+logger = get_logger(__name__)
+
+
+@dataclass(frozen=True)
+class WarmupPrompt:
+    """A prompt to warm and the tenant it is for (None = every warm-up target)."""
+
+    query: str
+    company_id: str | None = None
+
+
+def load_warmup_prompts(path: str | Path) -> list[WarmupPrompt]:
+    """Load a JSON prompt list.
+
+    The file holds a list of strings, or of objects with a "query" (or
+    "prompt_text") and an optional "company_id", optionally wrapped in
+    {"prompts": [...]}.
+
+    Args:
+        path: JSON file to read
+
+    Returns:
+        Prompts in file order
+
+    Raises:
+        OSError: If the file cannot be read
+        ValueError: If the file is not a prompt list
+    """
+    data = json.loads(Path(path).read_text(encoding="utf-8"))
+    if isinstance(data, dict):
+        data = data.get("prompts")
+    if not isinstance(data, list):
+        raise ValueError("Warm-up file must contain a list of prompts")
+
+    prompts: list[WarmupPrompt] = []
+    for entry in data:
+        if isinstance(entry, str):
+            prompts.append(WarmupPrompt(entry))
+        elif isinstance(entry, dict) and isinstance(entry.get("query") or entry.get("prompt_text"), str):
+            prompts.append(
+                WarmupPrompt(entry.get("query") or entry["prompt_text"], entry.get("company_id"))
+            )
+        else:
+            raise ValueError(f"Invalid warm-up prompt entry: {entry!r}")
+    return prompts
+
+
+class CacheWarmer:
+    """Pre-fills the search caches with a prompt list and keeps them warm."""
+
+    def __init__(
+        self,
+        prompts_path: str | None,
+        company_ids: list[str],
+        concurrency: int,
+        refresh_delay_sec: float,
+    ) -> None:
+        """Initialize the warmer.
+
+        Args:
+            prompts_path: JSON prompt list (None disables warm-up)
+            company_ids: Tenants warmed besides unfiltered searches
+            concurrency: Warm-up searches run at once
+            refresh_delay_sec: Delay before re-warming after an ingest
+        """
+        self._prompts_path = prompts_path
+        self._company_ids = company_ids
+        self._concurrency = concurrency
+        self._refresh_delay_sec = refresh_delay_sec
+        self._prompts: list[WarmupPrompt] | None = None
+        self._pending: set[str | None] = set()
+        self._startup_task: asyncio.Task[Any] | None = None
+        self._refresh_task: asyncio.Task[None] | None = None
+
+    @property
+    def enabled(self) -> bool:
+        """Whether a prompt list is configured."""
+        return self._prompts_path is not None
+
+    def targets(self) -> list[str | None]:
+        """Tenants kept warm (None = unfiltered), including those named by prompts."""
+        prompt_companies = [p.company_id for p in self.prompts() if p.company_id is not None]
+        return list(dict.fromkeys([None, *self._company_ids, *prompt_companies]))
+
+    def prompts(self) -> list[WarmupPrompt]:
+        """Return the configured prompt list, loading it on first use."""
+        if self._prompts is None:
+            self._prompts = []
+            if self._prompts_path is not None:
+                try:
+                    self._prompts = load_warmup_prompts(self._prompts_path)
+                except (OSError, ValueError) as e:
+                    logger.error("cache_warmup_load_failed", path=self._prompts_path, error=str(e))
+        return self._prompts
+
+    async def warm(
+        self,
+        company_ids: list[str | None] | None = None,
+        prompts: list[WarmupPrompt] | None = None,
+    ) -> dict[str, Any]:
+        """Embed and search every prompt for the given tenants.
+
+        Args:
+            company_ids: Tenants to warm (None = every target)
+            prompts: Prompts to warm (None = the configured list)
+
+        Returns:
+            Counts of prompts, searches run, searches already cached,
+            failures, and the duration
+        """
+        if company_ids is None:
+            company_ids = self.targets()
+        if prompts is None:
+            prompts = self.prompts()
+
+        requests, skipped = self._search_requests(prompts, company_ids)
+        started = time.perf_counter()
+
+        if requests and any((r.mode or get_settings().search_mode) != "sparse" for r in requests):
+            # One batched pass fills the query-embedding cache for the searches below
+            texts = list(dict.fromkeys(r.query for r in requests))
+            try:
+                await get_embedding_provider().embed_queries(texts)
+            except Exception as e:
+                logger.warning("cache_warmup_embedding_failed", error=str(e))
+
+        semaphore = asyncio.Semaphore(self._concurrency)
+
+        async def warm_one(search_request: SearchRequest) -> str | None:
+            async with semaphore:
+                try:
+                    _, cache_status = await run_search(search_request)
+                    return cache_status
+                except Exception as e:
+                    logger.warning("cache_warmup_search_failed", query=search_request.query[:100], error=str(e))
+                    return "FAILED"
+
+        statuses = await asyncio.gather(*(warm_one(r) for r in requests))
+        duration_ms = round((time.perf_counter() - started) * 1000, 2)
+
+        stats = {
+            "prompts": len(prompts),
+            "searches": len(requests),
+            "cached": statuses.count("HIT"),
+            "failed": statuses.count("FAILED"),
+            "skipped": skipped,
+            "duration_ms": duration_ms,
+        }
+        metrics = get_metrics()
+        metrics.increment("cache_warmup_runs")
+        metrics.increment("cache_warmup_searches", len(requests))
+        metrics.observe("cache_warmup_duration_ms", duration_ms)
+        logger.info("cache_warmup_completed", company_ids=company_ids, **stats)
+        return stats
+
+    def start(self) -> None:
+        """Warm the caches in the background (service startup)."""
+        if self.enabled and self._startup_task is None:
+            self._startup_task = asyncio.ensure_future(self.warm())
+
+    def schedule_refresh(self, company_id: str | None) -> None:
+        """Re-warm the targets affected by a write to a tenant.
+
+        Writes to any tenant invalidate unfiltered results, so those are
+        always refreshed; the tenant itself only if it is a warm-up target.
+        Refreshes are delayed so an ingest burst triggers a single run.
+
+        Args:
+            company_id: Tenant that was written to (None = shared documents)
+        """
+        if not self.enabled:
+            return
+
+        self._pending.add(None)
+        if company_id in self.targets():
+            self._pending.add(company_id)
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.ensure_future(self._refresh())
+
+    async def _refresh(self) -> None:
+        """Warm pending targets until no ingest has added more."""
+        while self._pending:
+            await asyncio.sleep(self._refresh_delay_sec)
+            company_ids = [c for c in self.targets() if c in self._pending]
+            self._pending.clear()
+            try:
+                await self.warm(company_ids)
+            except Exception as e:
+                logger.error("cache_warmup_refresh_failed", error=str(e))
+
+    async def close(self) -> None:
+        """Cancel background warm-up work."""
+        for task in (self._startup_task, self._refresh_task):
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._pending.clear()
+
+    def _search_requests(
+        self,
+        prompts: list[WarmupPrompt],
+        company_ids: list[str | None],
+    ) -> tuple[list[SearchRequest], int]:
+        """Build the /search requests the app sends for each prompt and tenant.
+
+        Returns:
+            Tuple of (unique requests, prompts skipped as invalid requests)
+        """
+        requests: dict[tuple[str, str | None], SearchRequest] = {}
+        skipped = 0
+        for prompt in prompts:
+            scopes = [prompt.company_id] if prompt.company_id is not None else company_ids
+            for company_id in scopes:
+                if company_id not in company_ids or (prompt.query, company_id) in requests:
+                    continue
+                try:
+                    requests[(prompt.query, company_id)] = SearchRequest(
+                        query=prompt.query,
+                        company_id=company_id,
+                    )
+                except ValidationError:
+                    skipped += 1
+        return list(requests.values()), skipped
+
+
+@lru_cache
+def get_cache_warmer() -> CacheWarmer:
+    """Get the cache warmer (cached singleton).
+
+    Returns:
+        CacheWarmer configured from settings
+    """
+    settings = get_settings()
+    return CacheWarmer(
+        settings.warmup_prompts_path,
+        settings.warmup_company_ids_list,
+        settings.warmup_concurrency,
+        settings.warmup_refresh_delay_sec,
+    )
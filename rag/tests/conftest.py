@@ -13,6 +13,18 @@ os.environ["RAG_INGEST_API_KEY"] = "test-api-key"
 os.environ["RAG_QDRANT_URL"] = "http://localhost:6333"
 os.environ["RAG_LOG_LEVEL"] = "DEBUG"
 os.environ["RAG_PARSER_MODE"] = "lightweight"
+# Parse in-process so tests can patch parsers; process mode is tested explicitly
+os.environ["RAG_PARSE_WORKERS"] = "0"
+os.environ["RAG_INGEST_JOBS_PATH"] = ":memory:"
+# Tests share one process; the result cache is tested with its own instance
+os.environ["RAG_SEARCH_CACHE_SIZE"] = "0"
+# Hedging depends on latency history shared across tests; tested explicitly
+os.environ["RAG_QDRANT_HEDGE_ENABLED"] = "false"
+os.environ["RAG_GEMINI_HEDGE_ENABLED"] = "false"
+# Breakers are process-wide; failure tests would open them for later tests
+os.environ["RAG_CIRCUIT_BREAKER_ENABLED"] = "false"
+# Readiness is probed on demand; the startup warm-up is tested explicitly
+os.environ["RAG_STARTUP_WARMUP_ENABLED"] = "false"
 
 
 @pytest.fixture(scope="session")
@@ -45,18 +57,22 @@ def mock_embedding_provider() -> Generator[AsyncMock, None, None]:
     mock.embed_query = AsyncMock(return_value=[0.1] * 384)
     mock.embed_passage = AsyncMock(return_value=[0.1] * 384)
     mock.embed_passages = AsyncMock(return_value=[[0.1] * 384])
+    mock.embed_passages_with_stats = AsyncMock(return_value=([[0.1] * 384], {}))
+    mock.embed_queries = AsyncMock(side_effect=lambda texts: [[0.1] * 384 for _ in texts])
 
     # Patch at all import locations where the function is used
     with patch("embeddings.get_embedding_provider", return_value=mock):
-        with patch("ingest.routes.get_embedding_provider", return_value=mock):
+        with patch("ingest.pipeline.get_embedding_provider", return_value=mock):
             with patch("search.routes.get_embedding_provider", return_value=mock):
-                yield mock
+                with patch("search.warmup.get_embedding_provider", return_value=mock):
+                    yield mock
 
 
 @pytest.fixture
 def mock_vector_store() -> Generator[AsyncMock, None, None]:
     """Mock vector store for tests."""
     mock = AsyncMock()
+    mock.sparse_enabled = True
     mock.health_check = AsyncMock(return_value=True)
     mock.upsert_chunks = AsyncMock()
     mock.search = AsyncMock(
@@ -71,11 +87,16 @@ def mock_vector_store() -> Generator[AsyncMock, None, None]:
         ]
     )
 
+    mock.search_batch = AsyncMock(
+        side_effect=lambda queries: [mock.search.return_value for _ in queries]
+    )
+
     # Patch at all import locations where the function is used
     with patch("search.store.get_vector_store", return_value=mock):
         with patch("search.routes.get_vector_store", return_value=mock):
-            with patch("ingest.routes.get_vector_store", return_value=mock):
-                yield mock
+            with patch("ingest.pipeline.get_vector_store", return_value=mock):
+                with patch("ingest.routes.get_vector_store", return_value=mock):
+                    yield mock
 
 
 @pytest.fixture
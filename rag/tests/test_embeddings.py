@@ -1,13 +1,53 @@
 """Tests for the embeddings module."""
 
+import asyncio
+import json
+import time
+from collections.abc import Callable
+from pathlib import Path
 from unittest.mock import AsyncMock, MagicMock, patch
 
+import httpx
+import numpy as np
 import pytest
 
+from config import get_settings
 from embeddings.base import EmbeddingProvider
+from embeddings.cloud import CloudEmbeddingProvider
 from embeddings.local import LocalEmbeddingProvider
 
 
+def _cloud_provider(handler: Callable[..., object], **settings: object) -> CloudEmbeddingProvider:
+    """Build a CloudEmbeddingProvider talking to a mock Gemini server."""
+    return CloudEmbeddingProvider(
+        get_settings().model_copy(update={"gemini_api_key": "test-key", **settings}),
+        transport=httpx.MockTransport(handler),
+    )
+
+
+class _FakeEncoder:
+    """Picklable stand-in for the model loaded by spawned embedding workers."""
+
+    def encode(self, sentences: str | list[str], **kwargs: object) -> np.ndarray:
+        texts = [sentences] if isinstance(sentences, str) else sentences
+        if "slow" in texts:
+            time.sleep(0.5)
+        vectors = np.array([[float(len(t)), 1.0] for t in texts], dtype=np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors[0] if isinstance(sentences, str) else vectors
+
+
+def _init_fake_worker(config: object) -> None:
+    """Process-pool initializer installing _FakeEncoder as the worker model."""
+    from embeddings import executor
+
+    executor._worker_model = _FakeEncoder()
+
+
+def _shared_memory_blocks() -> set[str]:
+    return {p.name for p in Path("/dev/shm").glob("psm_*")}
+
+
 class TestEmbeddingProviderInterface:
     """Tests for the EmbeddingProvider interface."""
 
@@ -47,6 +87,26 @@ class TestLocalEmbeddingProvider:
             call_args = mock_sentence_transformer.encode.call_args
             assert call_args[0][0].startswith("query: ")
 
+    @pytest.mark.asyncio
+    async def test_embed_queries_single_forward_pass(
+        self,
+        mock_sentence_transformer: MagicMock,
+    ) -> None:
+        """embed_queries should prefix every query and encode them together."""
+        import numpy as np
+
+        mock_sentence_transformer.encode.return_value = np.array([[0.1] * 384, [0.2] * 384])
+        with patch(
+            "embeddings.local._load_model",
+            return_value=mock_sentence_transformer,
+        ):
+            provider = LocalEmbeddingProvider()
+            vectors = await provider.embed_queries(["first", "second"])
+
+        mock_sentence_transformer.encode.assert_called_once()
+        assert mock_sentence_transformer.encode.call_args[0][0] == ["query: first", "query: second"]
+        assert len(vectors) == 2
+
     @pytest.mark.asyncio
     async def test_embed_passage_adds_prefix(
         self,
@@ -108,6 +168,22 @@ class TestLocalEmbeddingProvider:
             provider._get_model()
             assert provider.dimension == 384
 
+    def test_model_loads_once_across_threads(self, mock_sentence_transformer: MagicMock) -> None:
+        """Concurrent cold encodes on embedding threads should load the model once."""
+        from concurrent.futures import ThreadPoolExecutor
+
+        def slow_load(*args: object) -> MagicMock:
+            time.sleep(0.05)
+            return mock_sentence_transformer
+
+        with patch("embeddings.local._load_model", side_effect=slow_load) as load:
+            provider = LocalEmbeddingProvider()
+            with ThreadPoolExecutor(max_workers=16) as pool:
+                models = list(pool.map(lambda _: provider._get_model(), range(64)))
+
+        load.assert_called_once()
+        assert all(model is mock_sentence_transformer for model in models)
+
     @pytest.mark.asyncio
     async def test_embedding_is_normalized(
         self,
@@ -159,8 +235,9 @@ class TestCloudEmbeddingProvider:
     def test_cloud_dimension(self) -> None:
         """CloudEmbeddingProvider should report correct dimension."""
         with patch("embeddings.cloud.get_settings") as mock_settings:
-            mock_settings.return_value.gemini_api_key = "test-key"
-            mock_settings.return_value.use_cloud_embeddings = True
+            mock_settings.return_value = get_settings().model_copy(
+                update={"gemini_api_key": "test-key"}
+            )
 
             from embeddings.cloud import CloudEmbeddingProvider
 
@@ -180,8 +257,9 @@ class TestCloudEmbeddingProvider:
         mock_client.is_closed = False
 
         with patch("embeddings.cloud.get_settings") as mock_settings:
-            mock_settings.return_value.gemini_api_key = "test-key"
-            mock_settings.return_value.use_cloud_embeddings = True
+            mock_settings.return_value = get_settings().model_copy(
+                update={"gemini_api_key": "test-key"}
+            )
 
             from embeddings.cloud import CloudEmbeddingProvider
 
@@ -194,6 +272,36 @@ class TestCloudEmbeddingProvider:
             call_args = mock_client.post.call_args
             assert call_args[1]["json"]["taskType"] == "RETRIEVAL_QUERY"
 
+    @pytest.mark.asyncio
+    async def test_cloud_embed_queries_uses_batch_endpoint(self) -> None:
+        """embed_queries should send one batch request with RETRIEVAL_QUERY."""
+        mock_response = MagicMock()
+        mock_response.json.return_value = {"embeddings": [{"values": [0.1] * 768}] * 2}
+        mock_response.raise_for_status = MagicMock()
+
+        mock_client = AsyncMock()
+        mock_client.post.return_value = mock_response
+        mock_client.is_closed = False
+
+        with patch("embeddings.cloud.get_settings") as mock_settings:
+            mock_settings.return_value = get_settings().model_copy(
+                update={"gemini_api_key": "test-key"}
+            )
+
+            from embeddings.cloud import CloudEmbeddingProvider
+
+            provider = CloudEmbeddingProvider()
+            provider._client = mock_client
+
+            vectors = await provider.embed_queries(["a", "b"])
+
+        assert len(vectors) == 2
+        mock_client.post.assert_awaited_once()
+        url = mock_client.post.call_args[0][0]
+        requests = mock_client.post.call_args[1]["json"]["requests"]
+        assert url.endswith(":batchEmbedContents")
+        assert {r["taskType"] for r in requests} == {"RETRIEVAL_QUERY"}
+
     @pytest.mark.asyncio
     async def test_cloud_embed_passage_uses_retrieval_document_task(self) -> None:
         """embed_passage should use RETRIEVAL_DOCUMENT task type."""
@@ -207,8 +315,9 @@ class TestCloudEmbeddingProvider:
         mock_client.is_closed = False
 
         with patch("embeddings.cloud.get_settings") as mock_settings:
-            mock_settings.return_value.gemini_api_key = "test-key"
-            mock_settings.return_value.use_cloud_embeddings = True
+            mock_settings.return_value = get_settings().model_copy(
+                update={"gemini_api_key": "test-key"}
+            )
 
             from embeddings.cloud import CloudEmbeddingProvider
 
@@ -221,6 +330,133 @@ class TestCloudEmbeddingProvider:
             assert call_args[1]["json"]["taskType"] == "RETRIEVAL_DOCUMENT"
 
 
+    @pytest.mark.asyncio
+    async def test_cloud_circuit_opens_on_server_errors(self) -> None:
+        """Repeated 503s should open the Gemini circuit; later calls skip the API."""
+        from circuit_breaker import CircuitBreaker, CircuitOpenError
+
+        calls = 0
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            nonlocal calls
+            calls += 1
+            return httpx.Response(503, json={"error": "overloaded"})
+
+        provider = _cloud_provider(handler, gemini_max_retries=0)
+        provider._breaker = CircuitBreaker("test_gemini", window=2, min_calls=2)
+
+        for _ in range(2):
+            with pytest.raises(httpx.HTTPStatusError):
+                await provider.embed_query("test query")
+        with pytest.raises(CircuitOpenError):
+            await provider.embed_query("test query")
+        await provider.close()
+
+        assert calls == 2
+
+
+    @pytest.mark.asyncio
+    async def test_slow_query_is_hedged(self) -> None:
+        """A query slower than the hedge delay should be answered by a second request."""
+        from metrics import get_metrics
+
+        delays = iter([1.0, 0.0])
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            delay = next(delays)
+            await asyncio.sleep(delay)
+            return httpx.Response(200, json={"embedding": {"values": [delay]}})
+
+        before = get_metrics().counter("gemini_query_hedge_wins")
+        provider = _cloud_provider(handler, gemini_hedge_enabled=True)
+        start = time.perf_counter()
+        with patch.object(provider, "_hedge_delay", return_value=0.02):
+            vector = await provider.embed_query("test query")
+        await provider.close()
+
+        assert vector == [0.0]
+        assert time.perf_counter() - start < 0.5
+        assert get_metrics().counter("gemini_query_hedge_wins") - before == 1
+        assert get_metrics().snapshot()["gauges"]["gemini_query_hedge_win_ratio"] > 0
+
+
+class TestCloudBatchDispatch:
+    """Tests for concurrent, rate-limited and retried Gemini batch requests."""
+
+    @pytest.mark.asyncio
+    async def test_batches_run_concurrently_in_order(self) -> None:
+        """Batches should overlap up to the concurrency limit and keep input order."""
+        in_flight = 0
+        max_in_flight = 0
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            nonlocal in_flight, max_in_flight
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            await asyncio.sleep(0.02)
+            in_flight -= 1
+            texts = [r["content"]["parts"][0]["text"] for r in json.loads(request.content)["requests"]]
+            return httpx.Response(200, json={"embeddings": [{"values": [float(t)]} for t in texts]})
+
+        provider = _cloud_provider(handler, gemini_max_concurrency=2)
+        vectors = await provider.embed_passages([str(i) for i in range(250)])
+        await provider.close()
+
+        assert [v[0] for v in vectors] == [float(i) for i in range(250)]
+        assert max_in_flight == 2
+
+    @pytest.mark.asyncio
+    async def test_throttled_batch_is_retried(self) -> None:
+        """A 429 should be retried after backoff instead of failing the ingest."""
+        from metrics import get_metrics
+
+        responses = iter(
+            [
+                httpx.Response(429, headers={"Retry-After": "0"}),
+                httpx.Response(200, json={"embeddings": [{"values": [0.5]}]}),
+            ]
+        )
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            return next(responses)
+
+        before = get_metrics().counter("gemini_retries")
+        provider = _cloud_provider(handler, gemini_retry_base_ms=1)
+        assert await provider.embed_passages(["chunk"]) == [[0.5]]
+        await provider.close()
+
+        assert get_metrics().counter("gemini_retries") - before == 1
+
+    @pytest.mark.asyncio
+    async def test_client_errors_are_not_retried(self) -> None:
+        """A 400 proves the request is wrong; sending it again cannot help."""
+        calls = 0
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            nonlocal calls
+            calls += 1
+            return httpx.Response(400, json={"error": "bad request"})
+
+        provider = _cloud_provider(handler, gemini_retry_base_ms=1)
+        with pytest.raises(httpx.HTTPStatusError):
+            await provider.embed_passages(["chunk"])
+        await provider.close()
+
+        assert calls == 1
+
+    @pytest.mark.asyncio
+    async def test_token_bucket_paces_requests(self) -> None:
+        """Past the burst capacity, requests should be spaced at the refill rate."""
+        from embeddings.rate_limit import TokenBucket
+
+        bucket = TokenBucket(rate_per_sec=50, capacity=1)
+        start = time.perf_counter()
+        waits = [await bucket.acquire() for _ in range(3)]
+
+        assert waits[0] == 0
+        assert time.perf_counter() - start >= 0.035
+
+
 class TestEmbeddingProviderFactory:
     """Tests for get_embedding_provider factory."""
 
@@ -230,25 +466,601 @@ class TestEmbeddingProviderFactory:
             mock_settings.return_value.use_cloud_embeddings = False
             mock_settings.return_value.embedding_model = "intfloat/e5-small-v2"
             mock_settings.return_value.embedding_dimension = 384
+            mock_settings.return_value.query_cache_size = 0
+            mock_settings.return_value.passage_store_path = None
 
-            from embeddings import get_embedding_provider
+            from embeddings import get_embedding_provider, get_passage_store, get_query_cache
             get_embedding_provider.cache_clear()
+            get_query_cache.cache_clear()
+            get_passage_store.cache_clear()
 
             provider = get_embedding_provider()
             assert isinstance(provider, LocalEmbeddingProvider)
 
+        get_query_cache.cache_clear()
+        get_passage_store.cache_clear()
+
     def test_returns_cloud_when_configured(self) -> None:
         """Factory should return cloud provider when configured."""
         with patch("embeddings.get_settings") as mock_settings:
-            mock_settings.return_value.use_cloud_embeddings = True
-            mock_settings.return_value.gemini_api_key = "test-key"
+            mock_settings.return_value = get_settings().model_copy(
+                update={
+                    "use_cloud_embeddings": True,
+                    "gemini_api_key": "test-key",
+                    "query_cache_size": 0,
+                    "passage_store_path": None,
+                }
+            )
 
-            from embeddings import get_embedding_provider
+            from embeddings import get_embedding_provider, get_passage_store, get_query_cache
             from embeddings.cloud import CloudEmbeddingProvider
 
             get_embedding_provider.cache_clear()
+            get_query_cache.cache_clear()
+            get_passage_store.cache_clear()
 
             # Also patch cloud module's get_settings
             with patch("embeddings.cloud.get_settings", mock_settings):
                 provider = get_embedding_provider()
                 assert isinstance(provider, CloudEmbeddingProvider)
+
+        get_query_cache.cache_clear()
+        get_passage_store.cache_clear()
+
+    def test_wraps_provider_with_query_cache(self) -> None:
+        """Factory should wrap the provider when the query cache is enabled."""
+        from embeddings.cache import CachedEmbeddingProvider
+
+        with patch("embeddings.get_settings") as mock_settings:
+            mock_settings.return_value.use_cloud_embeddings = False
+            mock_settings.return_value.query_cache_size = 16
+            mock_settings.return_value.query_cache_ttl_sec = 60.0
+            mock_settings.return_value.query_cache_case_sensitive = False
+            mock_settings.return_value.passage_store_path = None
+
+            from embeddings import get_embedding_provider, get_passage_store, get_query_cache
+            get_embedding_provider.cache_clear()
+            get_query_cache.cache_clear()
+            get_passage_store.cache_clear()
+
+            provider = get_embedding_provider()
+            assert isinstance(provider, CachedEmbeddingProvider)
+            assert isinstance(provider.provider, LocalEmbeddingProvider)
+
+        get_embedding_provider.cache_clear()
+        get_query_cache.cache_clear()
+        get_passage_store.cache_clear()
+
+
+class TestQueryBatcher:
+    """Tests for micro-batching of concurrent query embeddings."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_queries_share_one_batch(self) -> None:
+        """Queries arriving within the window should be encoded together."""
+        import asyncio
+
+        from embeddings.batching import QueryBatcher
+
+        calls: list[list[str]] = []
+
+        async def encode(texts: list[str]) -> list[list[float]]:
+            calls.append(texts)
+            return [[float(len(t))] for t in texts]
+
+        batcher = QueryBatcher(encode, window_ms=20, max_batch_size=32)
+        results = await asyncio.gather(*(batcher.submit("x" * n) for n in range(1, 6)))
+
+        assert len(calls) == 1
+        assert results == [[1.0], [2.0], [3.0], [4.0], [5.0]]
+
+    @pytest.mark.asyncio
+    async def test_max_batch_size_dispatches_early(self) -> None:
+        """A full batch should be dispatched without waiting for the window."""
+        import asyncio
+
+        from embeddings.batching import QueryBatcher
+
+        calls: list[list[str]] = []
+
+        async def encode(texts: list[str]) -> list[list[float]]:
+            calls.append(texts)
+            return [[0.0] for _ in texts]
+
+        batcher = QueryBatcher(encode, window_ms=10_000, max_batch_size=2)
+        await asyncio.wait_for(
+            asyncio.gather(*(batcher.submit(str(i)) for i in range(4))),
+            timeout=1,
+        )
+
+        assert [len(c) for c in calls] == [2, 2]
+
+    @pytest.mark.asyncio
+    async def test_batch_error_propagates_to_every_caller(self) -> None:
+        """An encode failure should be raised in each waiting coroutine."""
+        import asyncio
+
+        from embeddings.batching import QueryBatcher
+
+        async def encode(texts: list[str]) -> list[list[float]]:
+            raise RuntimeError("model crashed")
+
+        batcher = QueryBatcher(encode, window_ms=5, max_batch_size=32)
+        results = await asyncio.gather(
+            batcher.submit("a"),
+            batcher.submit("b"),
+            return_exceptions=True,
+        )
+
+        assert all(isinstance(r, RuntimeError) for r in results)
+
+    @pytest.mark.asyncio
+    async def test_batch_metrics_are_recorded(self) -> None:
+        """Batch size and wait time should be exported as metrics."""
+        import asyncio
+
+        from embeddings.batching import QueryBatcher
+        from metrics import get_metrics
+
+        get_metrics().reset()
+
+        async def encode(texts: list[str]) -> list[list[float]]:
+            return [[0.0] for _ in texts]
+
+        batcher = QueryBatcher(encode, window_ms=5, max_batch_size=32)
+        await asyncio.gather(batcher.submit("a"), batcher.submit("b"))
+
+        histograms = get_metrics().snapshot()["histograms"]
+        assert histograms["embedding_query_batch_size"]["max"] == 2
+        assert histograms["embedding_query_batch_wait_ms"]["count"] == 2
+
+    @pytest.mark.asyncio
+    async def test_local_provider_coalesces_queries(self) -> None:
+        """Concurrent embed_query calls should produce a single encode call."""
+        import asyncio
+
+        import numpy as np
+
+        model = MagicMock()
+        model.get_sentence_embedding_dimension.return_value = 384
+        model.encode.return_value = np.array([[0.1] * 384, [0.2] * 384, [0.3] * 384])
+
+        with patch("embeddings.local._load_model", return_value=model):
+            provider = LocalEmbeddingProvider()
+            results = await asyncio.gather(
+                provider.embed_query("a"),
+                provider.embed_query("b"),
+                provider.embed_query("c"),
+            )
+
+        assert model.encode.call_count == 1
+        assert model.encode.call_args[0][0] == ["query: a", "query: b", "query: c"]
+        assert [r[0] for r in results] == pytest.approx([0.1, 0.2, 0.3])
+
+
+class TestQueryEmbeddingCache:
+    """Tests for the query-embedding cache layer."""
+
+    @pytest.fixture
+    def inner_provider(self) -> AsyncMock:
+        """Mock provider counting model calls."""
+        mock = AsyncMock()
+        mock.model_name = "test-model"
+        mock.dimension = 3
+        mock.embed_query = AsyncMock(return_value=[0.1, 0.2, 0.3])
+        return mock
+
+    def test_normalize_query(self) -> None:
+        """Keys should be NFC-normalized, whitespace-collapsed and case-folded."""
+        from embeddings.cache import normalize_query
+
+        decomposed = "Café   login\n flow "
+        assert normalize_query(decomposed) == "café login flow"
+        assert normalize_query("User Login", case_sensitive=True) == "User Login"
+
+    @pytest.mark.asyncio
+    async def test_hit_skips_model(self, inner_provider: AsyncMock) -> None:
+        """Equivalent queries should only reach the model once."""
+        from embeddings.cache import CachedEmbeddingProvider, QueryEmbeddingCache
+
+        cache = QueryEmbeddingCache(max_size=10, ttl_sec=60)
+        provider = CachedEmbeddingProvider(inner_provider, cache)
+
+        first = await provider.embed_query("User  login flow")
+        second = await provider.embed_query("user login flow")
+
+        assert first == second
+        assert inner_provider.embed_query.await_count == 1
+        inner_provider.embed_query.assert_awaited_with("User  login flow")
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    @pytest.mark.asyncio
+    async def test_keys_include_model_name(self, inner_provider: AsyncMock) -> None:
+        """Vectors from a different model must never be served."""
+        from embeddings.cache import CachedEmbeddingProvider, QueryEmbeddingCache
+
+        cache = QueryEmbeddingCache(max_size=10, ttl_sec=60)
+        await CachedEmbeddingProvider(inner_provider, cache).embed_query("q")
+
+        inner_provider.model_name = "other-model"
+        await CachedEmbeddingProvider(inner_provider, cache).embed_query("q")
+
+        assert inner_provider.embed_query.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_embed_queries_only_sends_distinct_misses(self, inner_provider: AsyncMock) -> None:
+        """Batched queries should reuse cached and duplicate entries."""
+        from embeddings.cache import CachedEmbeddingProvider, QueryEmbeddingCache
+
+        inner_provider.embed_queries = AsyncMock(side_effect=lambda texts: [[float(len(t))] for t in texts])
+        provider = CachedEmbeddingProvider(inner_provider, QueryEmbeddingCache(max_size=10, ttl_sec=60))
+        await provider.embed_query("cached")
+
+        vectors = await provider.embed_queries(["Cached", "new  query", "NEW query"])
+
+        inner_provider.embed_queries.assert_awaited_once_with(["new  query"])
+        assert vectors == [[0.1, 0.2, 0.3], [10.0], [10.0]]
+
+    @pytest.mark.asyncio
+    async def test_provider_embeds_unmodified_query(self, inner_provider: AsyncMock) -> None:
+        """Normalization only builds the key; cased models see the query as sent."""
+        from embeddings.cache import CachedEmbeddingProvider, QueryEmbeddingCache
+
+        inner_provider.embed_queries = AsyncMock(side_effect=lambda texts: [[1.0] for _ in texts])
+        provider = CachedEmbeddingProvider(inner_provider, QueryEmbeddingCache(max_size=10, ttl_sec=60))
+
+        await provider.embed_query("  JWT auth in API Gateway ")
+        await provider.embed_queries(["Kafka  ETL", "GraphQL BFF"])
+
+        inner_provider.embed_query.assert_awaited_once_with("  JWT auth in API Gateway ")
+        inner_provider.embed_queries.assert_awaited_once_with(["Kafka  ETL", "GraphQL BFF"])
+
+    def test_lru_eviction(self) -> None:
+        """Least recently used entries should be evicted at capacity."""
+        from embeddings.cache import QueryEmbeddingCache
+
+        cache = QueryEmbeddingCache(max_size=2, ttl_sec=0)
+        cache.put("a", [1.0])
+        cache.put("b", [2.0])
+        cache.get("a")
+        cache.put("c", [3.0])
+
+        assert cache.get("b") is None
+        assert cache.get("a") == [1.0]
+        assert cache.get("c") == [3.0]
+
+    def test_ttl_expiry(self) -> None:
+        """Entries older than the TTL should be treated as misses."""
+        import time
+
+        from embeddings.cache import QueryEmbeddingCache
+
+        cache = QueryEmbeddingCache(max_size=10, ttl_sec=30)
+        cache.put("old", [1.0], stored_at=time.time() - 60)
+        cache.put("fresh", [2.0])
+
+        assert cache.get("old") is None
+        assert cache.get("fresh") == [2.0]
+        assert len(cache) == 1
+
+    def test_snapshot_roundtrip(self, tmp_path) -> None:
+        """A saved snapshot should restore live entries on load."""
+        import time
+
+        from embeddings.cache import QueryEmbeddingCache
+
+        path = tmp_path / "query_cache.json"
+        cache = QueryEmbeddingCache(max_size=10, ttl_sec=30)
+        cache.put("live", [1.0, 2.0])
+        cache.put("expired", [3.0], stored_at=time.time() - 60)
+        assert cache.save(path) == 1
+
+        restored = QueryEmbeddingCache(max_size=10, ttl_sec=30)
+        assert restored.load(path) == 1
+        assert restored.get("live") == [1.0, 2.0]
+
+    def test_load_missing_or_corrupt_snapshot(self, tmp_path) -> None:
+        """Missing or corrupt snapshots should leave the cache cold."""
+        from embeddings.cache import QueryEmbeddingCache
+
+        cache = QueryEmbeddingCache(max_size=10, ttl_sec=30)
+        assert cache.load(tmp_path / "missing.json") == 0
+
+        corrupt = tmp_path / "corrupt.json"
+        corrupt.write_text("{not json")
+        assert cache.load(corrupt) == 0
+        assert len(cache) == 0
+
+
+class TestPassageEmbeddingStore:
+    """Tests for the content-addressed passage embedding store."""
+
+    @pytest.fixture
+    def inner_provider(self) -> AsyncMock:
+        """Mock provider returning one distinct vector per text."""
+
+        async def embed(texts: list[str]) -> list[list[float]]:
+            return [[float(len(t)), 0.5] for t in texts]
+
+        mock = AsyncMock()
+        mock.model_name = "test-model"
+        mock.PASSAGE_PREFIX = "passage: "
+        mock.embed_passages = AsyncMock(side_effect=embed)
+        return mock
+
+    def test_key_depends_on_model_prefix_and_text(self) -> None:
+        """Content addresses should differ for any differing component."""
+        from embeddings.passage_store import passage_key
+
+        base = passage_key("m", "passage: ", "text")
+        assert base == passage_key("m", "passage: ", "text")
+        assert base != passage_key("other", "passage: ", "text")
+        assert base != passage_key("m", "", "text")
+        assert base != passage_key("m", "passage: ", "text2")
+
+    def test_roundtrip_and_persistence(self, tmp_path) -> None:
+        """Vectors should survive reopening the database as float32."""
+        from embeddings.passage_store import PassageEmbeddingStore
+
+        path = tmp_path / "passages.sqlite3"
+        store = PassageEmbeddingStore(path, max_entries=10)
+        store.put_many({"k1": [0.25, -1.5]})
+        store.close()
+
+        reopened = PassageEmbeddingStore(path, max_entries=10)
+        assert reopened.get_many(["k1", "missing"]) == {"k1": [0.25, -1.5]}
+        reopened.close()
+
+    def test_size_capped_eviction(self) -> None:
+        """Least recently used vectors should be evicted over capacity."""
+        import time
+
+        from embeddings.passage_store import PassageEmbeddingStore
+
+        store = PassageEmbeddingStore(":memory:", max_entries=2)
+        store.put_many({"a": [1.0]})
+        time.sleep(0.01)
+        store.put_many({"b": [2.0]})
+        time.sleep(0.01)
+        store.get_many(["a"])
+        time.sleep(0.01)
+        store.put_many({"c": [3.0]})
+
+        assert len(store) == 2
+        assert set(store.get_many(["a", "b", "c"])) == {"a", "c"}
+
+    @pytest.mark.asyncio
+    async def test_only_misses_reach_the_model(self, inner_provider: AsyncMock) -> None:
+        """Re-embedding should only encode changed texts, deduplicated."""
+        from embeddings.cache import CachedEmbeddingProvider
+        from embeddings.passage_store import PassageEmbeddingStore
+
+        store = PassageEmbeddingStore(":memory:", max_entries=100)
+        provider = CachedEmbeddingProvider(inner_provider, passage_store=store)
+
+        await provider.embed_passages(["alpha", "beta"])
+        vectors, stats = await provider.embed_passages_with_stats(
+            ["alpha", "gamma", "gamma", "beta"]
+        )
+
+        inner_provider.embed_passages.assert_awaited_with(["gamma"])
+        assert vectors == [[5.0, 0.5], [5.0, 0.5], [5.0, 0.5], [4.0, 0.5]]
+        assert stats == {
+            "deduplicated": 1,
+            "cache_hits": 2,
+            "cache_misses": 1,
+            "cache_hit_ratio": pytest.approx(0.6667),
+        }
+
+    @pytest.mark.asyncio
+    async def test_duplicates_deduplicated_without_store(self, inner_provider: AsyncMock) -> None:
+        """Identical texts should be encoded once even without a store."""
+        from embeddings.cache import CachedEmbeddingProvider
+
+        provider = CachedEmbeddingProvider(inner_provider)
+        vectors = await provider.embed_passages(["x", "x", "yy"])
+
+        inner_provider.embed_passages.assert_awaited_once_with(["x", "yy"])
+        assert vectors == [[1.0, 0.5], [1.0, 0.5], [2.0, 0.5]]
+
+
+class TestOnnxEmbeddingProvider:
+    """Tests for the ONNX Runtime local backend (session and tokenizer mocked)."""
+
+    @pytest.fixture
+    def encoder(self):
+        """OnnxSentenceEncoder over a fake session returning fixed token vectors."""
+        import numpy as np
+
+        from embeddings.onnx_runtime import OnnxSentenceEncoder
+
+        def encode_batch(texts: list[str]) -> list[MagicMock]:
+            encodings = []
+            for text in texts:
+                enc = MagicMock()
+                # Second token is padding for short texts
+                enc.ids = [1, 2]
+                enc.attention_mask = [1, 1] if len(text) > 10 else [1, 0]
+                enc.type_ids = [0, 0]
+                encodings.append(enc)
+            return encodings
+
+        tokenizer = MagicMock()
+        tokenizer.encode_batch.side_effect = encode_batch
+
+        def run(_outputs, feeds):
+            batch = feeds["input_ids"].shape[0]
+            tokens = np.array([[3.0, 0.0], [0.0, 4.0]], dtype=np.float32)
+            return [np.repeat(tokens[np.newaxis], batch, axis=0)]
+
+        inputs = []
+        for name in ("input_ids", "attention_mask", "token_type_ids"):
+            inp = MagicMock()
+            inp.name = name
+            inputs.append(inp)
+
+        session = MagicMock()
+        session.get_inputs.return_value = inputs
+        session.run.side_effect = run
+
+        return OnnxSentenceEncoder(session, tokenizer, dimension=2)
+
+    def test_mean_pooling_respects_attention_mask(self, encoder) -> None:
+        """Padding tokens should not contribute to the pooled vector."""
+        import numpy as np
+
+        vectors = encoder.encode(["short", "a much longer text"])
+        np.testing.assert_allclose(vectors[0], [3.0, 0.0])
+        np.testing.assert_allclose(vectors[1], [1.5, 2.0])
+
+    def test_normalization_and_single_text_shape(self, encoder) -> None:
+        """Single texts should return 1-D unit vectors when normalizing."""
+        import numpy as np
+
+        vector = encoder.encode("a much longer text", normalize_embeddings=True)
+        assert vector.shape == (2,)
+        np.testing.assert_allclose(vector, [0.6, 0.8], rtol=1e-6)
+
+    @pytest.mark.asyncio
+    async def test_provider_keeps_e5_prefixes(self, encoder) -> None:
+        """The ONNX provider should apply the same E5 prefixes as torch."""
+        from embeddings.onnx_runtime import OnnxEmbeddingProvider
+
+        with patch("embeddings.onnx_runtime._load_onnx_model", return_value=encoder):
+            provider = OnnxEmbeddingProvider()
+            await provider.embed_query("who owns billing?")
+            await provider.embed_passages(["billing is owned by team payments"])
+
+        texts = [call.args[0] for call in encoder._tokenizer.encode_batch.call_args_list]
+        assert texts[0] == ["query: who owns billing?"]
+        assert texts[1] == ["passage: billing is owned by team payments"]
+        assert provider.dimension == 2
+
+    def test_factory_selects_onnx_backend(self) -> None:
+        """Factory should return the ONNX provider when configured."""
+        from embeddings.onnx_runtime import OnnxEmbeddingProvider
+
+        with patch("embeddings.get_settings") as mock_settings:
+            mock_settings.return_value.use_cloud_embeddings = False
+            mock_settings.return_value.local_embedding_backend = "onnx"
+            mock_settings.return_value.query_cache_size = 0
+            mock_settings.return_value.passage_store_path = None
+
+            from embeddings import get_embedding_provider, get_passage_store, get_query_cache
+            get_embedding_provider.cache_clear()
+            get_query_cache.cache_clear()
+            get_passage_store.cache_clear()
+
+            assert isinstance(get_embedding_provider(), OnnxEmbeddingProvider)
+
+        get_embedding_provider.cache_clear()
+        get_query_cache.cache_clear()
+        get_passage_store.cache_clear()
+
+
+class TestEmbeddingExecutor:
+    """Tests for the dedicated local embedding executor."""
+
+    def test_shared_memory_roundtrip(self) -> None:
+        """Worker results should come back intact through shared memory."""
+        import numpy as np
+
+        from embeddings import executor
+
+        model = MagicMock()
+        model.encode.return_value = np.array([[0.5, -0.25], [1.0, 0.0]], dtype=np.float32)
+
+        with patch.object(executor, "_worker_model", model):
+            name, shape = executor._worker_encode(["a", "b"], 32)
+
+        result = executor._read_shared(name, shape)
+        np.testing.assert_array_equal(result, [[0.5, -0.25], [1.0, 0.0]])
+        assert model.encode.call_args[1]["normalize_embeddings"] is True
+
+        # The parent unlinks the block after reading
+        from multiprocessing.shared_memory import SharedMemory
+
+        with pytest.raises(FileNotFoundError):
+            SharedMemory(name=name)
+
+    @pytest.mark.asyncio
+    @pytest.mark.skipif(not Path("/dev/shm").is_dir(), reason="needs POSIX shared memory")
+    async def test_process_mode_encodes_and_releases_shared_memory(self) -> None:
+        """Spawned workers should encode, and a cancelled encode must not leak its block."""
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        from embeddings.executor import EmbeddingExecutor, WorkerConfig
+
+        config = WorkerConfig("torch", "fake", "", None, False, threads=1)
+        executor = EmbeddingExecutor(config, workers=1)
+        executor._pool.shutdown()
+        executor._pool = ProcessPoolExecutor(
+            max_workers=1,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_fake_worker,
+            initargs=(config,),
+        )
+        try:
+            vectors = await executor.encode(lambda: None, ["ab", "abcd"], 32)
+            expected = np.array([[2.0, 1.0], [4.0, 1.0]]) / np.sqrt([[5.0], [17.0]])
+            np.testing.assert_allclose(vectors, expected, rtol=1e-6)
+
+            before = _shared_memory_blocks()
+            with pytest.raises(TimeoutError):
+                await asyncio.wait_for(executor.encode(lambda: None, ["slow"], 32), timeout=0.05)
+            # The single worker runs this after the abandoned encode has finished
+            await executor.encode(lambda: None, ["x"], 32)
+            assert _shared_memory_blocks() == before
+        finally:
+            executor._pool.shutdown(wait=True)
+
+    @pytest.mark.asyncio
+    async def test_thread_mode_uses_dedicated_thread(self) -> None:
+        """In-process inference should not run on the default executor."""
+        import threading
+
+        import numpy as np
+
+        from embeddings.executor import EmbeddingExecutor, WorkerConfig
+
+        threads: list[str] = []
+
+        def encode(*args, **kwargs):
+            threads.append(threading.current_thread().name)
+            return np.zeros(2, dtype=np.float32)
+
+        model = MagicMock()
+        model.encode.side_effect = encode
+
+        config = WorkerConfig(
+            backend="onnx",
+            model_name="m",
+            cache_dir="/tmp",
+            onnx_model_path=None,
+            onnx_quantize=False,
+            threads=2,
+        )
+        executor = EmbeddingExecutor(config, workers=0)
+        try:
+            await executor.encode(lambda: model, "text", batch_size=1)
+        finally:
+            executor.shutdown()
+
+        assert not executor.uses_processes
+        assert threads[0].startswith("embedding")
+
+    def test_threads_split_across_workers(self) -> None:
+        """Default thread count should divide the cores between workers."""
+        from config import Settings
+        from embeddings.executor import resolve_threads_per_worker
+
+        with patch("embeddings.executor.os.cpu_count", return_value=8):
+            assert resolve_threads_per_worker(
+                Settings(ingest_api_key="k", embedding_workers=4)
+            ) == 2
+            assert resolve_threads_per_worker(
+                Settings(ingest_api_key="k", embedding_workers=2, embedding_threads_per_worker=3)
+            ) == 3
+            assert resolve_threads_per_worker(Settings(ingest_api_key="k")) == 8
@@ -1,11 +1,17 @@
 """Tests for the ingest module."""
 
-from unittest.mock import AsyncMock
+import asyncio
+import time
+from unittest.mock import AsyncMock, patch
 
 import pytest
 from fastapi.testclient import TestClient
+from httpx import AsyncClient
 
+from chunking import Chunk
+from ingest.jobs import STATUS_FAILED, STATUS_QUEUED, STATUS_SUCCEEDED, IngestJobQueue, JobStore
 from ingest.parser import ParserError, parse_document, parse_markdown, parse_text
+from ingest.pipeline import ParseExecutor, ParseJob, parse_and_chunk
 from ingest.validation import (
     ValidationError,
     validate_content,
@@ -255,3 +261,304 @@ class TestIngestAPI:
             headers={"X-API-Key": "test-api-key"},
         )
         assert response.status_code == 200
+
+
+def _noop_parse(job: ParseJob) -> list[Chunk]:
+    """Trivial parse job used to start worker processes."""
+    return []
+
+
+def _cpu_bound_parse(job: ParseJob) -> list[Chunk]:
+    """Stand-in for a large PDF/docling conversion: ~1s of pure CPU."""
+    deadline = time.perf_counter() + 1.0
+    while time.perf_counter() < deadline:
+        sum(i * i for i in range(1000))
+    return parse_and_chunk(job)
+
+
+class TestParsePipeline:
+    """Tests for running parse + chunk off the event loop."""
+
+    @pytest.fixture
+    def job(self) -> ParseJob:
+        """A small lightweight-mode parse job."""
+        return ParseJob(
+            content=b"Service A calls Service B.\n\nService B writes to Postgres.",
+            filename="notes.txt",
+            extension="txt",
+            doc_type="general",
+            company_id="acme",
+            doc_id="doc-1",
+            parser_mode="lightweight",
+            tokenizer_model="intfloat/e5-small-v2",
+        )
+
+    def test_parse_and_chunk_lightweight(self, job: ParseJob) -> None:
+        """The job function should return chunks with document metadata."""
+        chunks = parse_and_chunk(job)
+        assert chunks
+        assert chunks[0].company_id == "acme"
+        assert chunks[0].metadata == {"doc_id": "doc-1"}
+
+    @pytest.mark.asyncio
+    async def test_parse_errors_cross_process_boundary(self) -> None:
+        """ParserError raised in a worker process should reach the caller."""
+        executor = ParseExecutor(workers=1, max_concurrent_jobs=1)
+        bad_job = ParseJob(
+            content=b"data",
+            filename="file.xyz",
+            extension="xyz",
+            doc_type="general",
+            company_id=None,
+            doc_id="doc-2",
+            parser_mode="lightweight",
+            tokenizer_model="intfloat/e5-small-v2",
+        )
+        try:
+            with pytest.raises(ParserError, match="Unsupported"):
+                await executor.run(bad_job)
+        finally:
+            executor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_search_latency_flat_during_large_ingest(
+        self,
+        async_client: AsyncClient,
+        job: ParseJob,
+    ) -> None:
+        """Searches should stay fast while a CPU-heavy parse job runs."""
+
+        executor = ParseExecutor(workers=1, max_concurrent_jobs=1)
+        try:
+            # Start the worker process before measuring
+            await executor.run(job, fn=_noop_parse)
+
+            ingest = asyncio.create_task(executor.run(job, fn=_cpu_bound_parse))
+            latencies: list[float] = []
+            while not ingest.done():
+                start = time.perf_counter()
+                response = await async_client.post(
+                    "/api/v1/rag/search",
+                    json={"query": "service dependencies", "top_k": 3},
+                )
+                latencies.append(time.perf_counter() - start)
+                assert response.status_code == 200
+                await asyncio.sleep(0.1)
+
+            assert await ingest
+        finally:
+            executor.shutdown()
+
+        assert len(latencies) >= 5
+        assert max(latencies) < 0.25
+
+
+def _sample_job(doc_id: str = "doc-job") -> ParseJob:
+    return ParseJob(
+        content=b"Billing service publishes invoices to Kafka.",
+        filename="billing.txt",
+        extension="txt",
+        doc_type="general",
+        company_id="acme",
+        doc_id=doc_id,
+        parser_mode="lightweight",
+        tokenizer_model="intfloat/e5-small-v2",
+    )
+
+
+class TestIngestJobs:
+    """Tests for the asynchronous ingest job queue."""
+
+    def test_job_store_round_trip(self) -> None:
+        """Queued jobs keep their upload until they finish."""
+        store = JobStore(":memory:")
+        store.create("job-1", _sample_job())
+
+        assert store.pending_job_ids() == ["job-1"]
+        assert store.load_job("job-1") == _sample_job()
+        assert store.get("job-1")["status"] == STATUS_QUEUED
+
+        store.update("job-1", status=STATUS_SUCCEEDED, stage="completed", timings_ms={"total": 1.5})
+
+        record = store.get("job-1")
+        assert record["timings_ms"] == {"total": 1.5}
+        assert store.pending_job_ids() == []
+        assert store.load_job("job-1") is None
+        assert store.get("missing") is None
+
+    @pytest.mark.asyncio
+    async def test_interrupted_jobs_resume_on_start(
+        self,
+        tmp_path,
+        mock_embedding_provider: AsyncMock,
+        mock_vector_store: AsyncMock,
+    ) -> None:
+        """Jobs left queued or running by a previous process run on restart."""
+        path = tmp_path / "jobs.sqlite3"
+        store = JobStore(path)
+        store.create("job-1", _sample_job())
+        store.update("job-1", status="running", stage="embedding")
+        store.close()
+
+        queue = IngestJobQueue(JobStore(path), workers=1)
+        await queue.start()
+        try:
+            for _ in range(100):
+                record = await queue.get("job-1")
+                if record["status"] == STATUS_SUCCEEDED:
+                    break
+                await asyncio.sleep(0.01)
+        finally:
+            await queue.stop()
+
+        assert record["status"] == STATUS_SUCCEEDED
+        assert record["chunks_count"] == 1
+        assert set(record["timings_ms"]) >= {"parsing", "embedding", "storing", "total"}
+        mock_vector_store.upsert_chunks.assert_awaited_once()
+
+    def test_claim_is_exclusive_until_lease_expires(self, tmp_path) -> None:
+        """Only one process owns a job; others take over after its lease expires."""
+        path = tmp_path / "jobs.sqlite3"
+        first = JobStore(path, lease_sec=0.2)
+        second = JobStore(path, lease_sec=0.2)
+        first.create("job-1", _sample_job())
+
+        assert first.claim("job-1") is True
+        assert second.claim("job-1") is False
+        assert second.pending_job_ids() == []
+        assert first.renew("job-1") is True
+
+        time.sleep(0.25)
+        assert second.pending_job_ids() == ["job-1"]
+        assert second.claim("job-1") is True
+        assert first.renew("job-1") is False
+
+        second.update("job-1", status=STATUS_SUCCEEDED, stage="completed")
+        assert first.claim("job-1") is False
+
+    @pytest.mark.asyncio
+    async def test_shared_store_runs_each_job_once(
+        self,
+        tmp_path,
+        mock_embedding_provider: AsyncMock,
+        mock_vector_store: AsyncMock,
+    ) -> None:
+        """Queues of several processes resuming the same store run a job once."""
+        path = tmp_path / "jobs.sqlite3"
+        store = JobStore(path)
+        store.create("job-1", _sample_job())
+        store.close()
+
+        queues = [IngestJobQueue(JobStore(path), workers=2) for _ in range(3)]
+        await asyncio.gather(*(queue.start() for queue in queues))
+        try:
+            for _ in range(100):
+                record = await queues[0].get("job-1")
+                if record["status"] == STATUS_SUCCEEDED:
+                    break
+                await asyncio.sleep(0.01)
+        finally:
+            await asyncio.gather(*(queue.stop() for queue in queues))
+
+        assert record["status"] == STATUS_SUCCEEDED
+        mock_vector_store.upsert_chunks.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_stop_requeues_running_jobs(self, tmp_path) -> None:
+        """A graceful stop hands its running jobs back for the next start."""
+        path = tmp_path / "jobs.sqlite3"
+        store = JobStore(path)
+        store.create("job-1", _sample_job())
+        queue = IngestJobQueue(store, workers=1)
+        started = asyncio.Event()
+
+        async def slow_ingest(job: ParseJob, on_stage) -> None:
+            started.set()
+            await asyncio.sleep(10)
+
+        with patch("ingest.jobs.run_ingest", side_effect=slow_ingest):
+            await queue.start()
+            await asyncio.wait_for(started.wait(), 1)
+            await queue.stop()
+
+        assert store.get("job-1")["status"] == STATUS_QUEUED
+        assert JobStore(path).pending_job_ids() == ["job-1"]
+
+    def _wait_for_job(self, client: TestClient, status_url: str) -> dict:
+        for _ in range(100):
+            data = client.get(status_url, headers={"X-API-Key": "test-api-key"}).json()
+            if data["status"] in (STATUS_SUCCEEDED, STATUS_FAILED):
+                return data
+            time.sleep(0.01)
+        raise AssertionError("ingest job did not finish")
+
+    def test_async_ingest_returns_job_id(self, test_client: TestClient) -> None:
+        """mode=async should return 202 and a pollable job."""
+        response = test_client.post(
+            "/api/v1/rag/ingest?mode=async",
+            files={"file": ("test.txt", b"Async document content.", "text/plain")},
+            data={"doc_type": "general"},
+            headers={"X-API-Key": "test-api-key"},
+        )
+        assert response.status_code == 202
+        accepted = response.json()
+        assert accepted["status_url"] == f"/api/v1/rag/ingest/jobs/{accepted['job_id']}"
+
+        job = self._wait_for_job(test_client, accepted["status_url"])
+        assert job["status"] == STATUS_SUCCEEDED
+        assert job["doc_id"] == accepted["doc_id"]
+        assert job["chunks_count"] == 1
+
+    def test_async_ingest_reports_failed_stage(
+        self,
+        test_client: TestClient,
+        mock_vector_store: AsyncMock,
+    ) -> None:
+        """A failing stage should be recorded with its error."""
+        mock_vector_store.upsert_chunks.side_effect = RuntimeError("qdrant down")
+
+        response = test_client.post(
+            "/api/v1/rag/ingest?mode=async",
+            files={"file": ("test.txt", b"Async document content.", "text/plain")},
+            data={"doc_type": "general"},
+            headers={"X-API-Key": "test-api-key"},
+        )
+        job = self._wait_for_job(test_client, response.json()["status_url"])
+
+        assert job["status"] == STATUS_FAILED
+        assert job["stage"] == "storing"
+        assert "qdrant down" in job["error"]
+
+    def test_unknown_job_returns_404(self, test_client: TestClient) -> None:
+        """Polling an unknown job should return 404."""
+        response = test_client.get(
+            "/api/v1/rag/ingest/jobs/does-not-exist",
+            headers={"X-API-Key": "test-api-key"},
+        )
+        assert response.status_code == 404
+
+
+class TestTenantOffboarding:
+    """Tests for the tenant delete endpoint."""
+
+    def test_delete_tenant_requires_auth(self, test_client: TestClient) -> None:
+        """Tenant deletion should require the API key."""
+        response = test_client.delete("/api/v1/rag/tenants/acme")
+        assert response.status_code == 401
+
+    def test_delete_tenant(
+        self,
+        test_client: TestClient,
+        mock_vector_store: AsyncMock,
+    ) -> None:
+        """Tenant deletion should report how the tenant was removed."""
+        mock_vector_store.delete_tenant.return_value = "shard"
+
+        response = test_client.delete(
+            "/api/v1/rag/tenants/acme",
+            headers={"X-API-Key": "test-api-key"},
+        )
+
+        assert response.status_code == 200
+        assert response.json() == {"company_id": "acme", "method": "shard"}
+        mock_vector_store.delete_tenant.assert_awaited_once_with("acme")
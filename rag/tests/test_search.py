@@ -1,10 +1,15 @@
 """Tests for the search module."""
 
+import asyncio
+import time
 from unittest.mock import AsyncMock, patch
 
 import pytest
 from fastapi.testclient import TestClient
+from httpx import AsyncClient
 
+from config import get_settings
+from readiness import ReadinessProber
 from search.store import QdrantVectorStore, VectorStoreError
 
 
@@ -117,9 +122,1299 @@ class TestSearchAPI:
         assert "unavailable" in response.json()["detail"].lower()
 
 
+class TestSparseFallback:
+    """Tests for degrading to BM25 when embeddings are unavailable."""
+
+    def test_embedding_timeout_degrades_to_sparse(
+        self,
+        test_client: TestClient,
+        mock_embedding_provider: AsyncMock,
+        mock_vector_store: AsyncMock,
+    ) -> None:
+        """An embedding timeout should serve keyword results, not 503."""
+        mock_embedding_provider.embed_query.side_effect = TimeoutError()
+
+        response = test_client.post(
+            "/api/v1/rag/search",
+            json={"query": "auth-service tokens", "mode": "hybrid"},
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["degraded"] is True
+        assert data["mode"] == "sparse"
+        call_kwargs = mock_vector_store.search.call_args.kwargs
+        assert call_kwargs["mode"] == "sparse"
+        assert call_kwargs["query_text"] == "auth-service tokens"
+
+
+class TestReranker:
+    """Tests for cross-encoder reranking under a time budget."""
+
+    CANDIDATES = [
+        {"text": "weak match", "source": "a.md", "doc_type": "general", "score": 0.9},
+        {"text": "best match", "source": "b.md", "doc_type": "general", "score": 0.8},
+        {"text": "good match", "source": "c.md", "doc_type": "general", "score": 0.7},
+    ]
+
+    @staticmethod
+    def _score(query: str, texts: list[str]) -> list[float]:
+        ranking = {"best match": 3.0, "good match": 2.0, "weak match": -1.0}
+        return [ranking.get(text, 0.0) for text in texts]
+
+    @pytest.mark.asyncio
+    async def test_rerank_orders_by_cross_encoder_score(self) -> None:
+        """The best cross-encoder scores should win over vector order."""
+        from search.rerank import Reranker
+
+        reranker = Reranker(self._score, budget_ms=1000)
+        try:
+            results, stats = await reranker.rerank("query", self.CANDIDATES, top_k=2)
+        finally:
+            reranker.shutdown()
+
+        assert [r["text"] for r in results] == ["best match", "good match"]
+        assert results[0]["rerank_score"] == 3.0
+        assert stats["reranked"] is True
+        assert stats["score_delta"] > 0
+        assert stats["displaced"] == 2
+
+    @pytest.mark.asyncio
+    async def test_warm_up_loads_model_outside_request_budget(self) -> None:
+        """A slow first load during warm-up should not cost the first request its rerank."""
+        from search.rerank import Reranker
+
+        loaded = False
+
+        def lazy_score(query: str, texts: list[str]) -> list[float]:
+            nonlocal loaded
+            if not loaded:
+                time.sleep(0.1)  # model load
+                loaded = True
+            return self._score(query, texts)
+
+        reranker = Reranker(lazy_score, budget_ms=50)
+        try:
+            assert await reranker.warm_up() >= 100
+            results, stats = await reranker.rerank("query", self.CANDIDATES, top_k=2)
+        finally:
+            reranker.shutdown()
+
+        assert stats["reranked"] is True
+        assert results[0]["text"] == "best match"
+
+    @pytest.mark.asyncio
+    async def test_scoring_error_returns_vector_order(self) -> None:
+        """A model that fails to load or score should not fail the search."""
+        from metrics import get_metrics
+        from search.rerank import Reranker
+
+        def broken_score(query: str, texts: list[str]) -> list[float]:
+            raise OSError("model files missing")
+
+        before = get_metrics().counter("rerank_failed")
+        reranker = Reranker(broken_score, budget_ms=1000)
+        try:
+            results, stats = await reranker.rerank("q", self.CANDIDATES, top_k=2)
+        finally:
+            reranker.shutdown()
+
+        assert results == self.CANDIDATES[:2]
+        assert stats["reranked"] is False and stats["failed"] is True
+        assert get_metrics().counter("rerank_failed") - before == 1
+
+    @pytest.mark.asyncio
+    async def test_budget_exceeded_returns_vector_order(self) -> None:
+        """A slow reranker should not delay the response past its budget."""
+        from search.rerank import Reranker
+
+        calls: list[str] = []
+
+        def slow_score(query: str, texts: list[str]) -> list[float]:
+            calls.append(query)
+            time.sleep(0.2)
+            return self._score(query, texts)
+
+        reranker = Reranker(slow_score, budget_ms=30)
+        try:
+            first, second = await asyncio.gather(
+                reranker.rerank("first", self.CANDIDATES, top_k=2),
+                reranker.rerank("second", self.CANDIDATES, top_k=2),
+            )
+            await asyncio.sleep(0.3)
+        finally:
+            reranker.shutdown()
+
+        for results, stats in (first, second):
+            assert [r["text"] for r in results] == ["weak match", "best match"]
+            assert stats["timed_out"] is True
+        # The queued job had expired by the time the thread was free
+        assert calls == ["first"]
+
+    def test_search_reranks_oversampled_candidates(
+        self,
+        test_client: TestClient,
+        mock_vector_store: AsyncMock,
+    ) -> None:
+        """/search should fetch top_k * oversample candidates and rerank them."""
+        from search.rerank import Reranker
+
+        mock_vector_store.search.return_value = self.CANDIDATES
+        reranker = Reranker(self._score, budget_ms=1000)
+
+        with patch("search.routes.get_reranker", return_value=reranker):
+            response = test_client.post(
+                "/api/v1/rag/search",
+                json={"query": "payments", "top_k": 1, "rerank": True},
+            )
+        reranker.shutdown()
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["reranked"] is True
+        assert [c["text"] for c in data["chunks"]] == ["best match"]
+        assert mock_vector_store.search.call_args.kwargs["top_k"] == 4
+
+
+class TestMMR:
+    """Tests for Maximal Marginal Relevance diversification."""
+
+    @staticmethod
+    def _vectors():
+        import numpy as np
+
+        section = np.array([1.0, 0.0, 0.0])
+        overlap = np.array([0.99, 0.14, 0.0])  # neighbouring window of the same section
+        other = np.array([0.6, 0.0, 0.8])
+        return np.stack([section, overlap, other])
+
+    def test_near_duplicates_are_skipped(self) -> None:
+        """An overlapping chunk should lose to a different, less relevant one."""
+        import numpy as np
+
+        from search.mmr import mmr_select
+
+        relevance = np.array([0.9, 0.89, 0.7])
+        assert mmr_select(relevance, self._vectors(), k=2, lambda_mult=0.5) == [0, 2]
+
+    def test_lambda_one_is_pure_relevance(self) -> None:
+        """lambda=1 should reproduce the relevance order."""
+        import numpy as np
+
+        from search.mmr import mmr_select
+
+        relevance = np.array([0.9, 0.89, 0.7])
+        assert mmr_select(relevance, self._vectors(), k=3, lambda_mult=1.0) == [0, 1, 2]
+
+    def test_hundred_candidates_take_a_few_ms(self) -> None:
+        """MMR over 100 x 384 candidates should stay within a few milliseconds."""
+        import numpy as np
+
+        from search.mmr import mmr_select
+
+        rng = np.random.default_rng(0)
+        candidates = rng.normal(size=(100, 384)).astype(np.float32)
+        relevance = rng.random(100).astype(np.float32)
+
+        timings = []
+        for _ in range(20):
+            start = time.perf_counter()
+            mmr_select(relevance, candidates, k=10, lambda_mult=0.5)
+            timings.append(time.perf_counter() - start)
+
+        assert sorted(timings)[len(timings) // 2] < 0.005
+
+    def test_search_diversifies_with_vectors(
+        self,
+        test_client: TestClient,
+        mock_embedding_provider: AsyncMock,
+        mock_vector_store: AsyncMock,
+    ) -> None:
+        """/search with diversify should request vectors and drop overlaps."""
+        vectors = self._vectors().tolist()
+        mock_embedding_provider.embed_query.return_value = vectors[0]
+        mock_vector_store.search.return_value = [
+            {"text": "section", "source": "a.md", "score": 0.9, "vector": vectors[0]},
+            {"text": "overlap", "source": "a.md", "score": 0.89, "vector": vectors[1]},
+            {"text": "other", "source": "b.md", "score": 0.7, "vector": vectors[2]},
+        ]
+
+        response = test_client.post(
+            "/api/v1/rag/search",
+            json={"query": "payments", "top_k": 2, "diversify": True, "mmr_lambda": 0.3},
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["diversified"] is True
+        assert [c["text"] for c in data["chunks"]] == ["section", "other"]
+        call_kwargs = mock_vector_store.search.call_args.kwargs
+        assert call_kwargs["with_vectors"] is True
+        assert call_kwargs["top_k"] == 8
+
+
+class TestSearchResultCache:
+    """Tests for the search result cache and its tenant invalidation."""
+
+    def test_tenant_write_invalidates_tenant_and_unfiltered(self) -> None:
+        """A write should drop its tenant's and unfiltered results, not other tenants'."""
+        from search.result_cache import SearchResultCache
+
+        cache = SearchResultCache(max_size=10, ttl_sec=0)
+        for key, company in [("acme", "acme"), ("globex", "globex"), ("all", None)]:
+            cache.put(key, company, f"{key} results", cache.generation(company))
+
+        cache.invalidate("acme")
+
+        assert cache.get("acme", "acme") is None
+        assert cache.get("all", None) is None
+        assert cache.get("globex", "globex") == "globex results"
+
+        # Shared documents are invisible to tenant-filtered searches
+        cache.put("all", None, "all results", cache.generation(None))
+        cache.invalidate(None)
+        assert cache.get("all", None) is None
+        assert cache.get("globex", "globex") == "globex results"
+
+        cache.invalidate_all()
+        assert cache.get("globex", "globex") is None
+
+    def test_result_computed_across_a_write_is_not_stored(self) -> None:
+        """A response computed before a write must not be cached after it."""
+        from search.result_cache import SearchResultCache
+
+        cache = SearchResultCache(max_size=10, ttl_sec=0)
+        generation = cache.generation("acme")
+        cache.invalidate("acme")
+        cache.put("key", "acme", "stale results", generation)
+
+        assert cache.get("key", "acme") is None
+
+    def test_ttl_and_size_eviction(self) -> None:
+        """Entries should expire after the TTL and the oldest should be evicted."""
+        from search.result_cache import SearchResultCache
+
+        cache = SearchResultCache(max_size=2, ttl_sec=60)
+        for key in ("a", "b", "c"):
+            cache.put(key, None, key, cache.generation(None))
+        assert cache.get("a", None) is None
+        assert cache.get("c", None) == "c"
+
+        with patch("search.result_cache.time.monotonic", return_value=time.monotonic() + 61):
+            assert cache.get("c", None) is None
+        assert cache.stats()["hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_store_writes_invalidate(self) -> None:
+        """Upserts and source deletes should bump the affected generations."""
+        from chunking import Chunk
+        from search.result_cache import SearchResultCache
+
+        cache = SearchResultCache(max_size=10, ttl_sec=0)
+        store = QdrantVectorStore()
+        store._client = AsyncMock()
+        store._collection_initialized = True
+
+        with patch("search.store.get_search_result_cache", return_value=cache):
+            before = cache.generation("acme"), cache.generation("globex")
+            await store.upsert_chunks(
+                [Chunk(text="a", index=0, source="a.md", doc_type="general", company_id="acme")],
+                [[0.1] * 384],
+            )
+            assert cache.generation("acme") != before[0]
+            assert cache.generation("globex") == before[1]
+
+            await store.delete_by_source("a.md")
+            assert cache.generation("globex") != before[1]
+
+    def test_search_served_from_cache_until_write(
+        self,
+        test_client: TestClient,
+        mock_vector_store: AsyncMock,
+    ) -> None:
+        """Repeated searches should hit the cache until the tenant is written to."""
+        from search.result_cache import SearchResultCache
+
+        cache = SearchResultCache(max_size=10, ttl_sec=0)
+        body = {"query": "Payment  Gateway", "company_id": "acme"}
+
+        with patch("search.routes.get_search_result_cache", return_value=cache):
+            first = test_client.post("/api/v1/rag/search", json=body)
+            second = test_client.post(
+                "/api/v1/rag/search",
+                json={**body, "query": "payment gateway"},
+            )
+            cache.invalidate("acme")
+            third = test_client.post("/api/v1/rag/search", json=body)
+
+        assert first.headers["X-Cache"] == "MISS"
+        assert second.headers["X-Cache"] == "HIT"
+        assert second.json()["query"] == "payment gateway"
+        assert second.json()["chunks"] == first.json()["chunks"]
+        assert third.headers["X-Cache"] == "MISS"
+        assert mock_vector_store.search.await_count == 2
+        assert cache.stats()["hit_ratio"] == round(1 / 3, 4)
+
+
+class TestSingleFlight:
+    """Tests for coalescing identical in-flight searches."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_share_one_execution(self) -> None:
+        """Identical concurrent calls should run the work once and share the result."""
+        from metrics import get_metrics
+        from search.singleflight import SingleFlight
+
+        flights = SingleFlight("test_sf")
+        calls = 0
+
+        async def work() -> str:
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return "result"
+
+        before = get_metrics().counter("test_sf_coalesced")
+        results = await asyncio.gather(*(flights.do("key", work) for _ in range(5)))
+
+        assert results == ["result"] * 5
+        assert calls == 1
+        assert get_metrics().counter("test_sf_coalesced") - before == 4
+        assert flights.in_flight() == 0
+
+        # A finished flight is forgotten; the next call runs the work again
+        assert await flights.do("key", work) == "result"
+        assert calls == 2
+
+    @pytest.mark.asyncio
+    async def test_exception_reaches_every_waiter(self) -> None:
+        """Every joined caller should receive the shared call's exception."""
+        from search.singleflight import SingleFlight
+
+        flights = SingleFlight("test_sf")
+
+        async def work() -> str:
+            await asyncio.sleep(0.01)
+            raise VectorStoreError("qdrant down")
+
+        results = await asyncio.gather(
+            *(flights.do("key", work) for _ in range(3)),
+            return_exceptions=True,
+        )
+        assert all(isinstance(r, VectorStoreError) for r in results)
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_does_not_cancel_shared_work(self) -> None:
+        """Work should survive one waiter leaving and stop when the last one leaves."""
+        from metrics import get_metrics
+        from search.singleflight import SingleFlight
+
+        flights = SingleFlight("test_sf")
+        release = asyncio.Event()
+        cancelled = asyncio.Event()
+
+        async def work() -> str:
+            try:
+                await release.wait()
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+            return "result"
+
+        first = asyncio.create_task(flights.do("key", work))
+        second = asyncio.create_task(flights.do("key", work))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        assert await second == "result"
+        assert first.cancelled()
+
+        release.clear()
+        before = get_metrics().counter("test_sf_flights_cancelled")
+        only = asyncio.create_task(flights.do("key", work))
+        await asyncio.sleep(0)
+        only.cancel()
+        await asyncio.wait_for(cancelled.wait(), timeout=1)
+        assert get_metrics().counter("test_sf_flights_cancelled") - before == 1
+
+    @pytest.mark.asyncio
+    async def test_retry_after_last_waiter_cancels_starts_fresh_work(self) -> None:
+        """A request arriving right after the only waiter left must not join the cancelled work."""
+        from search.singleflight import SingleFlight
+
+        flights = SingleFlight("test_sf")
+        calls = 0
+
+        async def work() -> str:
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return "result"
+
+        only = asyncio.create_task(flights.do("key", work))
+        await asyncio.sleep(0)
+        only.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await only
+
+        # Issued before the cancelled task's done callback has run
+        assert await flights.do("key", work) == "result"
+        assert calls == 2
+        assert flights.in_flight() == 0
+
+    @pytest.mark.asyncio
+    async def test_concurrent_identical_searches_hit_qdrant_once(
+        self,
+        async_client: AsyncClient,
+        mock_vector_store: AsyncMock,
+    ) -> None:
+        """Identical searches arriving together should share one embed + search."""
+        results = mock_vector_store.search.return_value
+
+        async def slow_search(*args: object, **kwargs: object) -> list[dict]:
+            await asyncio.sleep(0.05)
+            return results
+
+        mock_vector_store.search.side_effect = slow_search
+        body = {"query": "payment gateway", "company_id": "acme"}
+
+        responses = await asyncio.gather(
+            async_client.post("/api/v1/rag/search", json=body),
+            async_client.post("/api/v1/rag/search", json={**body, "query": "Payment Gateway"}),
+            async_client.post("/api/v1/rag/search", json={**body, "company_id": "globex"}),
+        )
+
+        assert [r.status_code for r in responses] == [200, 200, 200]
+        assert responses[1].json()["query"] == "Payment Gateway"
+        assert responses[1].json()["chunks"] == responses[0].json()["chunks"]
+        # acme searches were coalesced; the globex search ran separately
+        assert mock_vector_store.search.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_longer_deadline_does_not_join_shorter_flight(
+        self,
+        async_client: AsyncClient,
+        mock_vector_store: AsyncMock,
+    ) -> None:
+        """A search may not inherit the shorter budget of an identical one in flight."""
+        results = mock_vector_store.search.return_value
+
+        async def slow_search(*args: object, **kwargs: object) -> list[dict]:
+            await asyncio.sleep(0.05)
+            return results
+
+        mock_vector_store.search.side_effect = slow_search
+        body = {"query": "service mesh", "company_id": "acme"}
+
+        responses = await asyncio.gather(
+            async_client.post("/api/v1/rag/search", json=body, headers={"X-Deadline-Ms": "1000"}),
+            async_client.post("/api/v1/rag/search", json=body),
+        )
+
+        assert [r.status_code for r in responses] == [200, 200]
+        assert mock_vector_store.search.await_count == 2
+
+
+class TestSemanticQueryCache:
+    """Tests for the near-duplicate query cache."""
+
+    def test_near_duplicate_hits_and_distant_query_misses(self) -> None:
+        """A close embedding with the same parameters should reuse the results."""
+        from search.semantic_cache import SemanticQueryCache
+
+        cache = SemanticQueryCache(tenant_capacity=4, max_distance=0.05, max_tenants=10)
+        generation = (0, 0)
+        cache.put(("acme", 5), "acme", [1.0, 0.0, 0.0], "login results", generation)
+
+        assert cache.lookup(("acme", 5), "acme", [0.99, 0.1, 0.0], generation) == "login results"
+        assert cache.lookup(("acme", 5), "acme", [0.7, 0.7, 0.0], generation) is None
+        # Same query under other parameters or another tenant is a different search
+        assert cache.lookup(("acme", 10), "acme", [1.0, 0.0, 0.0], generation) is None
+        assert cache.lookup(("acme", 5), "globex", [1.0, 0.0, 0.0], generation) is None
+        assert cache.stats()["hits"] == 1
+
+    def test_tenant_capacity_evicts_least_recently_used(self) -> None:
+        """A full tenant index should evict its least recently used query only."""
+        from search.semantic_cache import SemanticQueryCache
+
+        cache = SemanticQueryCache(tenant_capacity=2, max_distance=0.01, max_tenants=10)
+        generation = (0, 0)
+        cache.put("p", "acme", [1.0, 0.0, 0.0], "x", generation)
+        cache.put("p", "acme", [0.0, 1.0, 0.0], "y", generation)
+        cache.put("p", "globex", [0.0, 0.0, 1.0], "z", generation)
+        assert cache.lookup("p", "acme", [1.0, 0.0, 0.0], generation) == "x"
+
+        cache.put("p", "acme", [0.0, 0.0, 1.0], "acme z", generation)
+
+        assert cache.lookup("p", "acme", [0.0, 1.0, 0.0], generation) is None
+        assert cache.lookup("p", "acme", [1.0, 0.0, 0.0], generation) == "x"
+        assert cache.lookup("p", "globex", [0.0, 0.0, 1.0], generation) == "z"
+        assert cache.stats()["size"] == 3
+
+    def test_write_generation_empties_tenant_index(self) -> None:
+        """Entries from before a write must not be reused, nor stale results stored."""
+        from search.semantic_cache import SemanticQueryCache
+
+        cache = SemanticQueryCache(tenant_capacity=4, max_distance=0.05, max_tenants=1)
+        cache.put("p", "acme", [1.0, 0.0, 0.0], "old", (0, 0))
+
+        assert cache.lookup("p", "acme", [1.0, 0.0, 0.0], (0, 1)) is None
+        cache.put("p", "acme", [1.0, 0.0, 0.0], "new", (0, 1))
+        cache.put("p", "acme", [1.0, 0.0, 0.0], "stale", (0, 0))
+        assert cache.lookup("p", "acme", [1.0, 0.0, 0.0], (0, 1)) == "new"
+
+        # Only max_tenants indexes are kept
+        cache.put("p", "globex", [1.0, 0.0, 0.0], "globex", (0, 0))
+        assert cache.stats()["tenants"] == 1
+
+    def test_search_reuses_near_duplicate_unless_bypassed(
+        self,
+        test_client: TestClient,
+        mock_vector_store: AsyncMock,
+    ) -> None:
+        """Near-duplicate prompts should skip Qdrant unless the request bypasses the cache."""
+        from search.semantic_cache import SemanticQueryCache
+
+        cache = SemanticQueryCache(tenant_capacity=4, max_distance=0.05, max_tenants=10)
+
+        with patch("search.routes.get_semantic_query_cache", return_value=cache):
+            first = test_client.post("/api/v1/rag/search", json={"query": "user login flow"})
+            second = test_client.post("/api/v1/rag/search", json={"query": "login flow for users"})
+            third = test_client.post(
+                "/api/v1/rag/search",
+                json={"query": "login flow for users", "bypass_semantic_cache": True},
+            )
+
+        assert [r.status_code for r in (first, second, third)] == [200, 200, 200]
+        assert second.json()["query"] == "login flow for users"
+        assert second.json()["chunks"] == first.json()["chunks"]
+        assert mock_vector_store.search.await_count == 2
+        assert cache.stats()["hits"] == 1
+
+
+class TestCacheWarmup:
+    """Tests for pre-filling the caches from the warm-up prompt list."""
+
+    def test_load_prompt_formats(self, tmp_path) -> None:
+        """Strings, exported entries and tenant entries should all load."""
+        import json
+
+        from search.warmup import WarmupPrompt, load_warmup_prompts
+
+        path = tmp_path / "prompts.json"
+        path.write_text(
+            json.dumps(
+                {
+                    "prompts": [
+                        "user login flow",
+                        {"id": "seed-1", "query": "payment system"},
+                        {"prompt_text": "order saga", "company_id": "acme"},
+                    ]
+                }
+            )
+        )
+
+        assert load_warmup_prompts(path) == [
+            WarmupPrompt("user login flow"),
+            WarmupPrompt("payment system"),
+            WarmupPrompt("order saga", "acme"),
+        ]
+
+        path.write_text(json.dumps([{"title": "no query"}]))
+        with pytest.raises(ValueError):
+            load_warmup_prompts(path)
+
+    @pytest.mark.asyncio
+    async def test_warm_fills_result_cache_per_target(
+        self,
+        mock_embedding_provider: AsyncMock,
+        mock_vector_store: AsyncMock,
+    ) -> None:
+        """Prompts should be batch-embedded once and cached for every target tenant."""
+        from search.result_cache import SearchResultCache
+        from search.routes import SearchRequest, run_search
+        from search.warmup import CacheWarmer, WarmupPrompt
+
+        cache = SearchResultCache(max_size=10, ttl_sec=0)
+        warmer = CacheWarmer(None, ["acme"], concurrency=2, refresh_delay_sec=0)
+        prompts = [WarmupPrompt("user login flow"), WarmupPrompt("order saga", "globex")]
+
+        with patch("search.routes.get_search_result_cache", return_value=cache):
+            stats = await warmer.warm([None, "acme", "globex"], prompts)
+            again = await warmer.warm([None, "acme", "globex"], prompts)
+            _, cache_status = await run_search(
+                SearchRequest(query="User login flow", company_id="acme")
+            )
+
+        mock_embedding_provider.embed_queries.assert_any_await(["user login flow", "order saga"])
+        # The shared prompt for each of the 3 targets, the tenant prompt once
+        assert stats["searches"] == 4
+        assert stats["failed"] == 0
+        assert again["cached"] == 4
+        assert cache_status == "HIT"
+        assert mock_vector_store.search.await_count == 4
+
+    @pytest.mark.asyncio
+    async def test_ingest_refreshes_affected_targets(self) -> None:
+        """Writes should re-warm unfiltered searches and the tenant if it is a target."""
+        from search.warmup import CacheWarmer
+
+        warmer = CacheWarmer("prompts.json", ["acme"], concurrency=1, refresh_delay_sec=0.01)
+        warmer._prompts = []
+
+        with patch.object(warmer, "warm", AsyncMock()) as warm:
+            warmer.schedule_refresh("acme")
+            warmer.schedule_refresh("acme")
+            await asyncio.sleep(0.05)
+            warmer.schedule_refresh("globex")
+            await asyncio.sleep(0.05)
+            await warmer.close()
+
+        assert [call.args[0] for call in warm.await_args_list] == [[None, "acme"], [None]]
+
+    def test_warmup_endpoint(
+        self,
+        test_client: TestClient,
+        mock_vector_store: AsyncMock,
+    ) -> None:
+        """The admin endpoint should require the API key and report the run."""
+        body = {"prompts": ["user login flow", "x" * 1001], "company_ids": [None]}
+
+        unauthorized = test_client.post("/api/v1/rag/warmup", json=body)
+        response = test_client.post(
+            "/api/v1/rag/warmup",
+            json=body,
+            headers={"X-API-Key": "test-api-key"},
+        )
+
+        assert unauthorized.status_code == 401
+        assert response.status_code == 200
+        assert response.json()["searches"] == 1
+        assert response.json()["skipped"] == 1
+        assert mock_vector_store.search.await_count == 1
+
+
+class TestSearchDeadline:
+    """Tests for the end-to-end search deadline and hedged Qdrant requests."""
+
+    def test_client_budget_is_capped_by_server_timeout(self) -> None:
+        """X-Deadline-Ms may shorten the deadline but never extend it."""
+        from search.deadline import MIN_BUDGET_MS, Deadline
+
+        settings = get_settings().model_copy(
+            update={"search_timeout_sec": 5, "search_deadline_margin_ms": 50}
+        )
+
+        assert Deadline.for_request(settings).budget_sec == pytest.approx(4.95)
+        assert Deadline.for_request(settings, 1000).budget_sec == pytest.approx(0.95)
+        assert Deadline.for_request(settings, 60_000).budget_sec == pytest.approx(4.95)
+        assert Deadline.for_request(settings, 10).budget_sec == pytest.approx(MIN_BUDGET_MS / 1000)
+
+    @pytest.mark.asyncio
+    async def test_refine_skips_stages_when_deadline_is_spent(self) -> None:
+        """With no time left, rerank and MMR should be skipped and flagged partial."""
+        from search.deadline import Deadline
+        from search.routes import SearchRequest, _refine
+
+        candidates = [
+            {"text": "a", "source": "a.md", "score": 0.9},
+            {"text": "b", "source": "b.md", "score": 0.8},
+        ]
+        reranker = AsyncMock()
+        search_request = SearchRequest(query="q", top_k=1, rerank=True, diversify=True)
+
+        with patch("search.routes.get_reranker", return_value=reranker):
+            results, reranked, diversified, partial = await _refine(
+                search_request, candidates, None, Deadline(0)
+            )
+
+        assert [r["text"] for r in results] == ["a"]
+        assert (reranked, diversified, partial) == (False, False, True)
+        reranker.rerank.assert_not_awaited()
+
+    def test_slow_embedding_degrades_within_client_deadline(
+        self,
+        test_client: TestClient,
+        mock_embedding_provider: AsyncMock,
+        mock_vector_store: AsyncMock,
+    ) -> None:
+        """Embedding may only use its share of the deadline before BM25 takes over."""
+
+        async def slow_embed(text: str) -> list[float]:
+            await asyncio.sleep(2)
+            return [0.1] * 384
+
+        mock_embedding_provider.embed_query.side_effect = slow_embed
+
+        start = time.perf_counter()
+        response = test_client.post(
+            "/api/v1/rag/search",
+            json={"query": "payments"},
+            headers={"X-Deadline-Ms": "400"},
+        )
+        elapsed = time.perf_counter() - start
+
+        assert response.status_code == 200
+        assert response.json()["degraded"] is True
+        assert mock_vector_store.search.call_args.kwargs["mode"] == "sparse"
+        assert elapsed < 0.4
+
+    @pytest.mark.asyncio
+    async def test_hedge_wins_over_slow_primary(self) -> None:
+        """A slow first attempt should be hedged and the faster answer used."""
+        from hedging import hedged
+        from metrics import get_metrics
+
+        delays = iter([1.0, 0.0])
+        cancelled = []
+
+        async def call() -> str:
+            delay = next(delays)
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                cancelled.append(delay)
+                raise
+            return f"answered after {delay}"
+
+        before = get_metrics().counter("test_hedge_hedge_wins")
+        start = time.perf_counter()
+        result = await hedged(call, 0.02, "test_hedge")
+
+        assert result == "answered after 0.0"
+        assert time.perf_counter() - start < 0.5
+        assert get_metrics().counter("test_hedge_hedge_wins") - before == 1
+        await asyncio.sleep(0)
+        assert cancelled == [1.0]
+
+    @pytest.mark.asyncio
+    async def test_fast_call_and_failures_are_not_hedged_away(self) -> None:
+        """Fast calls run once; a failing attempt yields to a successful one."""
+        from hedging import hedged
+
+        calls = 0
+
+        async def fast() -> int:
+            nonlocal calls
+            calls += 1
+            return calls
+
+        assert await hedged(fast, 0.05, "test_hedge") == 1
+        assert calls == 1
+
+        attempts = iter([VectorStoreError("replica down"), None])
+
+        async def flaky() -> str:
+            await asyncio.sleep(0.03)
+            error = next(attempts)
+            if error is not None:
+                raise error
+            return "ok"
+
+        assert await hedged(flaky, 0.01, "test_hedge") == "ok"
+
+        async def broken() -> str:
+            raise VectorStoreError("qdrant down")
+
+        with pytest.raises(VectorStoreError):
+            await hedged(broken, 0.01, "test_hedge")
+
+    def test_hedge_delay_follows_recent_percentile(self) -> None:
+        """No hedging without history; afterwards wait for the recent p95."""
+        from hedging import hedge_delay
+        from metrics import get_metrics
+
+        assert hedge_delay("test_hedge_latency_ms", 95, min_samples=20) is None
+        for latency in range(1, 101):
+            get_metrics().observe("test_hedge_latency_ms", float(latency))
+
+        assert hedge_delay("test_hedge_latency_ms", 95, min_samples=20) == pytest.approx(0.095)
+
+
+class TestCircuitBreaker:
+    """Tests for the dependency circuit breakers."""
+
+    @pytest.mark.asyncio
+    async def test_opens_on_failure_rate_and_rejects_fast(self) -> None:
+        """Once enough calls fail the breaker should reject without calling."""
+        from circuit_breaker import CircuitBreaker, CircuitOpenError
+
+        breaker = CircuitBreaker("test_breaker", window=4, min_calls=4, failure_rate=0.5)
+        calls = 0
+
+        async def down() -> None:
+            nonlocal calls
+            calls += 1
+            raise VectorStoreError("qdrant down")
+
+        async def up() -> str:
+            return "ok"
+
+        for fn in (up, down, up, down):
+            try:
+                await breaker.call(fn)
+            except VectorStoreError:
+                pass
+
+        assert breaker.state == "open"
+        with pytest.raises(CircuitOpenError) as exc_info:
+            await breaker.call(down)
+        assert calls == 2
+        assert exc_info.value.retry_after_sec > 0
+
+    @pytest.mark.asyncio
+    async def test_half_open_trial_closes_or_reopens(self) -> None:
+        """After open_sec one trial call decides whether the circuit closes."""
+        from circuit_breaker import CircuitBreaker
+
+        breaker = CircuitBreaker("test_breaker", window=2, min_calls=2, open_sec=0.02)
+
+        async def down() -> None:
+            raise VectorStoreError("qdrant down")
+
+        async def up() -> str:
+            return "ok"
+
+        for _ in range(2):
+            with pytest.raises(VectorStoreError):
+                await breaker.call(down)
+        assert breaker.state == "open"
+
+        await asyncio.sleep(0.03)
+        assert breaker.state == "half_open"
+        with pytest.raises(VectorStoreError):
+            await breaker.call(down)
+        assert breaker.state == "open"
+
+        await asyncio.sleep(0.03)
+        assert await breaker.call(up) == "ok"
+        assert breaker.state == "closed"
+        assert breaker.snapshot()["calls"] == 0
+
+    @pytest.mark.asyncio
+    async def test_slow_calls_fail_and_client_errors_do_not(self) -> None:
+        """Slow successes count as failures; errors is_failure rejects do not."""
+        from circuit_breaker import CircuitBreaker
+
+        breaker = CircuitBreaker("test_breaker", window=3, min_calls=2, slow_call_ms=10)
+
+        async def bad_request() -> None:
+            raise ValueError("bad filter")
+
+        for _ in range(2):
+            with pytest.raises(ValueError):
+                await breaker.call(bad_request, lambda e: not isinstance(e, ValueError))
+        assert breaker.state == "closed"
+
+        async def slow() -> str:
+            await asyncio.sleep(0.03)
+            return "ok"
+
+        assert await breaker.call(slow) == "ok"
+        assert breaker.state == "closed"
+        assert await breaker.call(slow) == "ok"
+        assert breaker.state == "open"
+
+    @pytest.mark.asyncio
+    async def test_store_reports_open_circuit_as_store_error(self) -> None:
+        """Searches against an open circuit should fail fast with VectorStoreError."""
+        from circuit_breaker import CircuitBreaker
+
+        mock_client = AsyncMock()
+        store = QdrantVectorStore()
+        store._client = mock_client
+        store._collection_initialized = True
+        store._breaker = CircuitBreaker("test_breaker", window=1, min_calls=1)
+        store._breaker._open()
+
+        with pytest.raises(VectorStoreError, match="circuit is open"):
+            await store.search(query_embedding=[0.1] * 384)
+        mock_client.search.assert_not_awaited()
+        mock_client.query_points.assert_not_awaited()
+
+    def test_readiness_reports_circuit_states(self, test_client: TestClient) -> None:
+        """/health/ready should list the state of each breaker."""
+        from circuit_breaker import get_circuit_breaker
+
+        get_circuit_breaker("qdrant")
+        response = test_client.get("/health/ready")
+
+        assert response.json()["circuits"]["qdrant"] == "closed"
+
+
+class TestReadiness:
+    """Tests for the startup warm-up and cached readiness state."""
+
+    @staticmethod
+    def _prober(**overrides: float) -> ReadinessProber:
+        options = {
+            "interval_sec": 10.0,
+            "timeout_sec": 1.0,
+            "max_embedding_ms": 0.0,
+            "max_qdrant_ms": 0.0,
+            "warmup_batch_size": 4,
+            **overrides,
+        }
+        return ReadinessProber(**options)
+
+    @pytest.mark.asyncio
+    async def test_warm_up_then_serve_cached_state(
+        self,
+        mock_embedding_provider: AsyncMock,
+        mock_vector_store: AsyncMock,
+    ) -> None:
+        """Readiness should report warming_up, then a cached state probes do not refresh."""
+        prober = self._prober()
+        prober.start()
+        assert (await prober.current())["status"] == "warming_up"
+
+        for _ in range(100):
+            if (await prober.current())["status"] != "warming_up":
+                break
+            await asyncio.sleep(0.01)
+
+        state = await prober.current()
+        assert state["status"] == "ready"
+        assert state["checks"] == {"embeddings": True, "qdrant": True}
+        assert len(mock_embedding_provider.embed_passages.call_args.args[0]) == 4
+
+        for _ in range(10):
+            await prober.current()
+        assert mock_embedding_provider.embed_query.await_count == 1
+        await prober.close()
+
+    @pytest.mark.asyncio
+    async def test_warm_up_loads_reranker_when_enabled(
+        self,
+        mock_embedding_provider: AsyncMock,
+        mock_vector_store: AsyncMock,
+    ) -> None:
+        """With reranking enabled the warm-up should load the cross-encoder too."""
+        reranker = AsyncMock()
+        with patch("search.rerank.get_reranker", return_value=reranker):
+            await self._prober().warm_up()
+            reranker.warm_up.assert_not_awaited()
+
+            await self._prober(warm_up_reranker=True).warm_up()
+            reranker.warm_up.assert_awaited_once()
+
+            # A model that fails to load leaves the reranker to fall back per request
+            reranker.warm_up.side_effect = OSError("model files missing")
+            await self._prober(warm_up_reranker=True).warm_up()
+
+    @pytest.mark.asyncio
+    async def test_slow_or_failing_dependencies_are_not_ready(
+        self,
+        mock_embedding_provider: AsyncMock,
+        mock_vector_store: AsyncMock,
+    ) -> None:
+        """A probe slower than its limit or a failing check should keep the pod out."""
+
+        async def slow_embed(text: str) -> list[float]:
+            await asyncio.sleep(0.05)
+            return [0.1] * 384
+
+        mock_embedding_provider.embed_query.side_effect = slow_embed
+        state = await self._prober(max_embedding_ms=10.0).probe()
+        assert state["status"] == "not_ready"
+        assert state["slow"] == ["embeddings"]
+
+        mock_embedding_provider.embed_query.side_effect = None
+        mock_vector_store.health_check.side_effect = VectorStoreError("qdrant down")
+        state = await self._prober().probe()
+        assert state["status"] == "not_ready"
+        assert state["checks"] == {"embeddings": True, "qdrant": False}
+
+    def test_endpoint_returns_503_until_ready(
+        self,
+        test_client: TestClient,
+        mock_vector_store: AsyncMock,
+    ) -> None:
+        """/health/ready should fail curl -f while the service is not ready."""
+        mock_vector_store.health_check.side_effect = VectorStoreError("qdrant down")
+
+        with patch("main.get_readiness_prober", return_value=self._prober()):
+            response = test_client.get("/health/ready")
+
+        assert response.status_code == 503
+        assert response.json()["status"] == "not_ready"
+
+
+class TestBatchSearchAPI:
+    """Tests for the batch search endpoint."""
+
+    def test_batch_search_one_embedding_pass(
+        self,
+        test_client: TestClient,
+        mock_embedding_provider: AsyncMock,
+        mock_vector_store: AsyncMock,
+    ) -> None:
+        """All queries should be embedded together and answered in order."""
+        response = test_client.post(
+            "/api/v1/rag/search/batch",
+            json={
+                "queries": [
+                    {"query": "first", "top_k": 2},
+                    {"query": "second", "company_id": "acme", "score_threshold": 0.7},
+                ]
+            },
+        )
+
+        assert response.status_code == 200
+        results = response.json()["results"]
+        assert [r["query"] for r in results] == ["first", "second"]
+        assert all(r["chunks"] and r["error"] is None for r in results)
+
+        mock_embedding_provider.embed_queries.assert_awaited_once_with(["first", "second"])
+        mock_embedding_provider.embed_query.assert_not_awaited()
+        (queries,) = mock_vector_store.search_batch.call_args[0]
+        assert queries[1]["company_id"] == "acme"
+        assert queries[1]["score_threshold"] == 0.7
+
+    def test_batch_search_isolates_query_failures(
+        self,
+        test_client: TestClient,
+        mock_vector_store: AsyncMock,
+    ) -> None:
+        """One failed query should not fail the rest of the batch."""
+        mock_vector_store.search_batch.side_effect = lambda queries: [
+            VectorStoreError("bad filter"),
+            mock_vector_store.search.return_value,
+        ]
+
+        response = test_client.post(
+            "/api/v1/rag/search/batch",
+            json={"queries": [{"query": "first"}, {"query": "second"}]},
+        )
+
+        assert response.status_code == 200
+        first, second = response.json()["results"]
+        assert first["error"] and first["chunks"] == []
+        assert second["error"] is None and second["chunks"]
+
+    def test_batch_search_isolates_refine_failures(
+        self,
+        test_client: TestClient,
+        mock_vector_store: AsyncMock,
+    ) -> None:
+        """A query whose rerank raises should fall back to vector order, not fail the batch."""
+        mock_vector_store.search_batch.side_effect = lambda queries: [
+            [
+                {"text": "a", "source": "a.md", "doc_type": "general", "score": 0.9},
+                {"text": "b", "source": "b.md", "doc_type": "general", "score": 0.8},
+            ]
+            for _ in queries
+        ]
+
+        async def rerank(query: str, results: list, top_k: int, budget_ms: float) -> tuple:
+            if query == "broken":
+                raise RuntimeError("cross-encoder crashed")
+            return list(reversed(results))[:top_k], {"reranked": True}
+
+        reranker = AsyncMock()
+        reranker.rerank.side_effect = rerank
+        with patch("search.routes.get_reranker", return_value=reranker):
+            response = test_client.post(
+                "/api/v1/rag/search/batch",
+                json={
+                    "queries": [
+                        {"query": "broken", "rerank": True},
+                        {"query": "fine", "rerank": True},
+                    ]
+                },
+            )
+
+        assert response.status_code == 200
+        broken, fine = response.json()["results"]
+        assert broken["error"] is None and broken["reranked"] is False
+        assert [c["text"] for c in broken["chunks"]] == ["a", "b"]
+        assert fine["reranked"] is True
+        assert [c["text"] for c in fine["chunks"]] == ["b", "a"]
+
+    def test_batch_search_limits_query_count(self, test_client: TestClient) -> None:
+        """Batches above the configured maximum should be rejected."""
+        response = test_client.post(
+            "/api/v1/rag/search/batch",
+            json={"queries": [{"query": f"q{i}"} for i in range(11)]},
+        )
+        assert response.status_code == 400
+
+
 class TestVectorStore:
     """Tests for QdrantVectorStore."""
 
+    def test_client_options_pool_and_timeouts(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Client options should carry the pool, keep-alive and timeout settings."""
+        from config import Settings
+        from search.store import _client_options
+
+        monkeypatch.setenv("RAG_QDRANT_TIMEOUT_SEC", "3")
+        monkeypatch.setenv("RAG_QDRANT_POOL_MAX_CONNECTIONS", "8")
+        monkeypatch.setenv("RAG_QDRANT_POOL_MAX_KEEPALIVE", "4")
+        monkeypatch.setenv("RAG_QDRANT_KEEPALIVE_SEC", "15")
+        options = _client_options(Settings())
+
+        assert options["prefer_grpc"] is False
+        assert options["timeout"] == 3
+        assert options["limits"].max_connections == 8
+        assert options["limits"].max_keepalive_connections == 4
+        assert options["limits"].keepalive_expiry == 15
+        assert options["grpc_options"]["grpc.keepalive_time_ms"] == 15000
+        assert _client_options(Settings(), prefer_grpc=True)["prefer_grpc"] is True
+
+    @pytest.mark.asyncio
+    async def test_client_uses_configured_transport(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """The store should create its client over gRPC when preferred."""
+        monkeypatch.setenv("RAG_QDRANT_PREFER_GRPC", "true")
+        monkeypatch.setenv("RAG_QDRANT_GRPC_PORT", "7334")
+        get_settings.cache_clear()
+        try:
+            store = QdrantVectorStore()
+            store._collection_initialized = True
+            with patch("search.store.AsyncQdrantClient") as client_cls:
+                await store._get_client()
+        finally:
+            get_settings.cache_clear()
+
+        kwargs = client_cls.call_args.kwargs
+        assert kwargs["prefer_grpc"] is True
+        assert kwargs["grpc_port"] == 7334
+
+    @pytest.mark.asyncio
+    async def test_quantized_collection_creation(self) -> None:
+        """Quantized collections keep int8 vectors in RAM and originals on disk."""
+        from qdrant_client.http import models
+
+        mock_client = AsyncMock()
+        mock_client.get_collections.return_value = models.CollectionsResponse(collections=[])
+
+        store = QdrantVectorStore(get_settings().model_copy(update={"qdrant_quantization": "scalar"}))
+        store._client = mock_client
+        await store._ensure_collection()
+
+        kwargs = mock_client.create_collection.call_args.kwargs
+        assert kwargs["vectors_config"].on_disk is True
+        scalar = kwargs["quantization_config"].scalar
+        assert scalar.type == models.ScalarType.INT8
+        assert scalar.always_ram is True
+
+    @pytest.mark.asyncio
+    async def test_existing_collection_quantization_updated(self) -> None:
+        """Switching the quantization mode should update an existing collection."""
+        from unittest.mock import MagicMock
+
+        from qdrant_client.http import models
+
+        mock_client = AsyncMock()
+        mock_client.get_collections.return_value = models.CollectionsResponse(
+            collections=[models.CollectionDescription(name="test_collection")]
+        )
+        info = MagicMock()
+        info.config.quantization_config = None
+        info.config.params.sparse_vectors = {"bm25": models.SparseVectorParams()}
+        mock_client.get_collection.return_value = info
+
+        store = QdrantVectorStore(
+            get_settings().model_copy(
+                update={"qdrant_quantization": "binary", "qdrant_collection": "test_collection"}
+            )
+        )
+        store._client = mock_client
+        await store._ensure_collection()
+
+        kwargs = mock_client.update_collection.call_args.kwargs
+        assert isinstance(kwargs["quantization_config"], models.BinaryQuantization)
+        mock_client.create_collection.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_quantized_search_rescores(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Searches on a quantized collection should oversample and rescore."""
+        monkeypatch.setenv("RAG_QDRANT_QUANTIZATION", "binary")
+        monkeypatch.setenv("RAG_QDRANT_QUANTIZATION_OVERSAMPLING", "3")
+        get_settings.cache_clear()
+        try:
+            store = QdrantVectorStore()
+        finally:
+            get_settings.cache_clear()
+
+        mock_client = AsyncMock()
+        mock_client.search.return_value = []
+        mock_client.search_batch.return_value = [[]]
+        store._client = mock_client
+        store._collection_initialized = True
+
+        await store.search(query_embedding=[0.1] * 384)
+        await store.search_batch([{"query_embedding": [0.1] * 384}])
+
+        params = mock_client.search.call_args.kwargs["search_params"]
+        assert params.quantization.rescore is True
+        assert params.quantization.oversampling == 3
+        batch_request = mock_client.search_batch.call_args.kwargs["requests"][0]
+        assert batch_request.params == params
+
+    @pytest.mark.asyncio
+    async def test_search_passes_server_timeout(self) -> None:
+        """Search should forward the configured server-side timeout."""
+        mock_client = AsyncMock()
+        mock_client.search.return_value = []
+
+        store = QdrantVectorStore(get_settings().model_copy(update={"qdrant_search_timeout_sec": 2}))
+        store._client = mock_client
+        store._collection_initialized = True
+
+        await store.search(query_embedding=[0.1] * 384)
+
+        assert mock_client.search.call_args.kwargs["timeout"] == 2
+
+    @pytest.mark.asyncio
+    async def test_concurrent_cold_requests_initialize_once(self) -> None:
+        """Hundreds of first requests should wait for one client and one collection check."""
+        from qdrant_client.http import models
+
+        async def list_collections() -> models.CollectionsResponse:
+            await asyncio.sleep(0.01)
+            return models.CollectionsResponse(collections=[])
+
+        events: list[str] = []
+        mock_client = AsyncMock()
+        mock_client.get_collections.side_effect = list_collections
+        mock_client.create_collection.side_effect = lambda **kwargs: events.append("created")
+        mock_client.search.side_effect = lambda **kwargs: events.append("search") or []
+
+        store = QdrantVectorStore()
+        with patch.object(store, "_create_client", return_value=mock_client) as create_client:
+            await asyncio.gather(
+                *(store.search(query_embedding=[0.1] * 384) for _ in range(200)),
+                *(store.health_check() for _ in range(100)),
+            )
+
+        create_client.assert_called_once()
+        mock_client.get_collections.assert_awaited_once()
+        mock_client.create_collection.assert_awaited_once()
+        # Nobody used the client before the collection existed
+        assert events[0] == "created"
+        assert events.count("search") == 200
+
+    @pytest.mark.asyncio
+    async def test_failed_collection_check_is_retried(self) -> None:
+        """A failed first check should not leave later requests on an unchecked client."""
+        from qdrant_client.http import models
+
+        mock_client = AsyncMock()
+        mock_client.get_collections.side_effect = [
+            ConnectionError("refused"),
+            models.CollectionsResponse(collections=[]),
+        ]
+
+        store = QdrantVectorStore()
+        with patch.object(store, "_create_client", return_value=mock_client):
+            with pytest.raises(VectorStoreError):
+                await store.health_check()
+            assert await store.health_check() is True
+
+        mock_client.create_collection.assert_awaited_once()
+
     @pytest.mark.asyncio
     async def test_search_applies_filters(self) -> None:
         """Search should apply company_id and doc_type filters."""
@@ -164,6 +1459,69 @@ class TestVectorStore:
         # Should have been called multiple times (batches of 100)
         assert mock_client.upsert.call_count == 2
 
+    @pytest.mark.asyncio
+    async def test_upsert_point_ids_are_stable_per_document(self) -> None:
+        """Re-upserting a document's chunks should reuse the same point IDs."""
+        from chunking import Chunk
+
+        mock_client = AsyncMock()
+
+        store = QdrantVectorStore()
+        store._client = mock_client
+        store._collection_initialized = True
+
+        chunks = [
+            Chunk(text="Chunk", index=0, source="a.md", doc_type="general", metadata={"doc_id": "d1"}),
+            Chunk(text="Chunk", index=1, source="a.md", doc_type="general", metadata={"doc_id": "d1"}),
+        ]
+        await store.upsert_chunks(chunks, [[0.1] * 384] * 2)
+        await store.upsert_chunks(chunks, [[0.1] * 384] * 2)
+
+        first, second = (call.kwargs["points"] for call in mock_client.upsert.call_args_list)
+        assert [p.id for p in first] == [p.id for p in second]
+        assert first[0].id != first[1].id
+
+    @pytest.mark.asyncio
+    async def test_search_batch_single_request(self) -> None:
+        """search_batch should send all queries in one Qdrant batch call."""
+        mock_client = AsyncMock()
+        mock_client.search_batch.return_value = [[], []]
+
+        store = QdrantVectorStore()
+        store._client = mock_client
+        store._collection_initialized = True
+
+        results = await store.search_batch(
+            [
+                {"query_embedding": [0.1] * 384, "top_k": 3},
+                {"query_embedding": [0.2] * 384, "company_id": "acme"},
+            ]
+        )
+
+        assert results == [[], []]
+        mock_client.search_batch.assert_awaited_once()
+        requests = mock_client.search_batch.call_args[1]["requests"]
+        assert requests[0].limit == 3
+        assert requests[1].filter is not None
+
+    @pytest.mark.asyncio
+    async def test_search_batch_falls_back_per_query(self) -> None:
+        """A failed batch should be retried per query, isolating the bad one."""
+        mock_client = AsyncMock()
+        mock_client.search_batch.side_effect = Exception("bad request")
+        mock_client.search.side_effect = [Exception("bad filter"), []]
+
+        store = QdrantVectorStore()
+        store._client = mock_client
+        store._collection_initialized = True
+
+        results = await store.search_batch(
+            [{"query_embedding": [0.1] * 384}, {"query_embedding": [0.2] * 384}]
+        )
+
+        assert isinstance(results[0], VectorStoreError)
+        assert results[1] == []
+
     @pytest.mark.asyncio
     async def test_health_check(self) -> None:
         """Health check should verify Qdrant connection."""
@@ -191,6 +1549,235 @@ class TestVectorStore:
             await store.health_check()
 
 
+class TestTenantPartitioning:
+    """Tests for per-tenant payload indexing and shard routing."""
+
+    @staticmethod
+    def _store(partitioning: str, shard_keys: list[str] | None = None) -> tuple:
+        from unittest.mock import MagicMock
+
+        from qdrant_client.http import models
+
+        mock_client = AsyncMock()
+        mock_client.get_collections.return_value = models.CollectionsResponse(collections=[])
+        cluster = MagicMock()
+        cluster.result.local_shards = [
+            models.LocalShardInfo(shard_id=i, shard_key=key, points_count=1, state="Active")
+            for i, key in enumerate(shard_keys or [])
+        ]
+        cluster.result.remote_shards = []
+        mock_client.http.distributed_api.collection_cluster_info.return_value = cluster
+
+        store = QdrantVectorStore(
+            get_settings().model_copy(update={"tenant_partitioning": partitioning})
+        )
+        store._client = mock_client
+        return store, mock_client
+
+    @pytest.mark.asyncio
+    async def test_payload_mode_creates_tenant_index(self) -> None:
+        """Payload mode should mark company_id as a tenant index with per-tenant graphs."""
+        store, mock_client = self._store("payload")
+        await store._ensure_collection()
+
+        create_kwargs = mock_client.create_collection.call_args.kwargs
+        assert create_kwargs["hnsw_config"].payload_m == 16
+        index_calls = {
+            call.kwargs["field_name"]: call.kwargs["field_schema"]
+            for call in mock_client.create_payload_index.call_args_list
+        }
+        assert index_calls["company_id"].is_tenant is True
+
+    @pytest.mark.asyncio
+    async def test_shards_mode_routes_upserts_by_tenant(self) -> None:
+        """Shards mode should create each tenant's shard once and route upserts to it."""
+        from qdrant_client.http import models
+
+        from chunking import Chunk
+
+        store, mock_client = self._store("shards", shard_keys=["acme"])
+        await store._ensure_collection()
+        assert mock_client.create_collection.call_args.kwargs["sharding_method"] == (
+            models.ShardingMethod.CUSTOM
+        )
+
+        chunks = [
+            Chunk(text="a", index=0, source="a.md", doc_type="general", company_id="acme"),
+            Chunk(text="b", index=1, source="b.md", doc_type="general", company_id="globex"),
+            Chunk(text="c", index=2, source="c.md", doc_type="general", company_id="globex"),
+            Chunk(text="d", index=3, source="d.md", doc_type="general"),
+        ]
+        await store.upsert_chunks(chunks, [[0.1] * 384] * 4)
+
+        created = [call.kwargs["shard_key"] for call in mock_client.create_shard_key.call_args_list]
+        assert created == ["globex", "_shared"]
+        routed = {
+            call.kwargs["shard_key_selector"]: len(call.kwargs["points"])
+            for call in mock_client.upsert.call_args_list
+        }
+        assert routed == {"acme": 1, "globex": 2, "_shared": 1}
+
+    @pytest.mark.asyncio
+    async def test_shards_mode_search_hits_tenant_shard(self) -> None:
+        """Tenant searches should target the tenant's shard; unknown tenants return nothing."""
+        store, mock_client = self._store("shards", shard_keys=["acme"])
+        store._collection_initialized = True
+        await store._load_shard_keys(mock_client)
+        mock_client.search.return_value = []
+
+        await store.search(query_embedding=[0.1] * 384, company_id="acme")
+        assert mock_client.search.call_args.kwargs["shard_key_selector"] == "acme"
+
+        assert await store.search(query_embedding=[0.1] * 384, company_id="unknown") == []
+        assert mock_client.search.await_count == 1
+
+        mock_client.search_batch.return_value = [[]]
+        results = await store.search_batch(
+            [
+                {"query_embedding": [0.1] * 384, "company_id": "unknown"},
+                {"query_embedding": [0.1] * 384, "company_id": "acme"},
+            ]
+        )
+        assert results == [[], []]
+        requests = mock_client.search_batch.call_args.kwargs["requests"]
+        assert [r.shard_key for r in requests] == ["acme"]
+
+    @pytest.mark.asyncio
+    async def test_unknown_tenant_refreshes_shard_keys_at_most_once_per_interval(self) -> None:
+        """Requests for an unknown tenant should not each fetch the cluster info."""
+        from qdrant_client.http import models
+
+        store, mock_client = self._store("shards", shard_keys=["acme"])
+        store._collection_initialized = True
+        cluster_info = mock_client.http.distributed_api.collection_cluster_info
+        mock_client.search.return_value = []
+
+        await asyncio.gather(
+            *(store.search(query_embedding=[0.1] * 384, company_id="unknown") for _ in range(5))
+        )
+        assert cluster_info.await_count == 1
+        mock_client.search.assert_not_awaited()
+
+        # Another replica creates the shard; it is picked up once the list is stale
+        cluster_info.return_value.result.local_shards.append(
+            models.LocalShardInfo(shard_id=1, shard_key="unknown", points_count=1, state="Active")
+        )
+        assert await store.search(query_embedding=[0.1] * 384, company_id="unknown") == []
+        mock_client.search.assert_not_awaited()
+
+        store._shard_keys_loaded_at -= 10
+        await store.search(query_embedding=[0.1] * 384, company_id="unknown")
+        assert cluster_info.await_count == 2
+        assert mock_client.search.call_args.kwargs["shard_key_selector"] == "unknown"
+
+    @pytest.mark.asyncio
+    async def test_delete_tenant_drops_shard(self) -> None:
+        """Offboarding should drop the shard in shards mode and filter-delete otherwise."""
+        store, mock_client = self._store("shards", shard_keys=["acme"])
+        store._collection_initialized = True
+
+        assert await store.delete_tenant("acme") == "shard"
+        mock_client.delete_shard_key.assert_awaited_once()
+        mock_client.delete.assert_not_called()
+
+        store, mock_client = self._store("payload")
+        store._collection_initialized = True
+
+        assert await store.delete_tenant("acme") == "filter"
+        selector = mock_client.delete.call_args.kwargs["points_selector"]
+        assert selector.filter.must[0].match.value == "acme"
+
+    @pytest.mark.asyncio
+    async def test_delete_tenant_respects_open_circuit(self) -> None:
+        """Offboarding should fail fast instead of calling Qdrant while the circuit is open."""
+        from circuit_breaker import CircuitBreaker
+
+        for partitioning in ("shards", "payload"):
+            store, mock_client = self._store(partitioning, shard_keys=["acme"])
+            store._collection_initialized = True
+            store._breaker = CircuitBreaker("test_breaker", window=1, min_calls=1)
+            store._breaker._open()
+
+            with pytest.raises(VectorStoreError, match="circuit is open"):
+                await store.delete_tenant("acme")
+            mock_client.delete_shard_key.assert_not_awaited()
+            mock_client.delete.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_unsharded_collection_keeps_filter_mode(self) -> None:
+        """An existing unsharded collection cannot be routed by shard key."""
+        from unittest.mock import MagicMock
+
+        from qdrant_client.http import models
+
+        store, mock_client = self._store("shards")
+        mock_client.get_collections.return_value = models.CollectionsResponse(
+            collections=[models.CollectionDescription(name=store._settings.qdrant_collection)]
+        )
+        info = MagicMock()
+        info.config.quantization_config = None
+        info.config.params.sharding_method = None
+        info.config.params.sparse_vectors = {"bm25": models.SparseVectorParams()}
+        mock_client.get_collection.return_value = info
+
+        await store._ensure_collection()
+
+        assert store.partitioning == "none"
+
+
+class TestEmbeddedQdrant:
+    """Tests for the embedded (local mode) Qdrant."""
+
+    def test_client_options_select_local_mode(self) -> None:
+        """A path or :memory: URL should run qdrant-client in-process."""
+        from search.store import _client_options
+
+        def options(url: str) -> dict:
+            return _client_options(get_settings().model_copy(update={"qdrant_url": url}))
+
+        assert options(":memory:") == {"location": ":memory:"}
+        assert options("/var/lib/qdrant") == {"path": "/var/lib/qdrant"}
+        assert options("data/qdrant") == {"path": "data/qdrant"}
+        assert options("http://qdrant:6333")["url"] == "http://qdrant:6333"
+
+    @pytest.mark.asyncio
+    async def test_path_mode_persists_across_restarts(self, tmp_path) -> None:
+        """Chunks written to an embedded path should survive reopening it."""
+        from chunking import Chunk
+
+        settings = get_settings().model_copy(
+            update={"qdrant_url": str(tmp_path / "qdrant"), "tenant_partitioning": "shards"}
+        )
+        store = QdrantVectorStore(settings)
+        # Local mode has no sharding; tenants are filtered by payload instead
+        assert store.partitioning == "none"
+
+        vector = [1.0] + [0.0] * 383
+        await store.upsert_chunks(
+            [
+                Chunk(
+                    text="Gateway routes orders",
+                    index=0,
+                    source="a.md",
+                    doc_type="general",
+                    company_id="acme",
+                )
+            ],
+            [vector],
+        )
+        await store.close()
+
+        reopened = QdrantVectorStore(settings)
+        try:
+            stats = await reopened.stats()
+            results = await reopened.search(query_embedding=vector, company_id="acme")
+        finally:
+            await reopened.close()
+
+        assert stats["points_count"] == 1
+        assert [r["text"] for r in results] == ["Gateway routes orders"]
+
+
 class TestStatsEndpoint:
     """Tests for the stats endpoint."""
 
@@ -200,16 +1787,136 @@ class TestStatsEndpoint:
         mock_vector_store: AsyncMock,
     ) -> None:
         """Stats endpoint should return collection info."""
-        mock_collection_info = AsyncMock()
-        mock_collection_info.vectors_count = 1000
-        mock_collection_info.points_count = 1000
-        mock_collection_info.status = AsyncMock(value="green")
+        mock_vector_store.stats.return_value = {
+            "collection": "test_collection",
+            "vectors_count": 1000,
+            "points_count": 1000,
+            "status": "green",
+        }
+
+        response = test_client.get("/api/v1/rag/stats")
+
+        assert response.status_code == 200
+        assert response.json()["points_count"] == 1000
 
+    @pytest.mark.asyncio
+    async def test_store_stats_reads_collection(self) -> None:
+        """QdrantVectorStore.stats should read counts through the client."""
+        mock_info = AsyncMock()
+        mock_info.vectors_count = 10
+        mock_info.points_count = 10
+        mock_info.status = AsyncMock(value="green")
         mock_client = AsyncMock()
-        mock_client.get_collection.return_value = mock_collection_info
+        mock_client.get_collection.return_value = mock_info
+
+        store = QdrantVectorStore()
+        store._client = mock_client
+        store._collection_initialized = True
 
-        with patch.object(mock_vector_store, "_get_client", return_value=mock_client):
-            response = test_client.get("/api/v1/rag/stats")
+        stats = await store.stats()
 
-        # May succeed or fail depending on mock setup
-        assert response.status_code in [200, 503]
+        assert stats["points_count"] == 10
+        assert stats["status"] == "green"
+
+
+class TestSparseEncoder:
+    """Tests for the local BM25 encoder."""
+
+    def test_tokenize_keeps_identifiers_and_parts(self) -> None:
+        """Compound identifiers should match whole and by part."""
+        from search.sparse import tokenize
+
+        tokens = tokenize("The auth-service calls order_db v1.2")
+        assert "auth-service" in tokens
+        assert {"auth", "service", "order_db", "order", "db", "v1.2"} <= set(tokens)
+        assert "the" not in tokens
+
+    def test_document_weights_saturate(self) -> None:
+        """Repeated terms should gain weight with diminishing returns."""
+        from search.sparse import BM25Encoder, term_id
+
+        encoder = BM25Encoder(avg_doc_len=4)
+        vector = encoder.encode_document("kafka kafka kafka broker")
+        weights = dict(zip(vector.indices, vector.values, strict=True))
+
+        assert weights[term_id("kafka")] > weights[term_id("broker")]
+        assert weights[term_id("kafka")] < 3 * weights[term_id("broker")]
+        assert vector.indices == sorted(vector.indices)
+
+    def test_query_terms_have_unit_weight(self) -> None:
+        """Query vectors should weight each distinct term once."""
+        from search.sparse import BM25Encoder
+
+        vector = BM25Encoder().encode_query("SLA sla glossary")
+        assert len(vector.indices) == 2
+        assert set(vector.values) == {1.0}
+
+
+class TestHybridRetrieval:
+    """Dense, sparse and hybrid retrieval against an in-memory Qdrant."""
+
+    @pytest.fixture
+    async def store(self):
+        """Store seeded with chunks whose dense vectors ignore identifiers."""
+        import numpy as np
+
+        from chunking import Chunk
+
+        store = QdrantVectorStore(get_settings().model_copy(update={"qdrant_url": ":memory:"}))
+
+        rng = np.random.default_rng(0)
+        texts = [
+            "The PAYGW service validates card payments.",
+            "Payments are validated before checkout completes.",
+            "Checkout emits an order-created event.",
+        ]
+        vectors = rng.normal(size=(3, 384))
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        chunks = [
+            Chunk(text=text, index=i, source="payments.md", doc_type="general")
+            for i, text in enumerate(texts)
+        ]
+        await store.upsert_chunks(chunks, vectors.tolist())
+        store.test_vectors = vectors
+        yield store
+        await store.close()
+
+    @pytest.mark.asyncio
+    async def test_sparse_finds_exact_identifier(self, store: QdrantVectorStore) -> None:
+        """BM25 should surface the chunk naming the identifier."""
+        results = await store.search(None, top_k=1, mode="sparse", query_text="paygw")
+        assert results[0]["text"].startswith("The PAYGW service")
+
+    @pytest.mark.asyncio
+    async def test_hybrid_fuses_dense_and_sparse(self, store: QdrantVectorStore) -> None:
+        """Hybrid should return the dense match and the keyword match."""
+        # Dense vector points at chunk 2; the keyword points at chunk 0
+        results = await store.search(
+            store.test_vectors[2].tolist(),
+            top_k=2,
+            score_threshold=0.0,
+            mode="hybrid",
+            query_text="paygw",
+        )
+        texts = {r["text"] for r in results}
+        assert "Checkout emits an order-created event." in texts
+        assert "The PAYGW service validates card payments." in texts
+
+    @pytest.mark.asyncio
+    async def test_sparse_query_without_terms_returns_nothing(self, store: QdrantVectorStore) -> None:
+        """A query made only of stopwords should not hit Qdrant."""
+        assert await store.search(None, mode="sparse", query_text="the of and") == []
+
+    @pytest.mark.asyncio
+    async def test_mixed_mode_batch(self, store: QdrantVectorStore) -> None:
+        """Batches mixing modes should go through the Query API in order."""
+        results = await store.search_batch(
+            [
+                {"query_embedding": None, "top_k": 1, "mode": "sparse", "query_text": "paygw"},
+                {"query_embedding": store.test_vectors[2].tolist(), "top_k": 1, "mode": "dense"},
+                {"query_embedding": None, "mode": "sparse", "query_text": "the"},
+            ]
+        )
+        assert results[0][0]["text"].startswith("The PAYGW service")
+        assert results[1][0]["text"] == "Checkout emits an order-created event."
+        assert results[2] == []
@@ -0,0 +1,23 @@
+// Export the gallery seed prompts as the RAG service's cache warm-up list
+// Run: bun run scripts/export-warmup-prompts.ts [output path]
+// (default output: rag/data/warmup_prompts.json; point RAG_WARMUP_PROMPTS_PATH at it)
+
+import { mkdirSync, writeFileSync } from 'node:fs';
+import { dirname } from 'node:path';
+import { SEED_PROMPTS } from '../data/seedPrompts.ts';
+
+const outputPath = process.argv[2] ?? 'rag/data/warmup_prompts.json';
+
+// SEED_PROMPTS already includes POPULAR_SEED_PROMPTS; most-viewed first so a
+// truncated or interrupted warm-up still covers the most clicked prompts
+const prompts = [...SEED_PROMPTS]
+  .sort((a, b) => b.views - a.views)
+  .map((entry) => ({ id: entry.id, query: entry.prompt_text }));
+
+const unique = prompts.filter(
+  (entry, index) => prompts.findIndex((other) => other.query === entry.query) === index
+);
+
+mkdirSync(dirname(outputPath), { recursive: true });
+writeFileSync(outputPath, JSON.stringify({ prompts: unique }, null, 2) + '\n');
+console.log(`Wrote ${unique.length} warm-up prompts to ${outputPath}`);
@@ -119,6 +119,8 @@ export async function ragSearch(
       method: 'POST',
       headers: {
         'Content-Type': 'application/json',
+        // Lets the service fit the whole search into the time we will wait
+        'X-Deadline-Ms': String(timeout),
       },
       body: JSON.stringify({
         query,
@@ -60,7 +60,7 @@ describe('RAG Client', () => {
         expect.stringContaining('/api/v1/rag/search'),
         expect.objectContaining({
           method: 'POST',
-          headers: { 'Content-Type': 'application/json' },
+          headers: { 'Content-Type': 'application/json', 'X-Deadline-Ms': '5000' },
           body: expect.stringContaining('"query":"test query"'),
         })
       );